@@ -0,0 +1,49 @@
+"""
+Kør et script med Snapchat's CDN omdirigeret til fake_cdn.py.
+
+    python benchmarks/cdn_shim.py http://127.0.0.1:8765 scripts/1_download.py --workers 16
+
+Alle https requests til *.api.snapchat.com sendes i stedet til den givne
+base URL (path og query beholdes). Scriptet selv er uændret — omdirigeringen
+sker i requests' HTTPAdapter, så session pooling, retries og Range requests
+kører som normalt.
+"""
+
+import re
+import runpy
+import sys
+from pathlib import Path
+
+from requests.adapters import HTTPAdapter
+
+SNAPCHAT_URL = re.compile(r'^https://[^/]*\.api\.snapchat\.com(?=/)')
+
+
+def install(base_url):
+    """Omdirigér alle requests til *.api.snapchat.com til base_url."""
+    base_url = base_url.rstrip('/')
+    original_send = HTTPAdapter.send
+
+    def send(self, request, *args, **kwargs):
+        request.url = SNAPCHAT_URL.sub(base_url, request.url)
+        return original_send(self, request, *args, **kwargs)
+
+    HTTPAdapter.send = send
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__.strip())
+        sys.exit(2)
+
+    base_url, script = sys.argv[1], Path(sys.argv[2])
+    install(base_url)
+
+    # Scriptet skal se sig selv som __main__ og kunne importere sine nabomoduler
+    sys.argv = [str(script)] + sys.argv[3:]
+    sys.path.insert(0, str(script.resolve().parent))
+    runpy.run_path(str(script), run_name='__main__')
+
+
+if __name__ == "__main__":
+    main()
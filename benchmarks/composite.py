@@ -0,0 +1,132 @@
+"""
+Benchmark af overlay compositing (2_unzip.py --composite) i billeder/s.
+
+Genererer N overlay-ZIPs som Snapchat's (JPEG + PNG overlay med et
+halvgennemsigtigt tekstbånd) og kører composite_zip over en process pool
+med forskellige antal workers.
+
+Brug:
+    python benchmarks/composite.py
+    python benchmarks/composite.py --images 500 --size 1080x1920 --workers 1,2,4,8
+
+Compositing er CPU-bundet, så flere workers end CPU'er (se os.sched_getaffinity,
+som tager højde for containere) giver ingen gevinst — de rækker markeres
+med "(> CPU'er)". På en maskine med én CPU er 1 og 2 workers lige hurtige.
+
+Kræver numpy og Pillow.
+"""
+
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from overlay_composite import COMPOSITED, composite_zip, missing_dependencies  # noqa: E402
+
+IMAGES = 200
+SIZE = (1080, 1920)
+BAND_HEIGHT = 0.08     # Tekstbåndets højde som andel af billedet
+
+
+def make_pair(width, height, seed):
+    """(jpeg bytes, png bytes) — et støjfyldt billede og et overlay med tekstbånd."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+
+    overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    top = rng.randrange(height // 4, height * 3 // 4)
+    band = int(height * BAND_HEIGHT)
+    draw.rectangle((0, top, width, top + band), fill=(0, 0, 0, 128))
+    for x in range(width // 10, width * 9 // 10, width // 20):
+        draw.rectangle((x, top + band // 4, x + width // 40, top + band * 3 // 4), fill=(255, 255, 255, 255))
+    overlay_buffer = io.BytesIO()
+    overlay.save(overlay_buffer, 'PNG')
+    return buffer.getvalue(), overlay_buffer.getvalue()
+
+
+def write_zips(folder, count, size):
+    """count ZIPs i folder (få unikke billeder genbruges, så genereringen er hurtig)."""
+    pairs = [make_pair(*size, seed) for seed in range(min(count, 8))]
+    paths = []
+    for n in range(count):
+        jpeg, png = pairs[n % len(pairs)]
+        path = folder / f"{n:08X}-0000-0000-0000-000000000000.zip"
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as archive:
+            archive.writestr(f"{path.stem}-main.jpg", jpeg)
+            archive.writestr(f"{path.stem}-overlay.png", png)
+        paths.append(path)
+    return paths
+
+
+def run(paths, workers):
+    """Compositér alle ZIPs. Returns (sekunder, antal composited)."""
+    start = time.perf_counter()
+    if workers == 1:
+        results = [composite_zip(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(composite_zip, paths, chunksize=4))
+    seconds = time.perf_counter() - start
+    return seconds, sum(1 for result in results if result[4] == COMPOSITED)
+
+
+def usable_cpus():
+    """CPU'er processen må bruge (færre end os.cpu_count() i en begrænset container)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark af overlay compositing.")
+    parser.add_argument('--images', type=int, default=IMAGES, help=f"antal billeder (default: {IMAGES})")
+    parser.add_argument('--size', default=f"{SIZE[0]}x{SIZE[1]}", help="billedstørrelse BxH (default: 1080x1920)")
+    parser.add_argument(
+        '--workers', default=",".join(str(n) for n in sorted({1, 2, usable_cpus()})),
+        help="kommasepareret liste af antal processer",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    missing = missing_dependencies()
+    if missing:
+        print(f"❌ Kræver: {', '.join(missing)}  (pip install numpy pillow)")
+        return
+
+    size = tuple(int(n) for n in args.size.lower().split('x'))
+    folder = Path(tempfile.mkdtemp(prefix="snap-composite-"))
+    try:
+        print(f"🖼️  Genererer {args.images} ZIPs ({size[0]}x{size[1]})...")
+        paths = write_zips(folder, args.images, size)
+
+        cpus = usable_cpus()
+        print(f"🧮 {cpus} CPU'er til rådighed")
+        print(f"{'workers':>8}{'sekunder':>10}{'billeder/s':>12}{'ms/billede':>12}")
+        for workers in (int(n) for n in args.workers.split(',') if n.strip()):
+            seconds, done = run(paths, workers)
+            note = "  (> CPU'er)" if workers > cpus else ""
+            print(f"{workers:>8}{seconds:>10.2f}{done / seconds:>12.1f}"
+                  f"{seconds / done * 1000 * min(workers, cpus):>12.1f}{note}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
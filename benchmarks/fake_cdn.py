@@ -0,0 +1,184 @@
+"""
+Lokal stand-in for Snapchat's CDN (api.snapchat.com/dmd/mm).
+
+Svarer på /dmd/mm?...&mid=UUID med payloaden fra synthetic_export.py
+(JPG, MP4 eller overlay-ZIP) og den Content-Type det rigtige CDN bruger.
+Understøtter keep-alive og Range requests (206 + Content-Range), så
+session pooling og resume i 1_download.py bliver målt som i virkeligheden.
+
+Fejl kan injiceres:
+    latency        ms ventetid før hvert svar
+    error_rate     andel af requests der får 503 eller 429
+    truncate_rate  andel af svar der lukkes efter halvdelen af body'en
+
+Brug:
+    python benchmarks/fake_cdn.py --port 8765 --latency-ms 20 --error-rate 0.01
+
+eller fra kode:
+    with FakeCDN(latency=20) as cdn:
+        print(cdn.url)
+"""
+
+import argparse
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic_export import JPG_BYTES, MP4_BYTES, OVERLAY_BYTES, make_payload
+
+RANGE_PATTERN = re.compile(r'bytes=(\d+)-(\d*)$')
+RETRY_AFTER = 1        # Sekunder i Retry-After ved 429/503
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive
+    server_version = 'FakeCDN/1.0'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+
+        if server.latency:
+            time.sleep(server.latency / 1000)
+
+        parsed = urlparse(self.path)
+        mid = parse_qs(parsed.query).get('mid', [None])[0]
+        if parsed.path != '/dmd/mm' or not mid:
+            server.count('404')
+            self._send_empty(404)
+            return
+
+        if server.error_rate and server.rng.random() < server.error_rate:
+            status = server.rng.choice((429, 503))
+            server.count(str(status))
+            self._send_empty(status, {'Retry-After': str(RETRY_AFTER)})
+            return
+
+        body, content_type = server.payload(mid.upper())
+        status, headers = 200, {}
+
+        match = RANGE_PATTERN.match(self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(body) - 1
+            if start >= len(body):
+                server.count('416')
+                self._send_empty(416, {'Content-Range': f"bytes */{len(body)}"})
+                return
+            headers['Content-Range'] = f"bytes {start}-{end}/{len(body)}"
+            body = body[start:end + 1]
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if server.truncate_rate and len(body) > 1 and server.rng.random() < server.truncate_rate:
+            # Fuld Content-Length men kun halvdelen af body'en — som en afbrudt forbindelse
+            server.count('truncated')
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        self.wfile.write(body)
+        server.count(str(status))
+        server.count('bytes', len(body))
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+
+class FakeCDN(ThreadingHTTPServer):
+    """
+    HTTP server der kører i en baggrundstråd.
+
+    stats tæller requests, statuskoder, 'truncated' og 'bytes'.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0, error_rate=0.0, truncate_rate=0.0,
+                 sizes=None, seed=1):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.sizes = sizes or {'jpg': JPG_BYTES, 'mp4': MP4_BYTES, 'overlay': OVERLAY_BYTES}
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def payload(self, uuid):
+        """make_payload med cache, så serveren ikke bliver flaskehalsen ved retries/Range."""
+        cached = self._cache.get(uuid)
+        if cached is None:
+            cached = self._cache[uuid] = make_payload(uuid, self.sizes)
+        return cached
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lokal stand-in for Snapchat's CDN.")
+    parser.add_argument('--port', type=int, default=8765, help="port (default: 8765)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="ventetid per svar i ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="andel 429/503 svar (0-1)")
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help="andel svar der afbrydes halvvejs (0-1)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cdn = FakeCDN(args.port, args.latency_ms, args.error_rate, args.truncate_rate)
+    print(f"🌐 Fake CDN på {cdn.url}/dmd/mm  (Ctrl+C for at stoppe)")
+    try:
+        cdn.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cdn.server_close()
+        print(f"📊 {dict(cdn.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Offline benchmark af hele kæden: parse → download → unzip → sort.
+
+Ingen Snapchat konto nødvendig. For hver skala (antal memories):
+    1. Generér en syntetisk memories_history.html (synthetic_export.py)
+    2. Start en lokal CDN (fake_cdn.py) med valgfri latency/fejl
+    3. Kopiér scripts/ til et midlertidigt projekt og kør:
+         parse         iter_memories + manifest cache (kold og varm)
+         1_download    via cdn_shim.py mod den lokale CDN
+         2_unzip
+         3_sort
+    4. Tjek at data/sorted/ indeholder én fil per unik memory
+
+Brug:
+    python benchmarks/run.py                                # 1k, 10k, 100k
+    python benchmarks/run.py --scales 1000 --latency-ms 20 --error-rate 0.01
+    python benchmarks/run.py --json after.json --compare before.json
+
+Output: tabel med sekunder, memories/s, MB/s og peak RSS per trin.
+Med --json gemmes tallene, og --compare viser ændringen i procent i
+forhold til en tidligere kørsel.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_cdn import FakeCDN
+from synthetic_export import write_export
+
+# ─── Konfiguration ───────────────────────────────────────────────────────────
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+BENCH_DIR = Path(__file__).resolve().parent
+
+SCALES = (1000, 10000, 100000)
+WORKERS = 16               # Samtidige downloads (lokal CDN kan sagtens følge med)
+UNLIMITED_RATE = 1e6       # Rate limiteren skal ikke være det vi måler
+STEPS = ('parse', '1_download', '2_unzip', '3_sort')
+
+
+# ─── Hjælpefunktioner ────────────────────────────────────────────────────────
+
+def tree_size(folder):
+    """(antal filer, bytes) under folder (rekursivt)."""
+    count = size = 0
+    stack = [folder]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    count += 1
+                    size += entry.stat(follow_symlinks=False).st_size
+    return count, size
+
+
+def media_files(folder):
+    """Antal billeder/videoer under folder (uden journaler, ledgers o.l.)."""
+    count = 0
+    for _, _, files in os.walk(folder):
+        count += sum(1 for name in files if name.lower().endswith(('.jpg', '.mp4', '.png')))
+    return count
+
+
+def make_workspace(root, rows, seed):
+    """
+    Nyt projekt med kopi af scripts/ og en syntetisk eksport.
+
+    scripts/ kopieres (ikke symlinkes), da scriptene finder projektet
+    via deres egen placering.
+    """
+    root.mkdir(parents=True)
+    shutil.copytree(SCRIPTS_DIR, root / "scripts", ignore=shutil.ignore_patterns('__pycache__'))
+    (root / "input").mkdir()
+    (root / "logs").mkdir()
+    html_path = root / "input" / "memories_history.html"
+    uuids = write_export(html_path, rows, seed=seed)
+    return html_path, uuids
+
+
+def run_step(workspace, name, command):
+    """
+    Kør ét script som subprocess med output i logs/<name>.log.
+
+    Returns:
+        (sekunder, peak RSS i MB)
+    """
+    log_path = workspace / "logs" / f"{name}.log"
+    with open(log_path, 'w', encoding='utf-8') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workspace, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 giver rusage for netop denne proces (ru_maxrss er i KB på Linux)
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    if process.returncode != 0:
+        raise RuntimeError(f"{name} fejlede (exit {process.returncode}), se {log_path}")
+    return seconds, usage.ru_maxrss / 1024
+
+
+def time_parse(workspace, html_path):
+    """Parse i denne proces: iter_memories, load_manifest kold og varm."""
+    sys.path.insert(0, str(workspace / "scripts"))
+    try:
+        from manifest_cache import load_manifest
+        from memories_html import iter_memories
+
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_memories(html_path))
+        parse = time.perf_counter() - start
+
+        cache = workspace / "data" / "cache" / "benchmark_manifest.tsv"
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        load_manifest(html_path, cache)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        load_manifest(html_path, cache)
+        warm = time.perf_counter() - start
+        cache.unlink()
+    finally:
+        sys.path.pop(0)
+
+    return count, parse, cold, warm
+
+
+# ─── Benchmark ───────────────────────────────────────────────────────────────
+
+def run_scale(rows, args, base_dir):
+    """Kør hele kæden for én skala og returnér målingerne."""
+    workspace = base_dir / f"scale-{rows}"
+    print(f"\n🧪 {rows} memories  ({workspace})")
+
+    html_path, uuids = make_workspace(workspace, rows, args.seed)
+    python = sys.executable
+    result = {'rows': rows, 'unique': len(uuids), 'html_mb': html_path.stat().st_size / 1024 / 1024}
+
+    count, parse, cold, warm = time_parse(workspace, html_path)
+    result['parse'] = {'seconds': parse, 'items': count, 'manifest_cold': cold, 'manifest_warm': warm}
+    print(f"   parse       {parse:8.2f}s  (manifest kold {cold:.2f}s, varm {warm:.3f}s)")
+
+    with FakeCDN(latency=args.latency_ms, error_rate=args.error_rate,
+                 truncate_rate=args.truncate_rate, seed=args.seed) as cdn:
+        seconds, rss = run_step(workspace, '1_download', [
+            python, str(BENCH_DIR / "cdn_shim.py"), cdn.url, "scripts/1_download.py",
+            "--workers", str(args.workers), "--pool-size", str(args.workers),
+            "--rate", str(UNLIMITED_RATE), "--max-rate", str(UNLIMITED_RATE),
+        ])
+        stats = dict(cdn.stats)
+    _, raw_bytes = tree_size(workspace / "data" / "raw")
+    result['1_download'] = {'seconds': seconds, 'rss_mb': rss, 'bytes': raw_bytes, 'cdn': stats}
+    print(f"   1_download  {seconds:8.2f}s  ({stats.get('requests', 0)} requests)")
+
+    for name in ('2_unzip', '3_sort'):
+        seconds, rss = run_step(workspace, name, [python, f"scripts/{name}.py"])
+        result[name] = {'seconds': seconds, 'rss_mb': rss}
+        print(f"   {name:<11} {seconds:8.2f}s")
+
+    sorted_count = media_files(workspace / "data" / "sorted")
+    result['sorted'] = sorted_count
+    if sorted_count != len(uuids):
+        print(f"   ⚠️  {sorted_count} filer i data/sorted/, forventede {len(uuids)}")
+
+    if not args.keep:
+        shutil.rmtree(workspace)
+    return result
+
+
+def print_table(results, baseline=None):
+    """Tabel med én linje per skala og trin (+ ændring i forhold til baseline)."""
+    baseline = {entry['rows']: entry for entry in (baseline or [])}
+
+    print()
+    print("=" * 80)
+    header = f"{'memories':>9}  {'trin':<11}{'sekunder':>10}{'mem/s':>10}{'MB/s':>9}{'RSS MB':>9}"
+    if baseline:
+        header += f"{'ændring':>10}"
+    print(header)
+    print("-" * 80)
+
+    for entry in results:
+        before = baseline.get(entry['rows'], {})
+        for step in STEPS:
+            data = entry[step]
+            seconds = data['seconds']
+            rate = entry['rows'] / seconds if seconds else 0
+            line = f"{entry['rows']:>9}  {step:<11}{seconds:>10.2f}{rate:>10.0f}"
+            line += f"{data['bytes'] / 1024 / 1024 / seconds:>9.1f}" if data.get('bytes') and seconds else f"{'':>9}"
+            line += f"{data['rss_mb']:>9.0f}" if 'rss_mb' in data else f"{'':>9}"
+            if step in before and before[step]['seconds']:
+                change = (seconds - before[step]['seconds']) / before[step]['seconds'] * 100
+                line += f"{change:>+9.0f}%"
+            print(line)
+        if entry['sorted'] != entry['unique']:
+            print(f"{'':>11}⚠️  {entry['sorted']}/{entry['unique']} sorteret")
+    print("=" * 80)
+
+
+def parse_args():
+    """Læs kommandolinje-argumenter."""
+    parser = argparse.ArgumentParser(description="Offline benchmark af download → unzip → sort.")
+    parser.add_argument(
+        '--scales', default=",".join(str(scale) for scale in SCALES),
+        help="kommasepareret liste af antal memories (default: 1000,10000,100000)",
+    )
+    parser.add_argument(
+        '--workers', type=int, default=WORKERS,
+        help=f"samtidige downloads (default: {WORKERS})",
+    )
+    parser.add_argument('--latency-ms', type=float, default=0, help="CDN ventetid per svar i ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="andel 429/503 svar (0-1)")
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help="andel svar der afbrydes halvvejs (0-1)")
+    parser.add_argument('--seed', type=int, default=1, help="seed til den syntetiske eksport")
+    parser.add_argument('--workdir', type=Path, help="mappe til workspaces (default: midlertidig)")
+    parser.add_argument('--keep', action='store_true', help="behold workspaces efter kørslen")
+    parser.add_argument('--json', type=Path, metavar='FILE', help="gem resultaterne som JSON")
+    parser.add_argument('--compare', type=Path, metavar='FILE',
+                        help="sammenlign med en tidligere --json fil")
+    return parser.parse_args()
+
+
+def main():
+    """Kør benchmarks for alle skalaer."""
+    args = parse_args()
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+
+    print("=" * 80)
+    print("⏱️  SNAP MEMORY ORGANIZER BENCHMARK")
+    print("=" * 80)
+    print(f"Skalaer: {scales}  workers: {args.workers}  latency: {args.latency_ms} ms  "
+          f"fejl: {args.error_rate:.0%}  afbrudte: {args.truncate_rate:.0%}")
+
+    base_dir = args.workdir or Path(tempfile.mkdtemp(prefix="snap-bench-"))
+    base_dir.mkdir(parents=True, exist_ok=True)
+
+    results = [run_scale(rows, args, base_dir) for rows in scales]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'args': {
+                'workers': args.workers, 'latency_ms': args.latency_ms,
+                'error_rate': args.error_rate, 'truncate_rate': args.truncate_rate,
+                'seed': args.seed,
+            }, 'results': results}, f, indent=2)
+        print(f"💾 Gemt: {args.json}")
+
+    if not args.keep and not args.workdir:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
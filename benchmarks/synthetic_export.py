@@ -0,0 +1,162 @@
+"""
+Syntetisk Snapchat eksport til benchmarks.
+
+Genererer en memories_history.html i samme form som den rigtige eksport:
+
+    <tr><td>2019-07-04 18:22:10 UTC</td><td>Image</td><td>Latitude, Longitude: ...</td>
+        <td><a href="#" onclick="downloadMemories('https://us-east1-aws.api.snapchat.com/dmd/mm?...&amp;mid=UUID&amp;...', this, true); return false;">Download</a></td></tr>
+
+og de tilhørende payloads (JPG, MP4 og overlay-ZIP). Hvilken slags fil en
+UUID er, afgøres af UUID'en selv, så fake_cdn.py kan svare uden at kende
+eksporten.
+"""
+
+import io
+import random
+import struct
+import uuid as uuid_module
+import zipfile
+from datetime import datetime, timedelta
+
+CDN_HOST = 'us-east1-aws.api.snapchat.com'
+
+IMAGE_SHARE = 55      # Procent billeder
+VIDEO_SHARE = 35      # Procent videoer — resten er overlay-ZIPs
+JPG_BYTES = 8 * 1024
+MP4_BYTES = 32 * 1024
+OVERLAY_BYTES = 2 * 1024
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_IEND = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+
+_FILLER = random.Random(0).randbytes(1024 * 1024)
+
+
+def memory_kind(uuid):
+    """
+    'jpg', 'mp4', 'zip-jpg' eller 'zip-mp4' — afledt af UUID'en.
+
+    Fordelingen følger IMAGE_SHARE/VIDEO_SHARE.
+    """
+    bucket = int(uuid.replace('-', '')[:8], 16) % 100
+    if bucket < IMAGE_SHARE:
+        return 'jpg'
+    if bucket < IMAGE_SHARE + VIDEO_SHARE:
+        return 'mp4'
+    return 'zip-mp4' if bucket % 2 else 'zip-jpg'
+
+
+def _filler(size, uuid):
+    """Deterministisk fyld, forskelligt per UUID (så dedupe ikke slår filerne sammen)."""
+    if size >= len(_FILLER):
+        # Store filer (fx til benchmarks/write_path.py): gentag fyldet — headeren gør dem unikke
+        repeats, rest = divmod(size, len(_FILLER))
+        return _FILLER * repeats + _FILLER[:rest]
+    offset = int(uuid.replace('-', '')[-6:], 16) % (len(_FILLER) - size)
+    return _FILLER[offset:offset + size]
+
+
+def make_jpg(uuid, size=JPG_BYTES):
+    """SOI + APP1 segment med UUID'en + fyld + EOI."""
+    tag = uuid.encode()
+    header = b'\xff\xd8\xff\xe1' + struct.pack('>H', len(tag) + 2) + tag
+    return header + _filler(max(0, size - len(header) - 2), uuid) + b'\xff\xd9'
+
+
+def make_mp4(uuid, size=MP4_BYTES):
+    """ftyp + moov (med UUID'en) + mdat, så top-level boxes går op i filstørrelsen."""
+    ftyp = struct.pack('>I4s4sI8s', 24, b'ftyp', b'isom', 0x200, b'isomiso2')
+    tag = uuid.encode()
+    moov = struct.pack('>I4s', 8 + len(tag), b'moov') + tag
+    mdat_payload = _filler(max(0, size - len(ftyp) - len(moov) - 8), uuid)
+    mdat = struct.pack('>I4s', 8 + len(mdat_payload), b'mdat') + mdat_payload
+    return ftyp + moov + mdat
+
+
+def make_png(uuid, size=OVERLAY_BYTES):
+    """PNG signatur + en chunk med fyld + IEND (nok til check_png)."""
+    data = _filler(max(0, size - len(PNG_SIGNATURE) - len(PNG_IEND) - 12), uuid)
+    chunk = struct.pack('>I4s', len(data), b'tEXt') + data + b'\x00\x00\x00\x00'
+    return PNG_SIGNATURE + chunk + PNG_IEND
+
+
+def make_zip(uuid, media_kind, sizes):
+    """Stored ZIP som Snapchat's: <uuid>-main.<ext> + <uuid>-overlay.png."""
+    media = make_mp4(uuid, sizes['mp4']) if media_kind == 'mp4' else make_jpg(uuid, sizes['jpg'])
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        archive.writestr(f"{uuid}-main.{media_kind}", media)
+        archive.writestr(f"{uuid}-overlay.png", make_png(uuid, sizes['overlay']))
+    return buffer.getvalue()
+
+
+def make_payload(uuid, sizes=None):
+    """
+    Returns:
+        (body, content_type) som CDN'et ville svare med
+    """
+    sizes = sizes or {'jpg': JPG_BYTES, 'mp4': MP4_BYTES, 'overlay': OVERLAY_BYTES}
+    kind = memory_kind(uuid)
+    if kind == 'jpg':
+        return make_jpg(uuid, sizes['jpg']), 'image/jpeg'
+    if kind == 'mp4':
+        return make_mp4(uuid, sizes['mp4']), 'video/mp4'
+    # Overlay-ZIPs kommer med medietypen som Content-Type; 1_download.py kigger på magic bytes
+    media_kind = kind.split('-')[1]
+    content_type = 'video/mp4' if media_kind == 'mp4' else 'image/jpeg'
+    return make_zip(uuid, media_kind, sizes), content_type
+
+
+def generate_uuids(rows, seed=1):
+    """rows tilfældige (men reproducerbare) UUIDs i Snapchat's format."""
+    rng = random.Random(seed)
+    return [str(uuid_module.UUID(int=rng.getrandbits(128))).upper() for _ in range(rows)]
+
+
+def write_export(html_path, rows, duplicate_rate=0.02, same_minute_rate=0.05, seed=1):
+    """
+    Skriv en memories_history.html med rows unikke memories.
+
+    duplicate_rate af rækkerne gentages et andet sted i filen (som i rigtige
+    eksporter), og same_minute_rate deler minut med den forrige memory, så
+    nummereringen i 3_sort.py bliver brugt.
+
+    Returns:
+        liste af unikke UUIDs i HTML rækkefølge
+    """
+    rng = random.Random(seed)
+    uuids = generate_uuids(rows, seed)
+    start = datetime(2015, 1, 1)
+
+    timestamps = []
+    moment = start
+    for _ in uuids:
+        if timestamps and rng.random() < same_minute_rate:
+            moment = moment.replace(second=rng.randrange(60))
+        else:
+            moment = start + timedelta(seconds=rng.randrange(10 * 365 * 24 * 3600))
+        timestamps.append(moment)
+
+    order = list(range(rows))
+    duplicates = [rng.randrange(rows) for _ in range(int(rows * duplicate_rate))]
+    for index in duplicates:
+        order.insert(rng.randrange(len(order) + 1), index)
+
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html><html><head><title>Memories History</title></head><body>\n')
+        f.write('<h1>Snap Memories</h1><table><tbody>\n')
+        f.write('<tr><th>Date</th><th>Media Type</th><th>Location</th><th></th></tr>\n')
+        for index in order:
+            uuid = uuids[index]
+            media_type = 'Video' if 'mp4' in memory_kind(uuid) else 'Image'
+            url = (f"https://{CDN_HOST}/dmd/mm?uid={uuid_module.UUID(int=index)}"
+                   f"&amp;sid={uuid}&amp;mid={uuid}&amp;ts={index}&amp;sig=bench{index:x}")
+            f.write(
+                f"<tr><td>{timestamps[index]:%Y-%m-%d %H:%M:%S} UTC</td><td>{media_type}</td>"
+                f"<td>Latitude, Longitude: 55.6761, 12.5683</td>"
+                f"<td><a href=\"#\" onclick=\"downloadMemories('{url}', this, true); "
+                f"return false;\">Download</a></td></tr>\n"
+            )
+        f.write('</tbody></table></body></html>\n')
+
+    return uuids
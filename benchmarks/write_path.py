@@ -0,0 +1,115 @@
+"""
+Micro-benchmark af skrivevejen i 1_download.py (disk_writer.py) i MB/s.
+
+Henter de samme filer fra en lokal fake_cdn.py med tre udgaver af
+løkken fra response til .part fil:
+
+    8kb-sync    iter_content(8192) + f.write per chunk (som før)
+    adaptive    chunk størrelse efter Content-Length, stadig synkront
+    tuned       adaptive + fallocate (KEEP_SIZE) + writer tråd (som nu)
+
+Hver udgave køres --rounds gange; den bedste runde tæller, så støj fra
+page cache og andre processer fylder mindst muligt.
+
+Brug:
+    python benchmarks/write_path.py
+    python benchmarks/write_path.py --files 16 --size-mb 32 --rounds 5
+    python benchmarks/write_path.py --folder /mnt/nfs/tmp   # mål på et andet drev
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from disk_writer import chunk_size_for, preallocate, write_stream  # noqa: E402
+from fake_cdn import FakeCDN  # noqa: E402
+from synthetic_export import generate_uuids  # noqa: E402
+
+FILES = 12
+SIZE_MB = 24
+ROUNDS = 3
+MODES = ('8kb-sync', 'adaptive', 'tuned')
+
+
+def fetch(session, url, path, mode):
+    """Hent url til path med den givne udgave af skrivevejen. Returns bytes."""
+    with session.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        length = int(response.headers.get('Content-Length') or 0)
+        with open(path, 'wb') as f:
+            if mode == '8kb-sync':
+                written = 0
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+                        written += len(chunk)
+                return written
+
+            chunks = response.iter_content(chunk_size=chunk_size_for(length))
+            if mode == 'adaptive':
+                written, _ = write_stream(f, chunks)          # expected=0 → synkront
+                return written
+
+            preallocate(f, 0, length)
+            written, _ = write_stream(f, chunks, length)
+            return written
+
+
+def run(session, urls, folder, mode):
+    """Én runde: hent alle urls. Returns (sekunder, bytes)."""
+    for path in folder.iterdir():
+        path.unlink()
+    start = time.perf_counter()
+    total = 0
+    for n, url in enumerate(urls):
+        total += fetch(session, url, folder / f"{n}.part", mode)
+    return time.perf_counter() - start, total
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro-benchmark af download skrivevejen.")
+    parser.add_argument('--files', type=int, default=FILES, help=f"antal filer (default: {FILES})")
+    parser.add_argument('--size-mb', type=float, default=SIZE_MB, help=f"MB per fil (default: {SIZE_MB})")
+    parser.add_argument('--rounds', type=int, default=ROUNDS, help=f"runder per udgave (default: {ROUNDS})")
+    parser.add_argument('--folder', type=Path, help="mappe at skrive i (default: en temp mappe)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+    folder = Path(tempfile.mkdtemp(prefix="snap-write-", dir=args.folder))
+    # Alle memories som videoer af samme størrelse (overlay-ZIPs bliver lidt større)
+    sizes = {'jpg': size, 'mp4': size, 'overlay': 1024}
+
+    try:
+        with FakeCDN(sizes=sizes) as cdn, requests.Session() as session:
+            uuids = generate_uuids(args.files)
+            urls = [f"{cdn.url}/dmd/mm?uid=bench&sid=x&mid={uuid}" for uuid in uuids]
+            print(f"🧪 {args.files} filer á {args.size_mb:g} MB mod {cdn.url} → {folder}")
+            run(session, urls, folder, 'tuned')       # Varm payload cachen op i serveren
+
+            results = {}
+            print(f"{'udgave':<12}{'sekunder':>10}{'MB/s':>10}")
+            for mode in MODES:
+                best = min(run(session, urls, folder, mode) for _ in range(args.rounds))
+                seconds, total = best
+                results[mode] = total / 1024 / 1024 / seconds
+                print(f"{mode:<12}{seconds:>10.2f}{results[mode]:>10.1f}")
+
+            change = (results['tuned'] / results['8kb-sync'] - 1) * 100
+            print(f"\n⚡ tuned vs 8kb-sync: {change:+.0f}% MB/s")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
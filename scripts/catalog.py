@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Katalog over det sorterede bibliotek (data/catalog.sqlite).
+
+3_sort.py og pipeline.py skriver en række per memory de placerer i
+data/sorted/, og --undo fjerner rækkerne igen — kataloget opdateres
+løbende og bygges aldrig om fra bunden:
+
+    uuid          UUID fra Snapchat
+    taken_at      tidspunkt fra HTML'en i epoch-sekunder (UTC), NULL uden dato
+    media_type    'image' eller 'video' (ud fra filendelsen)
+    size          filstørrelse i bytes
+    path          sti relativt til data/sorted/
+    minute_index  nummeret efter minuttet i filnavnet ("... (14.32) 2.jpg" → 2)
+
+Forespørgsler på dato, type og UUID går gennem indekser i stedet for at
+gennemløbe YYYY/MM-måned/ mapperne og parse filnavnene.
+
+Brug:
+    python scripts/snap.py catalog --from 2019-06 --to 2019-08 --type video
+    python scripts/snap.py catalog --uuid ABCDEF12-...
+    python scripts/snap.py catalog --from 2020 --paths | xargs open
+    python scripts/snap.py catalog --summary
+    python scripts/snap.py catalog --rebuild     # byg fra ledgeren (fx efter manuelle ændringer)
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sort_ledger import LEDGER_NAME, read_ledger
+
+CATALOG_NAME = 'catalog.sqlite'
+
+# ─── Konfiguration ───────────────────────────────────────────────────────────
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CATALOG_FILE = PROJECT_ROOT / "data" / CATALOG_NAME
+SORTED_DIR = PROJECT_ROOT / "data" / "sorted"
+HTML_FILE = PROJECT_ROOT / "input" / "memories_history.html"
+MANIFEST_CACHE = PROJECT_ROOT / "data" / "cache" / "memories_manifest.tsv"
+SORT_LEDGER = PROJECT_ROOT / "data" / LEDGER_NAME
+
+COMMIT_EVERY = 500       # Commit efter så mange rækker (pipeline.py kører længe)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.heic', '.webp'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov'}
+MINUTE_INDEX_PATTERN = re.compile(r'\(\d{2}\.\d{2}\) (\d+)\.[^./]+$')
+FILENAME_TIME_PATTERN = re.compile(r'(\d{2})-(\d{2})-(\d{4}) \((\d{2})\.(\d{2})\)[^/]*$')
+DATE_PATTERN = re.compile(r'^(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    uuid TEXT PRIMARY KEY,
+    taken_at INTEGER,
+    media_type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    minute_index INTEGER
+);
+CREATE INDEX IF NOT EXISTS memories_by_time ON memories (taken_at);
+CREATE INDEX IF NOT EXISTS memories_by_type ON memories (media_type, taken_at);
+"""
+
+Entry = namedtuple('Entry', ['uuid', 'taken_at', 'media_type', 'size', 'path', 'minute_index'])
+
+
+def media_type_of(path):
+    """'image', 'video' eller 'other' ud fra filendelsen."""
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    return 'other'
+
+
+def minute_index_of(path):
+    """Nummeret efter minuttet i et sorteret filnavn, eller None hvis det står alene."""
+    match = MINUTE_INDEX_PATTERN.search(str(path))
+    return int(match.group(1)) if match else None
+
+
+def epoch_from_path(path):
+    """Tidspunktet i et sorteret filnavn (på minuttet) i epoch-sekunder, eller None."""
+    match = FILENAME_TIME_PATTERN.search(str(path))
+    if not match:
+        return None
+    day, month, year, hour, minute = (int(part) for part in match.groups())
+    try:
+        return int(datetime(year, month, day, hour, minute, tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return None
+
+
+class Catalog:
+    """
+    SQLite katalog: UUID → (tidspunkt, type, størrelse, sti, minut-nummer).
+
+    Kan skrives fra en anden tråd end den der åbnede det (pipeline.py's
+    sort stage); alle kald tager en lås.
+
+    Brug:
+        with Catalog(CATALOG_FILE, SORTED_DIR) as catalog:
+            catalog.record(uuid, path, taken_at)
+            catalog.forget(uuid)
+            catalog.get(uuid)
+            catalog.query(start, end, media_type)
+    """
+
+    def __init__(self, db_path, sorted_root):
+        self.db_path = Path(db_path)
+        self.sorted_root = Path(sorted_root)
+        self.created = not self.db_path.exists()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def record(self, uuid, path, taken_at=None):
+        """Registrér (eller flyt) en memory der nu ligger på path i data/sorted/."""
+        path = Path(path)
+        relative = path.relative_to(self.sorted_root).as_posix()
+        self._write(
+            "INSERT OR REPLACE INTO memories (uuid, taken_at, media_type, size, path, minute_index) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (uuid.upper(), taken_at, media_type_of(relative), path.stat().st_size,
+             relative, minute_index_of(relative)),
+        )
+
+    def forget(self, uuid):
+        """Fjern en memory der ikke længere ligger i data/sorted/ (fx efter --undo)."""
+        self._write("DELETE FROM memories WHERE uuid = ?", (uuid.upper(),))
+
+    def clear(self):
+        self._write("DELETE FROM memories", ())
+
+    def get(self, uuid):
+        """Entry for UUID'en, eller None hvis den ikke er placeret."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM memories WHERE uuid = ?", (uuid.upper(),)
+            ).fetchone()
+        return Entry(*row) if row else None
+
+    def query(self, start=None, end=None, media_type=None, limit=None):
+        """
+        Memories med start <= taken_at < end (epoch-sekunder), ældste først.
+
+        Uden start og end kommer også memories uden dato med (til sidst).
+        """
+        conditions, parameters = [], []
+        if start is not None:
+            conditions.append("taken_at >= ?")
+            parameters.append(start)
+        if end is not None:
+            conditions.append("taken_at < ?")
+            parameters.append(end)
+        if media_type:
+            conditions.append("media_type = ?")
+            parameters.append(media_type)
+
+        sql = "SELECT * FROM memories"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY taken_at IS NULL, taken_at, path"
+        if limit:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(sql, parameters).fetchall()
+        return [Entry(*row) for row in rows]
+
+    def summary(self):
+        """[(år eller None, media_type, antal, bytes)] sorteret efter år."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT strftime('%Y', taken_at, 'unixepoch'), media_type, COUNT(*), SUM(size) "
+                "FROM memories GROUP BY 1, 2 ORDER BY 1 IS NULL, 1, 2"
+            ).fetchall()
+
+    def _write(self, sql, parameters):
+        with self._lock:
+            self._db.execute(sql, parameters)
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._db.commit()
+                self._uncommitted = 0
+
+
+def rebuild(catalog, ledger_path, epoch_of):
+    """
+    Byg kataloget fra sort ledgeren: én række per memory der stadig findes.
+
+    epoch_of(uuid) giver tidspunktet i epoch-sekunder eller None. Memories
+    fra en ældre eksport der ikke står i den nuværende HTML, får tidspunktet
+    fra filnavnet (på minuttet).
+
+    Returns:
+        antal rækker
+    """
+    catalog.clear()
+    count = 0
+    for uuid, relative in read_ledger(ledger_path).items():
+        path = catalog.sorted_root / relative
+        if not path.exists():
+            continue
+        taken_at = epoch_of(uuid)
+        catalog.record(uuid, path, taken_at if taken_at is not None else epoch_from_path(relative))
+        count += 1
+    return count
+
+
+def manifest_epochs(html_path=HTML_FILE, cache_path=MANIFEST_CACHE):
+    """epoch_of funktion til rebuild() fra manifest-indekset (lukkes af kalderen)."""
+    from manifest_cache import load_index
+    from uuid_index import NO_TIMESTAMP
+
+    index = load_index(html_path, cache_path)
+
+    def epoch_of(uuid):
+        entry = index.get(uuid)
+        return None if entry is None or entry[1] == NO_TIMESTAMP else entry[1]
+
+    return index, epoch_of
+
+
+# ─── Kommandolinje ───────────────────────────────────────────────────────────
+
+def parse_date(text, end=False):
+    """
+    'YYYY', 'YYYY-MM' eller 'YYYY-MM-DD' → epoch-sekunder (UTC).
+
+    Med end=True gives starten af perioden EFTER, så --to 2019-08 tager
+    hele august med.
+    """
+    match = DATE_PATTERN.match(text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"forventede YYYY, YYYY-MM eller YYYY-MM-DD, fik '{text}'")
+    year, month, day = int(match.group(1)), match.group(2), match.group(3)
+    try:
+        start = datetime(year, int(month or 1), int(day or 1), tzinfo=timezone.utc)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"ugyldig dato '{text}': {e}")
+    if end:
+        if day:
+            return int(start.timestamp()) + 86400
+        if month:
+            following = datetime(year + start.month // 12, start.month % 12 + 1, 1, tzinfo=timezone.utc)
+            return int(following.timestamp())
+        return int(datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+    return int(start.timestamp())
+
+
+def format_entry(entry):
+    taken = (
+        datetime.fromtimestamp(entry.taken_at, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        if entry.taken_at is not None else "(ingen dato)".ljust(19)
+    )
+    return f"{taken}  {entry.media_type:<5}  {entry.size / 1024 / 1024:>8.2f} MB  {entry.path}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Søg i kataloget over sorterede memories.")
+    parser.add_argument('--from', dest='start', type=parse_date, metavar='DATO',
+                        help="fra og med YYYY[-MM[-DD]] (UTC)")
+    parser.add_argument('--to', dest='end', type=lambda text: parse_date(text, end=True), metavar='DATO',
+                        help="til og med YYYY[-MM[-DD]] (UTC)")
+    parser.add_argument('--type', choices=('image', 'video'), help="kun billeder eller videoer")
+    parser.add_argument('--uuid', help="slå én memory op")
+    parser.add_argument('--limit', type=int, help="højst så mange resultater")
+    parser.add_argument('--paths', action='store_true', help="skriv kun absolutte stier (til xargs o.l.)")
+    parser.add_argument('--summary', action='store_true', help="antal og størrelse per år og type")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="byg kataloget forfra fra sort ledgeren og manifestet")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.rebuild:
+        index, epoch_of = None, lambda uuid: None
+        if HTML_FILE.exists():
+            index, epoch_of = manifest_epochs()
+        with Catalog(CATALOG_FILE, SORTED_DIR) as catalog:
+            count = rebuild(catalog, SORT_LEDGER, epoch_of)
+        if index is not None:
+            index.close()
+        print(f"✅ Katalog bygget: {count} memories → {CATALOG_FILE}")
+        return
+
+    if not CATALOG_FILE.exists():
+        print(f"❌ Intet katalog endnu ({CATALOG_FILE.name}) — kør sort, eller catalog --rebuild")
+        sys.exit(1)
+
+    with Catalog(CATALOG_FILE, SORTED_DIR) as catalog:
+        if args.uuid:
+            entry = catalog.get(args.uuid)
+            if entry is None:
+                print(f"❌ {args.uuid.upper()} er ikke placeret i data/sorted")
+                sys.exit(1)
+            print(SORTED_DIR / entry.path if args.paths else format_entry(entry))
+            return
+
+        if args.summary:
+            print(f"{'år':<14}{'type':<7}{'antal':>8}{'MB':>11}")
+            for year, media_type, count, size in catalog.summary():
+                print(f"{year or '(ingen dato)':<14}{media_type:<7}{count:>8}{(size or 0) / 1024 / 1024:>11.1f}")
+            return
+
+        entries = catalog.query(args.start, args.end, args.type, args.limit)
+
+    for entry in entries:
+        print(SORTED_DIR / entry.path if args.paths else format_entry(entry))
+    if not args.paths:
+        print(f"\n{len(entries)} memories")
+
+
+if __name__ == "__main__":
+    main()
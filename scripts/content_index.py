@@ -0,0 +1,191 @@
+"""
+Persistent indeks over indholdet af downloadede og sorterede filer.
+
+Snapchat eksporter indeholder ofte samme medie under forskellige UUIDs, og
+en ny eksport indeholder alt det gamle igen. Indekset gemmer for hver UUID
+størrelse, et hurtigt partial hash (start + slutning af filen) og hvor
+filen ligger nu. Et fuldt hash beregnes først når størrelse og partial hash
+kolliderer med en anden fil.
+
+Stier gemmes relativt til data/ mappen, så projektet kan flyttes.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+PARTIAL_BYTES = 64 * 1024     # Bytes fra start og slutning i partial hash
+HASH_CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS content (
+    uuid TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    partial_hash TEXT NOT NULL,
+    full_hash TEXT,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS content_by_partial ON content (size, partial_hash);
+"""
+
+
+def partial_hash(path, size):
+    """BLAKE2b af filstørrelsen plus de første og sidste PARTIAL_BYTES."""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(PARTIAL_BYTES))
+        if size > PARTIAL_BYTES:
+            f.seek(max(PARTIAL_BYTES, size - PARTIAL_BYTES))
+            digest.update(f.read(PARTIAL_BYTES))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """BLAKE2b af hele filen."""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def replace_with_hardlink(path, original):
+    """
+    Erstat path med et hardlink til original (atomisk via rename).
+
+    Returns:
+        True hvis det lykkedes, False hvis fx filerne ligger på forskellige diske
+    """
+    tmp_path = path.with_name(path.name + '.link')
+    try:
+        os.link(original, tmp_path)
+    except OSError:
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+class ContentIndex:
+    """
+    SQLite indeks: UUID → (størrelse, partial hash, fuldt hash, sti).
+
+    Kan deles mellem download threads (alle kald tager en lås).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.root = self.db_path.parent
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def known_path(self, uuid):
+        """Stien til UUID'ens fil hvis den er indekseret og stadig findes, ellers None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path FROM content WHERE uuid = ?", (uuid.upper(),)
+            ).fetchone()
+        if row is None:
+            return None
+        path = self.root / row[0]
+        return path if path.exists() else None
+
+    def add(self, uuid, path):
+        """
+        Indeksér en fil og find en evt. byte-identisk fil under et andet UUID.
+
+        Returns:
+            stien til den identiske fil, eller None
+        """
+        uuid = uuid.upper()
+        path = Path(path)
+        size = path.stat().st_size
+        quick = partial_hash(path, size)
+
+        with self._lock:
+            candidates = self._db.execute(
+                "SELECT uuid, full_hash, path FROM content "
+                "WHERE size = ? AND partial_hash = ? AND uuid != ?",
+                (size, quick, uuid),
+            ).fetchall()
+
+        duplicate = None
+        own_full = None
+        for other_uuid, other_full, other_path in candidates:
+            other_path = self.root / other_path
+            if not other_path.exists():
+                continue
+            if own_full is None:
+                own_full = full_hash(path)
+            if other_full is None:
+                other_full = full_hash(other_path)
+                with self._lock:
+                    self._db.execute(
+                        "UPDATE content SET full_hash = ? WHERE uuid = ?", (other_full, other_uuid)
+                    )
+            if other_full == own_full:
+                duplicate = other_path
+                break
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO content (uuid, size, partial_hash, full_hash, path) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (uuid, size, quick, own_full, self._relative(path)),
+            )
+            self._db.commit()
+        return duplicate
+
+    def move(self, uuid, new_path):
+        """Opdatér stien efter en fil er flyttet (fx af 3_sort.py)."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE content SET path = ? WHERE uuid = ?",
+                (self._relative(Path(new_path)), uuid.upper()),
+            )
+
+    def merge(self, other_path):
+        """
+        Kopiér rækkerne fra et andet indeks (fx en shard) ind i dette.
+
+        Stierne er relative til data/, så de gælder uændret. Rækker for en
+        UUID der allerede findes her, springes over.
+
+        Returns:
+            antal nye rækker
+        """
+        with self._lock:
+            self._db.commit()
+            self._db.execute("ATTACH DATABASE ? AS other", (str(other_path),))
+            try:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO content (uuid, size, partial_hash, full_hash, path) "
+                    "SELECT uuid, size, partial_hash, full_hash, path FROM other.content"
+                )
+                self._db.commit()
+            finally:
+                self._db.execute("DETACH DATABASE other")
+        return cursor.rowcount
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def _relative(self, path):
+        try:
+            return str(path.resolve().relative_to(self.root.resolve()))
+        except ValueError:
+            return str(path.resolve())
@@ -0,0 +1,154 @@
+"""
+Skrivevejen fra netværk til disk for 1_download.py.
+
+Tre ting gør store filer (videoer) billigere at skrive:
+
+    chunk størrelse   vælges ud fra Content-Length: 64 KB for billeder, op
+                      til 1 MB for videoer — i stedet for 8 KB, som kostede
+                      titusinder af Python iterationer per video
+    forhåndsallokering  fallocate(FALLOC_FL_KEEP_SIZE) reserverer hele filen
+                      på én gang, så den ikke vokser i små, fragmenterede
+                      bidder — uden at ændre filens størrelse, så en .part
+                      fil efter et kill stadig kan genoptages fra størrelsen
+    writer tråd       store filer skrives fra en baggrundstråd, så næste
+                      chunk kan læses fra socket'en mens den forrige skrives
+
+Små filer skrives direkte — en tråd koster mere end den sparer på få chunks.
+
+Måles med `python benchmarks/write_path.py`.
+"""
+
+import ctypes
+import ctypes.util
+import queue
+import sys
+import threading
+import time
+
+MIN_CHUNK = 64 * 1024            # Chunk størrelse for små filer og ukendt længde
+MAX_CHUNK = 1024 * 1024          # Loft: større chunks giver ikke mere, men bruger hukommelse
+CHUNKS_PER_FILE = 16             # Sigt efter ca. så mange chunks per fil
+PREALLOCATE_MIN = 1024 * 1024    # Forhåndsallokér kun filer over denne størrelse
+WRITER_MIN = 2 * 1024 * 1024     # Brug writer tråd kun for filer over denne størrelse
+WRITER_QUEUE = 8                 # Max chunks i kø til writer tråden (afgrænser hukommelsen)
+FALLOC_FL_KEEP_SIZE = 0x01       # linux/falloc.h: reservér blokke, men behold filens størrelse
+
+
+def _load_fallocate():
+    """libc's fallocate(2) via ctypes, eller None uden for Linux."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fallocate = libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+
+_fallocate = _load_fallocate()
+
+
+def chunk_size_for(content_length):
+    """Chunk størrelse (potens af 2 mellem MIN_CHUNK og MAX_CHUNK) for en fil."""
+    size = MIN_CHUNK
+    while size < MAX_CHUNK and size * CHUNKS_PER_FILE < (content_length or 0):
+        size *= 2
+    return size
+
+
+def preallocate(f, offset, length):
+    """
+    Reservér length bytes fra offset i en åben fil.
+
+    Filens størrelse ændres ikke (FALLOC_FL_KEEP_SIZE) — den vokser stadig
+    kun med de bytes der faktisk skrives. os.posix_fallocate bruges bevidst
+    ikke: den gør filen fuld størrelse med det samme, og så kan størrelsen
+    ikke længere bruges til at genoptage et afbrudt download.
+
+    Returns:
+        True hvis pladsen blev reserveret, False hvis det ikke er muligt her
+        (fx Windows/macOS eller et filsystem uden understøttelse)
+    """
+    if length < PREALLOCATE_MIN or _fallocate is None:
+        return False
+    f.flush()
+    return _fallocate(f.fileno(), FALLOC_FL_KEEP_SIZE, offset, length) == 0
+
+
+class BackgroundWriter:
+    """
+    Skriver chunks til en fil fra en egen tråd gennem en afgrænset kø.
+
+    En fejl i tråden (fx fuld disk) kastes igen ved næste write() eller
+    ved close(). close() venter til alle chunks i køen er skrevet, så
+    filen altid indeholder et sammenhængende stykke fra starten.
+    """
+
+    def __init__(self, f, max_pending=WRITER_QUEUE):
+        self.f = f
+        self.seconds = 0.0
+        self.written = 0
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is not None:
+                continue              # Tøm køen, så write() ikke blokerer
+            try:
+                start = time.perf_counter()
+                self.f.write(chunk)
+                self.seconds += time.perf_counter() - start
+                self.written += len(chunk)
+            except Exception as e:
+                self._error = e
+
+    def write(self, chunk):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(chunk)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def write_stream(f, chunks, expected=0):
+    """
+    Skriv chunks til f fra den nuværende position.
+
+    Med expected (forventet antal bytes) over WRITER_MIN skrives der fra en
+    BackgroundWriter; ellers direkte.
+
+    Returns:
+        (bytes skrevet, sekunder brugt på at skrive)
+    """
+    if expected < WRITER_MIN:
+        seconds = 0.0
+        written = 0
+        for chunk in chunks:
+            if chunk:
+                start = time.perf_counter()
+                f.write(chunk)
+                seconds += time.perf_counter() - start
+                written += len(chunk)
+        return written, seconds
+
+    writer = BackgroundWriter(f)
+    try:
+        for chunk in chunks:
+            if chunk:
+                writer.write(chunk)
+    finally:
+        writer.close()
+    return writer.written, writer.seconds
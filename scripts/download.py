@@ -0,0 +1,965 @@
+#!/usr/bin/env python3
+"""
+Trin 1: Download af ALLE Snapchat memories fra HTML eksport.
+
+Sikrer at ingen filer mangler ved at downloade direkte fra Snapchat's servere.
+Gemmer progress løbende så download kan genoptages.
+
+Brug:
+    python scripts/1_download.py
+    python scripts/1_download.py --workers 8 --pool-size 16
+    python scripts/1_download.py --extract-zips --keep-overlay
+    python scripts/1_download.py --deep-verify
+    python scripts/1_download.py --dedupe
+    python scripts/1_download.py --incremental   # ny eksport: kun nye memories
+    python scripts/1_download.py --retry-failed  # kun de fejlede fra sidste kørsel
+    python scripts/1_download.py --shard 2/4     # én af 4 maskiner (se shards.py)
+    python scripts/1_download.py --merge-shards  # saml shards før 3_sort.py
+    python scripts/1_download.py --metrics --profile fetch,verify
+
+Input:  input/memories_history.html
+Output: data/raw/*.{jpg,mp4,zip}  (med --extract-zips: ingen .zip)
+        data/raw/partial/*.part  (afbrudte downloads der genoptages næste gang)
+"""
+
+import re
+import json
+import time
+import argparse
+import itertools
+import threading
+import requests
+from collections import Counter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from content_index import ContentIndex, replace_with_hardlink
+from disk_writer import chunk_size_for, preallocate, write_stream
+from manifest_cache import ensure_manifest, iter_manifest, load_index
+from media_verify import MediaVerifier
+from memories_html import uuid_from_url
+from zip_extract import OVERLAY_FOLDER_NAME, extract_zip_inplace
+from progress_journal import (
+    JOURNAL_NAME, LEGACY_NAME, ProgressJournal, compact, iter_downloaded, merge_journals, read_failed,
+)
+from retry_queue import CORRUPT, EXPIRED, TRANSIENT, Failure, RetryQueue, classify
+from shards import find_shard_files, in_shard, missing_shards, parse_shard, shard_path
+from sort_ledger import LEDGER_NAME, already_sorted
+from uuid_index import UuidSet
+
+# ─── Konfiguration ───────────────────────────────────────────────────────────
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HTML_FILE = PROJECT_ROOT / "input" / "memories_history.html"
+OUTPUT_DIR = PROJECT_ROOT / "data" / "raw"
+PARTIAL_DIR = OUTPUT_DIR / "partial"
+MANIFEST_CACHE = PROJECT_ROOT / "data" / "cache" / "memories_manifest.tsv"
+DOWNLOADED_INDEX = PROJECT_ROOT / "data" / "cache" / "downloaded.idx"
+SORTED_INDEX = PROJECT_ROOT / "data" / "cache" / "sorted.idx"
+CONTENT_INDEX = PROJECT_ROOT / "data" / "content_index.sqlite"
+SORTED_DIR = PROJECT_ROOT / "data" / "sorted"
+SORT_LEDGER = PROJECT_ROOT / "data" / LEDGER_NAME
+METRICS_DIR = PROJECT_ROOT / "data" / "metrics"
+
+WORKERS = 4              # Antal samtidige downloads
+RATE_START = 1.0         # Start-rate (downloads per sekund)
+RATE_MIN = 0.1           # Laveste rate ved throttling fra serveren
+RATE_MAX = 5.0           # Højeste rate efter mange succeser
+RATE_INCREASE = 0.05     # Rate-forøgelse per success (additiv)
+RATE_DECREASE = 0.5      # Rate-faktor ved HTTP 429/5xx (multiplikativ)
+POOL_SIZE = 8            # Max antal genbrugte forbindelser til CDN'et
+SUBMIT_WINDOW = 1000     # Max antal memories i gang eller ventende på journalen
+MAX_RETRIES = 2          # Hurtige retries ved forbindelsesfejl (på samme worker)
+RETRY_BACKOFF = 0.5      # Backoff faktor mellem dem: 0s, 1s
+RETRY_ATTEMPTS = 4       # Forsøg i alt per fil — fejl venter i retry køen imellem
+RETRY_DELAY = 5.0        # Ventetid før første udskudte retry (fordobles, med jitter)
+RETRY_DELAY_MAX = 120.0  # Loft over ventetiden i retry køen
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+ZIP_MAGIC = b'PK\x03\x04'
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (\d+)-\d+/(\d+)')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'X-Snap-Route-Tag': 'mem-dmd',
+    'Accept': '*/*',
+}
+
+progress_file = OUTPUT_DIR / JOURNAL_NAME
+
+
+# ─── Rate limiting ───────────────────────────────────────────────────────────
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket der styrer hvor ofte et download må starte.
+
+    Raten halveres når serveren svarer 429/5xx og hæves langsomt igen
+    for hver success (AIMD), så vi finder den hastighed Snapchat tillader.
+    """
+
+    def __init__(self, rate=RATE_START, min_rate=RATE_MIN, max_rate=RATE_MAX):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._tokens = 1.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blokér indtil der er et token til et nyt request."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(1.0, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Hæv raten en smule efter et vellykket download."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+    def on_throttle(self):
+        """Sænk raten og tøm bucket'en når serveren beder os sætte farten ned."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * RATE_DECREASE)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class ThrottleAwareRetry(Retry):
+    """
+    urllib3 Retry der giver rate limiteren besked ved hvert 429/5xx svar.
+
+    urllib3 laver en ny Retry instans per forsøg via new(), så callback'en
+    skal sendes videre derfra.
+    """
+
+    def __init__(self, *args, on_throttle=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_throttle = on_throttle
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.on_throttle = self.on_throttle
+        return retry
+
+    def increment(self, method=None, url=None, response=None, *args, **kwargs):
+        if self.on_throttle and response is not None and response.status in RETRY_STATUSES:
+            self.on_throttle()
+        return super().increment(method, url, response, *args, **kwargs)
+
+
+# ─── HTTP session ────────────────────────────────────────────────────────────
+
+def create_session(pool_size=POOL_SIZE, limiter=None, recorder=None):
+    """
+    Opret en delt session med connection pooling, keep-alive og HTTP retries.
+
+    Alle downloads deler de samme TCP+TLS forbindelser til CDN'et i stedet
+    for at lave et nyt handshake per fil. Adapteren prøver kun forbindelsesfejl
+    igen (hurtigt); 429/5xx svar returneres med det samme og giver rate
+    limiteren besked, så filen kan vente i retry køen uden at holde en worker.
+    Med en recorder tælles hvert 429/5xx svar som 'http_retry'.
+    """
+    def on_throttle():
+        if limiter:
+            limiter.on_throttle()
+        if recorder:
+            recorder.count('http_retry')
+
+    retry = ThrottleAwareRetry(
+        total=MAX_RETRIES,
+        status=0,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=['GET'],
+        raise_on_status=False,
+        on_throttle=on_throttle if limiter or recorder else None,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.headers['Connection'] = 'keep-alive'
+    # Medier er allerede komprimerede, og Range offsets skal passe med bytes på disken
+    session.headers['Accept-Encoding'] = 'identity'
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def connection_stats(session):
+    """
+    Tæl forbindelser åbnet vs. genbrugt ud fra urllib3's connection pools.
+
+    Returns:
+        (opened, reused, requests_sent)
+    """
+    opened = 0
+    requests_sent = 0
+    adapters = {id(a): a for a in session.adapters.values()}.values()
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            opened += pool.num_connections
+            requests_sent += pool.num_requests
+    return opened, max(0, requests_sent - opened), requests_sent
+
+
+# ─── Hjælpefunktioner ────────────────────────────────────────────────────────
+
+def load_progress(shard=None):
+    """
+    Tidligere downloadede UUIDs fra journalen, som kompakt mængde (se uuid_index.py).
+
+    Med en shard tæller både hovedjournalen og shardens egen journal med.
+    """
+    journals = [progress_file] if shard is None else [progress_file, shard_path(progress_file, shard)]
+    return UuidSet(
+        shard_path(DOWNLOADED_INDEX, shard),
+        itertools.chain.from_iterable(iter_downloaded(journal) for journal in journals),
+    )
+
+
+def load_failed(already_downloaded, shard=None):
+    """
+    Køen til --retry-failed: fejlede downloads der ikke senere er lykkedes.
+
+    Med en shard tæller både shardens egen journal og de fejl i
+    hovedjournalen (fx migreret fra download_progress.json) der hører til
+    shard'en.
+    """
+    if shard is None:
+        return read_failed(progress_file)
+    queued = {
+        uuid: (url, reason) for uuid, (url, reason) in read_failed(progress_file).items()
+        if in_shard(extract_filename_from_url(url) if uuid == url else uuid, shard)
+    }
+    queued.update(read_failed(shard_path(progress_file, shard)))
+    return {uuid: entry for uuid, entry in queued.items() if uuid not in already_downloaded}
+
+
+def parse_html():
+    """
+    Parse HTML til manifest-cachen (streaming) og vis antallet af URLs.
+
+    Returns:
+        cachens header med 'count' og 'dated' — selve rækkerne læses med
+        iter_manifest(MANIFEST_CACHE)
+    """
+    print(f"📄 Læser HTML fil: {HTML_FILE}")
+
+    header = ensure_manifest(HTML_FILE, MANIFEST_CACHE)
+
+    print(f"✅ Fundet {header['count']} download URLs ({header['dated']} med dato)")
+    return header
+
+
+def iter_pending(manifest_index, already_downloaded, placed, skipped, shard=None):
+    """
+    Memories der mangler, i HTML rækkefølge: (række, url, filnavn).
+
+    Kun første forekomst af hver UUID (ifølge manifest-indekset), så to
+    workers aldrig skriver til samme fil. skipped['sorted'] tælles op for
+    memories der allerede ligger i data/sorted/. Med en shard (i, N) kun de
+    memories der hører til den.
+    """
+    for i, memory in enumerate(iter_manifest(MANIFEST_CACHE), 1):
+        if memory.uuid:
+            first = manifest_index.get(memory.uuid)
+            if first is not None and first[0] != i:
+                continue
+        base_filename = memory.uuid or extract_filename_from_url(memory.url)
+        if not in_shard(base_filename, shard):
+            continue
+        if base_filename in already_downloaded:
+            continue
+        if base_filename.upper() in placed:
+            skipped['sorted'] += 1
+            continue
+        yield i, memory.url, base_filename
+
+
+def iter_queued(queued):
+    """
+    Fejlede memories fra journalen, i HTML rækkefølge: (række, url, filnavn).
+
+    URL'en tages fra den nuværende eksport hvis memory'en findes der (en ny
+    eksport har nye links), ellers fra journalen (række None).
+    """
+    remaining = dict(queued)
+    for i, memory in enumerate(iter_manifest(MANIFEST_CACHE), 1):
+        base_filename = memory.uuid or extract_filename_from_url(memory.url)
+        if remaining.pop(base_filename, None) is not None:
+            yield i, memory.url, base_filename
+
+    for url, _ in remaining.values():
+        if url:
+            yield None, url, extract_filename_from_url(url)
+
+
+def merge_shards(manifest_index):
+    """
+    Saml journaler og content indekser fra --shard kørsler til de almindelige filer.
+
+    Downloads fra shards skrives i HTML rækkefølge (første række i
+    manifestet), så 3_sort.py nummererer præcis som efter én samlet kørsel.
+    """
+    journals = find_shard_files(progress_file)
+    indexes = find_shard_files(CONTENT_INDEX)
+    if not journals and not indexes:
+        print(f"ℹ️  Ingen shard filer i {OUTPUT_DIR} eller {CONTENT_INDEX.parent}")
+        return
+
+    missing = missing_shards(journals)
+    if missing:
+        print(f"⚠️  Ingen journal fra shard {', '.join(missing)} — de kan samles senere")
+
+    def position(uuid):
+        first = manifest_index.get(uuid)
+        return first[0] if first is not None else float('inf')
+
+    added, failed = merge_journals(progress_file, list(journals.values()), position)
+    print(f"🧩 {len(journals)} journaler samlet: {added} nye downloads, {failed} fejlede i køen")
+
+    index = ContentIndex(CONTENT_INDEX)
+    try:
+        for path in indexes.values():
+            rows = index.merge(path)
+            print(f"   🧬 {path.name}: {rows} filer i content indekset")
+    finally:
+        index.close()
+    for path in indexes.values():
+        for leftover in (path, path.with_name(path.name + '-wal'), path.with_name(path.name + '-shm')):
+            leftover.unlink(missing_ok=True)
+
+    for path in [*find_shard_files(DOWNLOADED_INDEX).values(), *find_shard_files(SORTED_INDEX).values()]:
+        path.unlink()
+    print(f"💾 Samlet i: {progress_file}")
+
+
+def extract_filename_from_url(url):
+    """Udtræk UUID/ID fra URL til filnavn."""
+    uuid = uuid_from_url(url)
+    if uuid:
+        return uuid
+    return f"memory_{int(time.time() * 1000)}"
+
+
+def verify_file(filename, verifier=None):
+    """Verificer at en downloaded fil er valid (ikke korrupt)."""
+    return (verifier or MediaVerifier()).verify(filename)
+
+
+def extension_from_content_type(content_type):
+    """Bestem korrekt extension fra content-type."""
+    if 'video' in content_type:
+        return '.mp4'
+    elif 'jpeg' in content_type or 'jpg' in content_type:
+        return '.jpg'
+    elif 'png' in content_type:
+        return '.png'
+    elif 'image' in content_type:
+        return '.jpg'
+    return '.mp4'
+
+
+# ─── Delvise downloads ───────────────────────────────────────────────────────
+
+def partial_paths(base_filename):
+    """(.part fil, metadata fil) for et delvist download."""
+    part_path = PARTIAL_DIR / f"{base_filename}.part"
+    return part_path, part_path.with_suffix('.json')
+
+
+def load_partial(base_filename):
+    """
+    Find et tidligere afbrudt download der kan genoptages.
+
+    Returns:
+        (bytes_på_disk, metadata) — (0, None) hvis der ikke er noget at genoptage
+    """
+    part_path, meta_path = partial_paths(base_filename)
+    if not part_path.exists() or not meta_path.exists():
+        return 0, None
+
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return 0, None
+
+    size = part_path.stat().st_size
+    if not meta.get('content_length') or size == 0 or size > meta['content_length']:
+        return 0, None
+    return size, meta
+
+
+def save_partial_meta(base_filename, meta):
+    _, meta_path = partial_paths(base_filename)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def discard_partial(base_filename):
+    for path in partial_paths(base_filename):
+        if path.exists():
+            path.unlink()
+
+
+def resume_accepted(response, offset, content_length):
+    """True hvis serveren svarede 206 med præcis den byte-range vi bad om."""
+    if response.status_code != 206:
+        return False
+    match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+    return bool(match) and int(match.group(1)) == offset and int(match.group(2)) == content_length
+
+
+# ─── Download ────────────────────────────────────────────────────────────────
+
+class DownloadContext:
+    """
+    Delt session, indstillinger og tællere for alle downloads i en kørsel.
+
+    Tællerne opdateres fra flere worker threads og er derfor beskyttet af en lås.
+    """
+
+    def __init__(self, session, limiter=None, verifier=None,
+                 extract_zips=False, keep_overlay=False, index=None, dedupe=False,
+                 recorder=None):
+        self.session = session
+        self.metrics = recorder or metrics.Recorder()
+        self.limiter = limiter
+        self.verifier = verifier or MediaVerifier()
+        self.extract_zips = extract_zips
+        self.keep_overlay = keep_overlay
+        self.index = index
+        self.dedupe = dedupe
+        self.resumed_files = 0
+        self.resumed_bytes = 0
+        self.avoided_downloads = 0
+        self.linked_files = 0
+        self.reclaimed_bytes = 0
+        self._lock = threading.Lock()
+
+    def add_resumed(self, num_bytes):
+        with self._lock:
+            self.resumed_files += 1
+            self.resumed_bytes += num_bytes
+
+    def add_avoided(self):
+        with self._lock:
+            self.avoided_downloads += 1
+
+    def add_linked(self, num_bytes):
+        with self._lock:
+            self.linked_files += 1
+            self.reclaimed_bytes += num_bytes
+
+
+def fetch_to_partial(context, url, base_filename):
+    """
+    Hent filen (eller resten af den) til data/raw/partial/<uuid>.part.
+
+    Returns:
+        (meta, resumed_bytes): metadata for filen ({'content_length': ...,
+        'ext': ...}) og antal bytes der ikke skulle hentes igen
+
+    Raises:
+        IOError hvis forbindelsen blev afbrudt før alle bytes var modtaget
+    """
+    part_path, _ = partial_paths(base_filename)
+    offset, meta = load_partial(base_filename)
+
+    if offset and offset == meta['content_length']:
+        # Alle bytes var allerede hentet — kun omdøbningen manglede
+        context.add_resumed(offset)
+        return meta, offset
+
+    request_headers = {'Range': f"bytes={offset}-"} if offset else None
+
+    request_start = time.perf_counter()
+    with context.session.get(url, timeout=60, stream=True, headers=request_headers) as response:
+        # Tid til response headers (efter evt. retries i adapteren)
+        context.metrics.record(
+            'first_byte', time.perf_counter() - request_start, base_filename,
+            status=response.status_code,
+        )
+        context.metrics.count(f"http_{response.status_code}")
+        response.raise_for_status()
+        body_length = int(response.headers.get('Content-Length') or 0)
+        chunks = response.iter_content(chunk_size=chunk_size_for(body_length))
+
+        if offset and resume_accepted(response, offset, meta['content_length']):
+            mode = 'r+b'
+            context.add_resumed(offset)
+        else:
+            # Intet at genoptage, eller serveren ignorerede Range → start forfra
+            mode = 'wb'
+            offset = 0
+            content_length = body_length
+            first_chunk = next(chunks, b'')
+
+            # Tjek om det faktisk er en ZIP fil (overlay)
+            is_zip = first_chunk[:4] == ZIP_MAGIC
+            ext = '.zip' if is_zip else extension_from_content_type(
+                response.headers.get('Content-Type', '')
+            )
+            meta = {'content_length': content_length, 'ext': ext}
+            save_partial_meta(base_filename, meta)
+            chunks = itertools.chain([first_chunk], chunks)
+
+        remaining = meta['content_length'] - offset if meta['content_length'] else 0
+        with open(part_path, mode) as f:
+            f.seek(offset)
+            # Reserverer pladsen uden at ændre størrelsen, så et kill midt i
+            # skrivningen stadig efterlader en .part fil der kan genoptages
+            preallocate(f, offset, remaining)
+            written, write_seconds = write_stream(f, chunks, remaining)
+        context.metrics.record('write', write_seconds, base_filename, written)
+
+    received = part_path.stat().st_size
+    if meta['content_length'] and received != meta['content_length']:
+        raise IOError(f"Forbindelsen blev afbrudt ({received} af {meta['content_length']} bytes)")
+    return meta, offset
+
+
+def download_file(context, url, base_filename, label='', attempt=1):
+    """
+    Ét forsøg på at downloade en enkelt fil med verification.
+
+    Forbindelsesfejl forsøges hurtigt igen af session'ens retry adapter;
+    alt andet returneres som en Failure, så kalderen kan lægge filen i
+    retry køen (retry_queue.py) i stedet for at vente her. Data skrives til
+    data/raw/partial/<uuid>.part sammen med den forventede Content-Length.
+    Bliver forbindelsen afbrudt, genoptages filen med et HTTP Range request
+    ved næste forsøg (også i en senere kørsel) — kun hvis serveren ikke
+    understøtter det, startes forfra. Korrupte filer slettes og hentes
+    forfra næste gang.
+
+    ZIP filer (overlays) genkendes på første chunk. Med extract_zips
+    udpakkes mediefilen til data/raw/<uuid>.<ext> så snart hele ZIP'en er
+    hentet (ikke undervejs fra streamen), så 2_unzip.py ikke skal læse
+    ZIP'en igen.
+
+    Med dedupe hentes en UUID der allerede findes i content indekset (fx
+    sorteret fra en tidligere eksport) ikke igen, og en fil der er
+    byte-identisk med en allerede hentet fil erstattes af et hardlink til
+    den. Uden dedupe hentes og gemmes alt som før.
+
+    Skriver én linje per forsøg, så output ikke blandes sammen når flere
+    downloads kører samtidig.
+
+    Returns:
+        (file_size_mb, filename) hvis success, (False, Failure) hvis fejl
+    """
+    prefix = f"{label}📥 {base_filename}"
+    if attempt > 1:
+        prefix += f" (forsøg {attempt})"
+    part_path, _ = partial_paths(base_filename)
+    PARTIAL_DIR.mkdir(parents=True, exist_ok=True)
+
+    known_path = None
+    if context.index and context.dedupe:
+        known_path = context.index.known_path(base_filename)
+    if known_path:
+        context.add_avoided()
+        print(f"{prefix} 🧬 Findes allerede: {known_path.name}")
+        return (known_path.stat().st_size / 1024 / 1024, known_path)
+
+    if attempt > 1:
+        context.metrics.count('payload_retry')
+    if context.limiter:
+        context.limiter.acquire()
+
+    try:
+        with context.metrics.time('fetch', base_filename, attempt=attempt) as measurement:
+            try:
+                meta, resumed_bytes = fetch_to_partial(context, url, base_filename)
+            except Exception as e:
+                measurement['error'] = type(e).__name__
+                raise
+            measurement['bytes'] = part_path.stat().st_size - resumed_bytes
+
+    except Exception as e:
+        # Et evt. delvist download bevares, så næste forsøg kan genoptage det
+        failure = classify(e)
+        print(f"{prefix} ❌ FEJL ({failure.reason}): {e}")
+        return (False, failure)
+
+    try:
+        return store_download(context, base_filename, meta, resumed_bytes, prefix)
+    except Exception as e:
+        # Fx fuld disk eller et låst content indeks — filen tæller som fejlet
+        # (og kommer i retry køen) i stedet for at vælte hele kørslen
+        failure = classify(e)
+        print(f"{prefix} ❌ FEJL ved lagring ({failure.reason}): {e}")
+        return (False, failure)
+
+
+def store_download(context, base_filename, meta, resumed_bytes, prefix):
+    """
+    Flyt en færdig .part fil på plads, udpak evt. ZIP, verificér og indeksér.
+
+    Returns:
+        (file_size_mb, filename) hvis success, (False, Failure) hvis filen er korrupt
+    """
+    part_path, _ = partial_paths(base_filename)
+    notes = f"♻️  Genoptaget ved {resumed_bytes / 1024 / 1024:.2f} MB " if resumed_bytes else ""
+    ext = meta['ext']
+    is_zip = ext == '.zip'
+    filename = OUTPUT_DIR / f"{base_filename}{ext}"
+    part_path.replace(filename)
+    discard_partial(base_filename)
+
+    file_size_mb = filename.stat().st_size / 1024 / 1024
+    notes += f"({ext}) ✅ ({file_size_mb:.2f} MB)"
+
+    if is_zip:
+        notes += " 📦 ZIP detected!"
+
+    # Udpak mediefilen mens ZIP'en stadig ligger i page cache. Fejler
+    # udpakningen beholdes ZIP'en, så 2_unzip.py kan rapportere den.
+    # Udpakning direkte fra streamen er fravalgt: hvilket medlem der er
+    # størst (mediefilen) står først i central directory i slutningen af
+    # arkivet, og medlemmer skrevet med data descriptor kender ikke deres
+    # længde før efter dataene. Ekstra læsning er én gang fra page cache.
+    if is_zip and context.extract_zips:
+        with context.metrics.time('extract', base_filename) as measurement:
+            success, _, size, info = extract_zip_inplace(filename, context.keep_overlay)
+            measurement['bytes'] = size
+        if success:
+            filename.unlink()
+            filename = OUTPUT_DIR / f"{base_filename}{info}"
+            notes += f" 📂 → {info}"
+        else:
+            notes += f" 📂 ❌ {info}"
+
+    # Verificer filen
+    with context.metrics.time('verify', base_filename) as measurement:
+        valid = verify_file(filename, context.verifier)
+        measurement['valid'] = valid
+
+    if not valid:
+        print(f"{prefix} {notes} 🔍 ❌ KORRUPT!")
+        filename.unlink()
+        return (False, Failure(CORRUPT, "verificering fejlede", None))
+
+    if context.index:
+        with context.metrics.time('index', base_filename):
+            duplicate = context.index.add(base_filename, filename)
+        if duplicate and context.dedupe and replace_with_hardlink(filename, duplicate):
+            context.add_linked(filename.stat().st_size)
+            notes += f" 🧬 = {duplicate.name}"
+    print(f"{prefix} {notes} 🔍 ✅ Valid")
+    if context.limiter:
+        context.limiter.on_success()
+    return (file_size_mb, filename)
+
+
+# ─── Hovedfunktion ────────────────────────────────────────────────────────────
+
+def parse_args():
+    """Læs kommandolinje-argumenter."""
+    parser = argparse.ArgumentParser(description="Download Snapchat memories.")
+    parser.add_argument(
+        '--workers', type=int, default=WORKERS,
+        help=f"antal samtidige downloads (default: {WORKERS})",
+    )
+    parser.add_argument(
+        '--pool-size', type=int, default=POOL_SIZE,
+        help=f"antal genbrugte HTTP forbindelser (default: {POOL_SIZE})",
+    )
+    parser.add_argument(
+        '--rate', type=float, default=RATE_START,
+        help=f"start-rate i downloads per sekund (default: {RATE_START})",
+    )
+    parser.add_argument(
+        '--max-rate', type=float, default=RATE_MAX,
+        help=f"højeste rate limiteren må gå op til (default: {RATE_MAX})",
+    )
+    parser.add_argument(
+        '--extract-zips', action='store_true',
+        help="udpak overlay ZIPs med det samme (gør 2_unzip.py overflødig for dem)",
+    )
+    parser.add_argument(
+        '--keep-overlay', action='store_true',
+        help=f"gem tekst-overlays i data/raw/{OVERLAY_FOLDER_NAME}/ ved --extract-zips",
+    )
+    parser.add_argument(
+        '--deep-verify', action='store_true',
+        help="kør også MediaInfo på videoer (langsomt) efter det hurtige header-tjek",
+    )
+    parser.add_argument(
+        '--dedupe', action='store_true',
+        help="spring UUIDs over der allerede er i content indekset, og erstat "
+             "byte-identiske filer (samme medie under flere UUIDs) med hardlinks",
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help=f"spring memories over der allerede ligger i data/sorted/ (ifølge {LEDGER_NAME})",
+    )
+    parser.add_argument(
+        '--shard', type=parse_shard, metavar='I/N',
+        help="hent kun shard I af N (fordelt efter UUID hash) — til flere maskiner på et delt drev",
+    )
+    parser.add_argument(
+        '--merge-shards', action='store_true',
+        help="saml journaler og indekser fra --shard kørsler (kør når alle shards er færdige)",
+    )
+    parser.add_argument(
+        '--retry-failed', action='store_true',
+        help=f"prøv kun de downloads igen der fejlede i en tidligere kørsel (ifølge {JOURNAL_NAME})",
+    )
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Hoved download proces."""
+    args = parse_args()
+    workers = max(1, args.workers)
+    pool_size = max(workers, args.pool_size)
+    max_rate = max(RATE_MIN, args.max_rate)
+    start_rate = min(max(RATE_MIN, args.rate), max_rate)
+
+    print("=" * 80)
+    print("🎬 SNAPCHAT MEMORIES DOWNLOADER")
+    print("=" * 80)
+    print()
+
+    if not HTML_FILE.exists():
+        print(f"❌ HTML fil ikke fundet: {HTML_FILE}")
+        print(f"   Placér din memories_history.html i input/-mappen.")
+        return
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Parse HTML
+    header = parse_html()
+    total = header['count']
+    manifest_index = load_index(HTML_FILE, MANIFEST_CACHE, header)
+
+    if args.merge_shards:
+        print()
+        try:
+            merge_shards(manifest_index)
+        finally:
+            manifest_index.close()
+        return
+
+    # En gammel download_progress.json migreres til hovedjournalen, som alle
+    # shards læser — ellers ville den første shard tage den med i sin egen
+    if not progress_file.exists() and progress_file.with_name(LEGACY_NAME).exists():
+        compact(progress_file)
+        print(f"📦 {LEGACY_NAME} migreret til {progress_file.name} "
+              f"({len(read_failed(progress_file))} fejlede i --retry-failed køen)")
+
+    # Med --shard skriver denne proces til sine egne filer (se shards.py)
+    shard = args.shard
+    journal_path = shard_path(progress_file, shard)
+
+    print()
+    print(f"📊 TOTAL: {total} filer at downloade")
+    if shard:
+        print(f"🧩 Shard {shard[0]}/{shard[1]}: ca. {-(-total // shard[1])} af dem hentes her "
+              f"({journal_path.name})")
+    print(f"⏱️  Estimeret tid: ~{total / start_rate / 60:.1f} minutter (ved start-rate)")
+    print(f"⚙️  Workers: {workers} samtidige downloads ({pool_size} forbindelser)")
+    print(f"🚦 Rate: {start_rate}/s (justeres mellem {RATE_MIN}/s og {max_rate}/s)")
+    print(f"💾 Output mappe: {OUTPUT_DIR}")
+    print()
+
+    # Indlæs tidligere progress
+    already_downloaded = load_progress(shard)
+
+    if already_downloaded:
+        print(f"♻️  Genoptager: {len(already_downloaded)} allerede downloaded")
+        print()
+
+    # Inkrementel: diff den nye eksport mod det der allerede er sorteret
+    placed = UuidSet(
+        shard_path(SORTED_INDEX, shard),
+        already_sorted(SORT_LEDGER, SORTED_DIR) if args.incremental else (),
+    )
+    if args.incremental:
+        print(f"🔁 Inkrementel: {len(placed)} memories ligger allerede i {SORTED_DIR}")
+        print()
+
+    # De manglende memories streames fra manifestet og sendes til workers i et
+    # begrænset vindue, så hukommelsen ikke vokser med eksportens størrelse
+    skipped = {'sorted': 0}
+    if args.retry_failed:
+        queued = load_failed(already_downloaded, shard)
+        reasons = Counter(reason or 'ukendt' for _, reason in queued.values())
+        print(f"🔁 Retry: {len(queued)} fejlede downloads i køen "
+              f"({', '.join(f'{reason}: {count}' for reason, count in reasons.most_common()) or 'ingen'})")
+        print()
+        pending = iter_queued(queued)
+    else:
+        pending = iter_pending(manifest_index, already_downloaded, placed, skipped, shard)
+
+    # Start download
+    start_time = time.time()
+    success_count = 0
+    skip_count = 0 if args.retry_failed else len(already_downloaded)
+    failures = Counter()
+
+    # Resultater skrives til journalen i HTML rækkefølge, selvom downloads
+    # bliver færdige i vilkårlig rækkefølge — 3_sort.py bruger rækkefølgen
+    # til nummerering. Kun vinduet (in_window) ligger i hukommelsen.
+    in_window = {}
+    finished = {}
+    futures = {}
+    next_position = 0
+    limiter = AdaptiveRateLimiter(rate=start_rate, max_rate=max_rate)
+    recorder = metrics.from_args(args, METRICS_DIR, '1_download')
+    session = create_session(pool_size, limiter, recorder)
+    verifier = MediaVerifier(deep=args.deep_verify)
+    index = ContentIndex(shard_path(CONTENT_INDEX, shard))
+    context = DownloadContext(
+        session, limiter, verifier,
+        extract_zips=args.extract_zips, keep_overlay=args.keep_overlay,
+        index=index, dedupe=args.dedupe, recorder=recorder,
+    )
+    journal = ProgressJournal(journal_path)
+    journal.open()
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    # Fejlede downloads venter her i stedet for i en worker, og sendes af
+    # sted igen når deres backoff er gået — imens fortsætter nye downloads
+    retries = RetryQueue(RETRY_ATTEMPTS, RETRY_DELAY, RETRY_DELAY_MAX)
+
+    def submit(position):
+        i, url, base_filename = in_window[position]
+        label = f"[{i or '–'}/{total}] "
+        future = pool.submit(download_file, context, url, base_filename, label, retries.attempt(position))
+        futures[future] = position
+
+    def collect():
+        """
+        Vent på downloads (eller næste retry), og skriv de færdige til
+        journalen i rækkefølge.
+        """
+        nonlocal next_position, success_count
+        timeout = retries.next_delay()
+        if futures:
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(timeout or 0)
+            done = ()
+
+        for future in done:
+            position = futures.pop(future)
+            try:
+                file_size_mb, result = future.result()
+            except Exception as e:
+                # En uventet fejl i en worker gør kun denne memory fejlet
+                _, _, base_filename = in_window[position]
+                print(f"   ❌ {base_filename}: {type(e).__name__}: {e}")
+                file_size_mb, result = False, classify(e)
+            if file_size_mb:
+                retries.done(position)
+                finished[position] = None
+                continue
+            delay = retries.defer(position, result)
+            if delay is None:
+                finished[position] = result
+            else:
+                _, _, base_filename = in_window[position]
+                print(f"   ⏳ {base_filename}: prøver igen om {delay:.0f}s "
+                      f"(forsøg {retries.attempt(position)}/{RETRY_ATTEMPTS}, {result.reason})")
+
+        for position in retries.ready():
+            submit(position)
+
+        while next_position in finished:
+            _, url, base_filename = in_window.pop(next_position)
+            failure = finished.pop(next_position)
+            if failure is None:
+                success_count += 1
+                journal.record_downloaded(base_filename)
+            else:
+                failures[failure.reason] += 1
+                journal.record_failed(base_filename, url, failure.reason)
+            next_position += 1
+
+    try:
+        for position, entry in enumerate(pending):
+            while position - next_position >= SUBMIT_WINDOW:
+                collect()
+            in_window[position] = entry
+            submit(position)
+            if retries.next_delay() == 0:
+                collect()
+
+        while futures or retries:
+            collect()
+
+    except KeyboardInterrupt:
+        print("\n⏹️  Afbrudt — venter på igangværende downloads og gemmer progress...")
+        pool.shutdown(wait=True, cancel_futures=True)
+        return
+    finally:
+        pool.shutdown(wait=True)
+        journal.close()
+        index.close()
+        recorder.close()
+        manifest_index.close()
+        already_downloaded.close()
+        placed.close()
+
+    # Én linje per UUID, så journalen ikke vokser på tværs af genoptagelser
+    compact(journal_path)
+
+    # Afslutning
+    elapsed = time.time() - start_time
+    opened, reused, requests_sent = connection_stats(session)
+    session.close()
+    print()
+    print("=" * 80)
+    print("✅ DOWNLOAD FÆRDIG!")
+    print("=" * 80)
+    print(f"✅ Success: {success_count}")
+    print(f"⏭️  Skipped: {skip_count}")
+    if args.incremental:
+        print(f"🔁 Allerede sorteret: {skipped['sorted']}")
+    print(f"❌ Failed: {sum(failures.values())}"
+          + (f" ({', '.join(f'{reason}: {count}' for reason, count in failures.most_common())})"
+             if failures else ""))
+    print(f"🔁 Udskudte retries: {retries.deferred}")
+    print(f"🚦 Slut-rate: {limiter.rate:.2f}/s")
+    print(f"🔌 Forbindelser: {opened} åbnet, {reused} genbrugt ({requests_sent} requests)")
+    print(f"♻️  Genoptaget: {context.resumed_files} filer "
+          f"({context.resumed_bytes / 1024 / 1024:.1f} MB sparet via Range requests)")
+    print(f"🧬 Dedupe: {context.avoided_downloads} downloads undgået, "
+          f"{context.linked_files} hardlinket ({context.reclaimed_bytes / 1024 / 1024:.1f} MB frigjort)")
+    for line in verifier.summary():
+        print(f"🔍 Verificering {line}")
+    print(f"⏱️  Tid: {elapsed / 60:.1f} minutter")
+    peak = metrics.peak_rss_mb()
+    if peak:
+        print(f"🧠 Peak hukommelse: {peak:.0f} MB")
+    print(f"💾 Filer i: {OUTPUT_DIR}")
+    if failures[EXPIRED]:
+        print(f"🔗 {failures[EXPIRED]} links er udløbet — hent en ny eksport fra Snapchat, "
+              f"læg den i input/ og kør med --retry-failed")
+    if failures[TRANSIENT] or failures[CORRUPT]:
+        retry_command = "python scripts/1_download.py --retry-failed"
+        if shard:
+            retry_command += f" --shard {shard[0]}/{shard[1]}"
+        print(f"🔁 Prøv de fejlede igen senere med: {retry_command}")
+    if shard:
+        print("🧩 Når alle shards er færdige: python scripts/1_download.py --merge-shards")
+    metrics.report(recorder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Cache af det parsede manifest fra memories_history.html.
+
+HTML eksporten ændrer sig ikke mellem genoptagelser, så første gang den
+parses gemmes resultatet som en kompakt TSV fil (én linje per række, i
+filens rækkefølge inkl. duplikater). Cachen er nøglet på HTML filens
+størrelse, mtime og SHA-256:
+
+- størrelse + mtime uændret → cachen bruges direkte
+- mtime ændret men samme indhold (fx kopieret) → cachen bruges og nøglen opdateres
+- indhold ændret → HTML'en parses igen og cachen skrives om
+
+Cachen kan læses som én liste (load_manifest) eller streames række for
+række (ensure_manifest + iter_manifest), og load_index giver et kompakt
+UUID-indeks over den (se uuid_index.py) til eksporter der er for store
+til at holde i hukommelsen.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from memories_html import Memory, iter_memories
+from uuid_index import UuidIndex, pack_uuid, to_epoch, write_index
+
+CACHE_VERSION = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+HEADER_WIDTH = 512       # Headeren polstres, så count kan skrives til sidst
+
+
+def load_manifest(html_path, cache_path):
+    """
+    Returnér alle memories fra eksporten — fra cachen hvis den er gyldig.
+
+    Returns:
+        list[Memory] i HTML rækkefølge (duplikater bevaret)
+    """
+    ensure_manifest(html_path, cache_path)
+    return list(iter_manifest(cache_path))
+
+
+def ensure_manifest(html_path, cache_path):
+    """
+    Sørg for at cachen er gyldig for HTML filen (parser den ellers igen).
+
+    HTML'en streames direkte ned i cachen, så intet holdes i hukommelsen.
+
+    Returns:
+        cachens header: {'count': rækker, 'dated': rækker med dato, 'sha256': ...}
+    """
+    stat = os.stat(html_path)
+    header = _read_header(cache_path)
+
+    if header and header['size'] == stat.st_size and header['mtime_ns'] == stat.st_mtime_ns:
+        print(f"⚡ Bruger cachet manifest ({header['count']} rækker)")
+        return header
+
+    digest = file_digest(html_path)
+
+    if header and header['sha256'] == digest:
+        print(f"⚡ Bruger cachet manifest ({header['count']} rækker, samme indhold)")
+        return _write_cache(cache_path, stat, digest, iter_manifest(cache_path))
+
+    if header:
+        print("🔄 HTML filen er ændret — parser igen")
+
+    return _write_cache(cache_path, stat, digest, iter_memories(html_path))
+
+
+def iter_manifest(cache_path):
+    """Generator over memories i cachen, i HTML rækkefølge (kald ensure_manifest først)."""
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        f.readline()
+        for line in f:
+            uuid, timestamp, media_type, url = line.rstrip('\n').split('\t')
+            yield Memory(
+                uuid or None,
+                url,
+                datetime.fromisoformat(timestamp) if timestamp else None,
+                media_type or None,
+            )
+
+
+def load_index(html_path, cache_path, header=None):
+    """
+    Kompakt UUID-indeks over manifestet: UUID → (første række, epoch-sekunder).
+
+    Rækker tælles fra 1 som i enumerate(iter_manifest(...), 1). Indekset
+    ligger ved siden af cachen og bygges kun igen når HTML'en ændrer sig.
+    header fra et netop udført ensure_manifest kan gives med, så cachen
+    ikke tjekkes to gange.
+    """
+    if header is None:
+        header = ensure_manifest(html_path, cache_path)
+    index_path = cache_path.with_suffix('.idx')
+    tag = bytes.fromhex(header['sha256'])
+
+    index = UuidIndex.open_if_valid(index_path, tag)
+    if index is None:
+        def records():
+            for position, memory in enumerate(iter_manifest(cache_path), 1):
+                key = pack_uuid(memory.uuid) if memory.uuid else None
+                if key is not None:
+                    yield key, position, to_epoch(memory.timestamp)
+
+        write_index(index_path, records(), tag)
+        index = UuidIndex(index_path)
+    return index
+
+
+def peek_header(html_path, cache_path):
+    """
+    Cachens header uden at tjekke rækkerne — til `snap.py status`.
+
+    Returns:
+        headeren hvis cachen findes og passer til HTML filens størrelse og
+        mtime, ellers None
+    """
+    try:
+        stat = os.stat(html_path)
+        with open(cache_path, 'rb') as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    if (header.get('version') != CACHE_VERSION or header.get('size') != stat.st_size
+            or header.get('mtime_ns') != stat.st_mtime_ns):
+        return None
+    return header
+
+
+def file_digest(path):
+    """SHA-256 af en fil, læst i bidder."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_header(cache_path):
+    """
+    Læs og tjek cachens header. Returnerer None hvis den mangler eller er ugyldig.
+
+    Antallet af linjer tælles i bytes (uden at parse rækkerne), så en
+    afkortet cache opdages.
+    """
+    if not cache_path.exists():
+        return None
+
+    try:
+        with open(cache_path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != CACHE_VERSION:
+                return None
+            lines = 0
+            while True:
+                chunk = f.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                lines += chunk.count(b'\n')
+    except (OSError, ValueError):
+        return None
+
+    return header if lines == header.get('count') else None
+
+
+def _write_cache(cache_path, stat, digest, memories):
+    """
+    Skriv cachen atomisk (temp fil + rename) fra en iterator af memories.
+
+    Returns:
+        den skrevne header
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    header = {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest,
+        'count': 0,
+        'dated': 0,
+    }
+
+    # Unikt temp navn: flere shards (--shard) kan bygge cachen samtidig på et delt drev
+    fd, tmp_name = tempfile.mkstemp(prefix=cache_path.name + '.', suffix='.tmp', dir=cache_path.parent)
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header).ljust(HEADER_WIDTH) + '\n')
+            for memory in memories:
+                timestamp = memory.timestamp.isoformat(sep=' ') if memory.timestamp else ''
+                media_type = ' '.join((memory.media_type or '').split())
+                f.write(f"{memory.uuid or ''}\t{timestamp}\t{media_type}\t{memory.url}\n")
+                header['count'] += 1
+                header['dated'] += memory.timestamp is not None
+
+            # Nu kendes antallet — skriv headeren igen oven i polstringen
+            f.seek(0)
+            f.write(json.dumps(header).ljust(HEADER_WIDTH))
+
+        os.replace(tmp_name, cache_path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+    return header
@@ -0,0 +1,290 @@
+"""
+Skriv optagelsestidspunktet ind i selve filerne, uden at re-encode noget.
+
+Billedbiblioteker (Fotos, Google Photos, Immich, ...) sorterer efter
+metadata og falder tilbage på mtime. Snapchat's filer har ingen af delene,
+så uden dette vises alt som "i dag".
+
+- JPEG: EXIF DateTimeOriginal/DateTimeDigitized/DateTime. Findes felterne
+  allerede, overskrives de 20 bytes på stedet. Har filen ingen EXIF, indsættes
+  et lille APP1 segment efter SOI (APP0) — det kræver én sekventiel kopi af
+  filen, da resten skal rykke sig.
+- MP4/MOV: creation/modification time i mvhd, tkhd og mdhd, overskrevet på
+  stedet. Kun box-headers læses, så videoens størrelse er ligegyldig.
+- Alle filer: mtime (og atime) sættes til tidspunktet.
+
+Tidspunkterne i Snapchat's HTML er UTC. MP4 tider er altid UTC; i EXIF
+skrives UTC-tiden med OffsetTimeOriginal "+00:00", så programmer der kender
+feltet viser den rigtige lokale tid.
+
+Hardlinkede filer (st_nlink > 1, fx fra --dedupe) får kun mtime — ellers
+ville de andre navne for samme fil også få ændret indhold.
+"""
+
+import os
+import struct
+from datetime import timezone
+
+JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+VIDEO_EXTENSIONS = ('.mp4', '.mov')
+
+JPEG_HEAD_BYTES = 128 * 1024      # EXIF ligger i de første APP segmenter
+COPY_CHUNK_SIZE = 1024 * 1024
+MP4_EPOCH_OFFSET = 2082844800     # Sekunder fra 1904-01-01 til 1970-01-01
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia'}
+MP4_TIME_BOXES = {b'mvhd', b'tkhd', b'mdhd'}
+
+EXIF_HEADER = b'Exif\x00\x00'
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_EXIF_VERSION = 0x9000
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_DATETIME_DIGITIZED = 0x9004
+TAG_OFFSET_TIME = 0x9010
+TAG_OFFSET_TIME_ORIGINAL = 0x9011
+TAG_OFFSET_TIME_DIGITIZED = 0x9012
+DATETIME_TAGS = {TAG_DATETIME, TAG_DATETIME_ORIGINAL, TAG_DATETIME_DIGITIZED}
+OFFSET_TAGS = {TAG_OFFSET_TIME, TAG_OFFSET_TIME_ORIGINAL, TAG_OFFSET_TIME_DIGITIZED}
+UTC_OFFSET = b'+00:00\x00'
+
+TYPE_ASCII = 2
+TYPE_LONG = 4
+TYPE_UNDEFINED = 7
+
+
+def epoch_seconds(dt):
+    """Unix tid for et naivt UTC datetime (som i Snapchat's HTML)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def exif_datetime(dt):
+    """'YYYY:MM:DD HH:MM:SS\\0' — EXIF's eget format (20 bytes)."""
+    return f"{dt:%Y:%m:%d %H:%M:%S}".encode() + b'\x00'
+
+
+# ─── JPEG ────────────────────────────────────────────────────────────────────
+
+def _jpeg_segments(head):
+    """
+    (marker, start, length) for APP/COM segmenterne før billeddata.
+
+    start er offset til segmentets data (efter marker og længde).
+    """
+    offset = 2
+    while offset + 4 <= len(head) and head[offset] == 0xFF:
+        marker = head[offset + 1]
+        if marker == 0xFF:
+            offset += 1          # Fyld-byte
+            continue
+        if marker == 0xDA or not (0xE0 <= marker <= 0xEF or marker == 0xFE):
+            return               # SOS eller tabeller: ingen flere metadata segmenter
+        length = struct.unpack('>H', head[offset + 2:offset + 4])[0]
+        yield marker, offset + 4, length - 2
+        offset += 2 + length
+
+
+def _exif_patches(tiff, tiff_start, dt):
+    """(offset i filen, bytes) for hvert dato- og offset-felt i EXIF'en."""
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        raise ValueError("ugyldig TIFF header")
+
+    value = exif_datetime(dt)
+    patches = []
+    ifd_offsets = [struct.unpack(endian + 'I', tiff[4:8])[0]]
+    seen = set()
+
+    while ifd_offsets:
+        ifd = ifd_offsets.pop()
+        if ifd in seen or ifd + 2 > len(tiff):
+            continue
+        seen.add(ifd)
+        count = struct.unpack(endian + 'H', tiff[ifd:ifd + 2])[0]
+        for index in range(count):
+            entry = ifd + 2 + index * 12
+            if entry + 12 > len(tiff):
+                break
+            tag, kind, length, pointer = struct.unpack(endian + 'HHII', tiff[entry:entry + 12])
+            if tag == TAG_EXIF_IFD:
+                ifd_offsets.append(pointer)
+            elif kind != TYPE_ASCII or pointer + length > len(tiff):
+                continue
+            elif tag in DATETIME_TAGS and length == len(value):
+                patches.append((tiff_start + pointer, value))
+            elif tag in OFFSET_TAGS and length == len(UTC_OFFSET):
+                patches.append((tiff_start + pointer, UTC_OFFSET))
+
+    return patches
+
+
+def exif_segment(dt):
+    """
+    Minimalt APP1 EXIF segment: DateTime i IFD0 og ExifVersion,
+    DateTimeOriginal, DateTimeDigitized og OffsetTimeOriginal i Exif IFD.
+    """
+    value = exif_datetime(dt)
+    ifd0_size = 2 + 2 * 12 + 4
+    exif_ifd = 8 + ifd0_size + len(value)
+    exif_ifd_size = 2 + 4 * 12 + 4
+    data = exif_ifd + exif_ifd_size
+
+    tiff = b'MM\x00\x2a' + struct.pack('>I', 8)
+    tiff += struct.pack('>H', 2)
+    tiff += struct.pack('>HHII', TAG_DATETIME, TYPE_ASCII, len(value), 8 + ifd0_size)
+    tiff += struct.pack('>HHII', TAG_EXIF_IFD, TYPE_LONG, 1, exif_ifd)
+    tiff += struct.pack('>I', 0) + value
+
+    tiff += struct.pack('>H', 4)
+    tiff += struct.pack('>HHI4s', TAG_EXIF_VERSION, TYPE_UNDEFINED, 4, b'0231')
+    tiff += struct.pack('>HHII', TAG_DATETIME_ORIGINAL, TYPE_ASCII, len(value), data)
+    tiff += struct.pack('>HHII', TAG_DATETIME_DIGITIZED, TYPE_ASCII, len(value), data + len(value))
+    tiff += struct.pack('>HHII', TAG_OFFSET_TIME_ORIGINAL, TYPE_ASCII, len(UTC_OFFSET), data + 2 * len(value))
+    tiff += struct.pack('>I', 0)
+    tiff += value + value + UTC_OFFSET + b'\x00'
+
+    payload = EXIF_HEADER + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+
+def embed_jpeg(path, dt):
+    """
+    Returns:
+        'patched' (felter overskrevet på stedet), 'inserted' (nyt EXIF
+        segment) eller None (ikke en JPEG, eller EXIF uden datofelter)
+    """
+    with open(path, 'r+b') as f:
+        head = f.read(JPEG_HEAD_BYTES)
+        if head[:2] != b'\xff\xd8':
+            return None
+
+        insert_at = 2
+        for marker, start, length in _jpeg_segments(head):
+            if marker == 0xE0 and insert_at == 2:
+                insert_at = start + length     # Efter JFIF APP0
+            if marker != 0xE1 or head[start:start + 6] != EXIF_HEADER:
+                continue
+            tiff = head[start + 6:start + length]
+            patches = _exif_patches(tiff, start + 6, dt)
+            if not patches:
+                # At tilføje felter til en eksisterende EXIF kræver at den bygges om
+                return None
+            for offset, value in patches:
+                f.seek(offset)
+                f.write(value)
+            return 'patched'
+
+    _insert_segment(path, insert_at, exif_segment(dt))
+    return 'inserted'
+
+
+def _insert_segment(path, offset, segment):
+    """Skriv filen igen med segment indsat ved offset (atomisk via rename)."""
+    tmp_path = path.with_name(path.name + '.exif')
+    try:
+        with open(path, 'rb') as source, open(tmp_path, 'wb') as target:
+            target.write(source.read(offset))
+            target.write(segment)
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                target.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+# ─── MP4 / QuickTime ─────────────────────────────────────────────────────────
+
+def _boxes(f, start, end):
+    """(type, offset, header_størrelse, størrelse) for boxes mellem start og end."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type, offset, header, size
+        offset += size
+
+
+def _time_boxes(f, start, end):
+    """Offset til version-byten i alle mvhd/tkhd/mdhd under start..end."""
+    for box_type, offset, header, size in _boxes(f, start, end):
+        if box_type in MP4_CONTAINERS:
+            yield from _time_boxes(f, offset + header, offset + size)
+        elif box_type in MP4_TIME_BOXES:
+            yield offset + header
+
+
+def embed_mp4(path, dt):
+    """
+    Returns:
+        'patched' eller None (ingen moov/mvhd fundet)
+    """
+    seconds = int(epoch_seconds(dt)) + MP4_EPOCH_OFFSET
+    with open(path, 'r+b') as f:
+        file_size = f.seek(0, 2)
+        moov = next((box for box in _boxes(f, 0, file_size) if box[0] == b'moov'), None)
+        if moov is None:
+            return None
+
+        _, offset, header, size = moov
+        targets = list(_time_boxes(f, offset + header, offset + size))
+        if not targets:
+            return None
+
+        for version_offset in targets:
+            f.seek(version_offset)
+            version = f.read(1)[0]
+            f.seek(version_offset + 4)
+            if version == 1:
+                f.write(struct.pack('>QQ', seconds, seconds))
+            else:
+                f.write(struct.pack('>II', seconds & 0xFFFFFFFF, seconds & 0xFFFFFFFF))
+    return 'patched'
+
+
+# ─── Fælles ──────────────────────────────────────────────────────────────────
+
+def embed_timestamp(path, dt):
+    """
+    Skriv dt ind i filens metadata (hvis formatet understøttes) og sæt mtime.
+
+    En fil der ikke kan læses eller skrives (fx skrivebeskyttet eller fjernet
+    imens), springes over i stedet for at stoppe hele kørslen.
+
+    Returns:
+        'patched', 'inserted', 'mtime' (kun mtime sat) eller 'skipped'
+    """
+    extension = path.suffix.lower()
+    result = None
+
+    try:
+        if os.stat(path).st_nlink == 1:
+            try:
+                if extension in JPEG_EXTENSIONS:
+                    result = embed_jpeg(path, dt)
+                elif extension in VIDEO_EXTENSIONS:
+                    result = embed_mp4(path, dt)
+            except (ValueError, struct.error, IndexError):
+                # Uventet header — filen er urørt, kun mtime sættes
+                result = None
+
+        timestamp = epoch_seconds(dt)
+        os.utime(path, (timestamp, timestamp))
+    except OSError:
+        return 'skipped'
+    return result or 'mtime'
@@ -0,0 +1,161 @@
+"""
+Verifikation af downloadede filer i to niveauer.
+
+- fast (default): læser kun headers/trailers direkte fra filen.
+  MP4/MOV: top-level boxes skal gå præcist op i filstørrelsen og indeholde
+  ftyp og moov. JPEG: SOI i starten og EOI i slutningen. PNG: signatur og
+  IEND chunk til sidst. ZIP: central directory skal kunne læses og pege
+  inden for filen.
+- deep (opt-in): kører derudover MediaInfo på videoer.
+
+Tiden brugt i hvert niveau tælles op, så den kan vises i opsummeringen.
+"""
+
+import struct
+import threading
+import time
+import zipfile
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+MIN_FILE_SIZE = 1024
+
+JPEG_SOI = b'\xff\xd8\xff'
+JPEG_EOI = b'\xff\xd9'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_IEND = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+
+
+def check_mp4(path):
+    """Gå top-level boxes igennem og tjek at filen ikke er afkortet."""
+    seen = set()
+    with open(path, 'rb') as f:
+        file_size = f.seek(0, 2)
+        offset = 0
+        while offset < file_size:
+            f.seek(offset)
+            header = f.read(8)
+            if len(header) < 8:
+                return False
+
+            size, box_type = struct.unpack('>I4s', header)
+            if size == 1:
+                large = f.read(8)
+                if len(large) < 8:
+                    return False
+                size = struct.unpack('>Q', large)[0]
+            elif size == 0:
+                # Sidste box fortsætter til slutningen af filen
+                size = file_size - offset
+
+            if size < 8 or offset + size > file_size:
+                return False
+
+            seen.add(box_type)
+            offset += size
+
+    return b'ftyp' in seen and b'moov' in seen
+
+
+def check_jpeg(path):
+    """SOI marker i starten og EOI marker i slutningen (efter evt. padding)."""
+    with open(path, 'rb') as f:
+        if f.read(3) != JPEG_SOI:
+            return False
+        f.seek(max(0, f.seek(0, 2) - 64))
+        tail = f.read()
+    return tail.rstrip(b'\x00\r\n ').endswith(JPEG_EOI)
+
+
+def check_png(path):
+    """PNG signatur i starten og IEND chunk som det sidste."""
+    with open(path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return False
+        f.seek(max(0, f.seek(0, 2) - len(PNG_IEND)))
+        return f.read() == PNG_IEND
+
+
+def check_zip(path):
+    """Central directory kan læses og alle members ligger inden for filen."""
+    try:
+        with zipfile.ZipFile(path, 'r') as zip_ref:
+            infos = zip_ref.infolist()
+            file_size = zip_ref.fp.seek(0, 2)
+    except zipfile.BadZipFile:
+        return False
+
+    return bool(infos) and all(
+        info.header_offset + info.compress_size <= file_size for info in infos
+    )
+
+
+def check_deep(path):
+    """MediaInfo skal kunne finde en Video- eller General-track."""
+    from pymediainfo import MediaInfo
+
+    media_info = MediaInfo.parse(str(path))
+    return any(t.track_type in ('Video', 'General') for t in media_info.tracks)
+
+
+FAST_CHECKS = {
+    '.mp4': check_mp4,
+    '.mov': check_mp4,
+    '.jpg': check_jpeg,
+    '.jpeg': check_jpeg,
+    '.png': check_png,
+    '.zip': check_zip,
+}
+
+
+class MediaVerifier:
+    """
+    Verificer filer og tæl tid per niveau (thread-safe).
+
+    Brug:
+        verifier = MediaVerifier(deep=False)
+        verifier.verify(path)
+        verifier.timings  # {'fast': [antal, sekunder], 'deep': [...]}
+    """
+
+    def __init__(self, deep=False):
+        self.deep = deep
+        self.timings = {'fast': [0, 0.0], 'deep': [0, 0.0]}
+        self._lock = threading.Lock()
+
+    def verify(self, path):
+        """True hvis filen ser hel ud. Fejl under læsning tæller som korrupt."""
+        extension = path.suffix.lower()
+
+        try:
+            start = time.perf_counter()
+            if path.stat().st_size <= MIN_FILE_SIZE and extension != '.zip':
+                valid = False
+            else:
+                check = FAST_CHECKS.get(extension)
+                valid = check(path) if check else True
+            self._record('fast', start)
+
+            if valid and self.deep and extension in VIDEO_EXTENSIONS:
+                start = time.perf_counter()
+                valid = check_deep(path)
+                self._record('deep', start)
+
+            return valid
+        except Exception:
+            return False
+
+    def _record(self, tier, start):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.timings[tier][0] += 1
+            self.timings[tier][1] += elapsed
+
+    def summary(self):
+        """Én linje per niveau der er brugt: antal filer, total og gennemsnit."""
+        lines = []
+        for tier, (count, seconds) in self.timings.items():
+            if count:
+                lines.append(
+                    f"{tier}: {count} filer, {seconds:.2f}s ({seconds / count * 1000:.2f} ms/fil)"
+                )
+        return lines
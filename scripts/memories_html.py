@@ -0,0 +1,141 @@
+"""
+Streaming parser til Snapchat's memories_history.html.
+
+Filen læses i bidder og deles op ved hver </tr>, så kun én bid af filen
+ligger i hukommelsen ad gangen, uanset eksportens størrelse. Regex'erne
+kører kun på én række ad gangen og kan derfor ikke backtracke hen over
+hele filen. Kommer der ingen </tr> inden for MAX_ROW_SIZE tegn, læses
+bufferen som løse URLs. Hver tabelrække giver én Memory:
+
+    <tr><td>2024-01-15 14:32:10 UTC</td><td>Image</td>...
+        <a onclick="downloadMemories('https://...api.snapchat.com/dmd/mm?...&mid=UUID...')">
+
+Bruges af både 1_download.py (URLs) og 3_sort.py (timestamps).
+"""
+
+import html
+import re
+from collections import namedtuple
+from datetime import datetime
+
+CHUNK_SIZE = 1024 * 1024
+MAX_ROW_SIZE = 16 * 1024 * 1024   # Tegn uden </tr> før bufferen tømmes (en række er < 1 KB)
+
+URL_PATTERN = re.compile(r'https://[^"\'<>\s]+api\.snapchat\.com/dmd/mm[^"\'<>\s]*')
+UUID_PATTERN = re.compile(r'mid=([A-F0-9-]+)', re.IGNORECASE)
+TIMESTAMP_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) UTC')
+ROW_START_PATTERN = re.compile(r'<tr[\s>]', re.IGNORECASE)
+ROW_END_PATTERN = re.compile(r'</tr\s*>', re.IGNORECASE)
+CELL_PATTERN = re.compile(r'<t[dh][^>]*>(.*?)</t[dh]\s*>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+URL_DELIMITERS = '"\'<> \t\r\n'  # Kan ikke indgå i en URL — sikre steder at skære
+
+Memory = namedtuple('Memory', ['uuid', 'url', 'timestamp', 'media_type'])
+Memory.__doc__ = """
+Én række fra eksporten.
+
+uuid er mid= fra URL'en (None hvis den mangler), timestamp er en naiv UTC
+datetime (None hvis rækken ikke har en), media_type er fx 'Image'/'Video'.
+"""
+
+
+def uuid_from_url(url):
+    """Udtræk UUID (mid=) fra en download URL, eller None."""
+    match = UUID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def iter_memories(html_path, chunk_size=CHUNK_SIZE, max_row_size=MAX_ROW_SIZE):
+    """
+    Generator over alle memories i eksporten, i filens rækkefølge.
+
+    Duplikater gives videre som de står — det er op til kalderen at beslutte
+    hvad der skal ske med dem. URLs uden for en tabelrække gives videre
+    uden dato og type.
+
+    Vokser bufferen over max_row_size tegn uden en </tr> (en defekt eller
+    ikke-tabel fil), gives URLs'erne i den videre som løse URLs, så
+    hukommelsesforbruget forbliver begrænset.
+    """
+    warned = False
+    buffer = ''
+    with open(html_path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buffer += chunk
+
+            position = 0
+            for match in ROW_END_PATTERN.finditer(buffer):
+                yield from _parse_segment(buffer[position:match.start()])
+                position = match.end()
+            buffer = buffer[position:]
+
+            if len(buffer) > max_row_size:
+                if not warned:
+                    print(f"⚠️  Ingen </tr> i {max_row_size // 1024 // 1024} MB af {html_path} "
+                          f"— læser URLs uden dato og type")
+                    warned = True
+                cut = max(buffer.rfind(c) for c in URL_DELIMITERS) + 1
+                for url in URL_PATTERN.findall(buffer, 0, cut):
+                    url = _unescape_url(url)
+                    yield Memory(uuid_from_url(url), url, None, None)
+                # Uden skilletegn er resten ét kæmpe token — det er ikke en URL
+                buffer = buffer[cut:] if cut else ''
+
+    # Resten efter sidste </tr> (eller en fil helt uden tabeller)
+    for url in URL_PATTERN.findall(buffer):
+        url = _unescape_url(url)
+        yield Memory(uuid_from_url(url), url, None, None)
+
+
+def _parse_segment(segment):
+    """Parse teksten op til en </tr>: evt. løse URLs efterfulgt af selve rækken."""
+    row_start = None
+    for row_start in ROW_START_PATTERN.finditer(segment):
+        pass
+
+    if row_start is None:
+        outside, row = segment, ''
+    else:
+        outside, row = segment[:row_start.start()], segment[row_start.start():]
+
+    for url in URL_PATTERN.findall(outside):
+        url = _unescape_url(url)
+        yield Memory(uuid_from_url(url), url, None, None)
+
+    url_match = URL_PATTERN.search(row)
+    if not url_match:
+        return
+
+    # Kun første link i en række bruges
+    url = _unescape_url(url_match.group(0))
+    timestamp = None
+    media_type = None
+
+    for cell in CELL_PATTERN.findall(row):
+        text = TAG_PATTERN.sub('', cell).strip()
+        if '&' in text:
+            text = html.unescape(text)
+        match = TIMESTAMP_PATTERN.search(text)
+        if match and timestamp is None:
+            timestamp = _parse_timestamp(match.group(1))
+        elif text and media_type is None:
+            media_type = text
+
+    yield Memory(uuid_from_url(url), url, timestamp, media_type)
+
+
+def _unescape_url(url):
+    # Kun &amp; — html.unescape ville fx gøre "&not=" i en query string til "¬="
+    return url.replace('&amp;', '&')
+
+
+def _parse_timestamp(timestamp_str):
+    # fromisoformat er markant hurtigere end strptime på store eksporter
+    try:
+        return datetime.fromisoformat(timestamp_str)
+    except ValueError as e:
+        print(f"⚠️  Kunne ikke parse timestamp: {timestamp_str} — {e}")
+        return None
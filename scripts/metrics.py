@@ -0,0 +1,304 @@
+"""
+Målinger per fil og per stage, til at finde ud af hvad en langsom kørsel venter på.
+
+Hvert script opretter én Recorder (evt. med en Profiler) og sender den
+videre til de funktioner der laver arbejdet. Hver måling er én stage
+(fx 'fetch', 'verify', 'move') for én fil:
+
+    {"stage": "fetch", "uuid": "ABC...", "seconds": 0.412, "bytes": 1048576, "status": 200}
+
+Med --metrics skrives målingerne som JSON-lines til data/metrics/, og der
+printes en tabel med antal, total og p50/p95/p99 per stage. Uden --metrics
+er Recorder'en slået fra og koster kun et perf_counter kald per måling.
+
+Profiler er en valgfri hook per stage: cProfile og/eller tracemalloc
+omkring stage-kaldene. Da flere threads kører samme stage samtidig,
+profileres kun ét kald ad gangen — de andre kører uprofileret. Det giver
+et stikprøve-billede af stagen uden at profilerne blander sig med
+hinanden. Resultatet gemmes som .prof filer (læses med pstats eller
+snakeviz) og en tekstfil med tracemalloc top 20.
+"""
+
+import cProfile
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+PERCENTILES = (50, 95, 99)
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP = 20
+
+
+def run_name(script):
+    """Navn til filerne fra én kørsel: '1_download-20240115-143210'."""
+    return f"{script}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def peak_rss_mb():
+    """Processens højeste resident memory i MB (None hvor resource mangler, fx Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB på Linux, bytes på macOS
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentil af en sorteret liste."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """
+    Saml målinger per stage (thread-safe).
+
+    Brug:
+        metrics = Recorder(path)              # path=None: slået fra
+        with metrics.time('verify', uuid) as m:
+            ...
+            m['bytes'] = size
+        metrics.count('http_429')
+        metrics.close()
+        for line in metrics.summary():
+            print(line)
+
+    Med en Profiler køres hver time() blok også gennem profiler.stage().
+    """
+
+    def __init__(self, path=None, profiler=None):
+        self.path = Path(path) if path else None
+        self.enabled = self.path is not None
+        self.profiler = profiler
+        self.durations = defaultdict(list)
+        self.bytes = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._file = None
+        self._lock = threading.Lock()
+
+        if self.enabled:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def record(self, stage, seconds, uuid=None, num_bytes=0, **fields):
+        """Registrér én måling. Ekstra felter (status, attempts, ...) skrives med i linjen."""
+        if not self.enabled:
+            return
+
+        entry = {'stage': stage, 'uuid': uuid, 'seconds': round(seconds, 6)}
+        if num_bytes:
+            entry['bytes'] = num_bytes
+        entry.update(fields)
+        line = json.dumps(entry) + '\n'
+
+        with self._lock:
+            self.durations[stage].append(seconds)
+            self.bytes[stage] += num_bytes
+            if self._file:
+                self._file.write(line)
+
+    @contextmanager
+    def time(self, stage, uuid=None, **fields):
+        """
+        Tag tid på en blok. Den yieldede dict kan udfyldes med 'bytes' og
+        andre felter undervejs; de kommer med i målingen.
+        """
+        extra = dict(fields)
+        start = time.perf_counter()
+        try:
+            with self.profile(stage):
+                yield extra
+        finally:
+            num_bytes = extra.pop('bytes', 0)
+            self.record(stage, time.perf_counter() - start, uuid, num_bytes, **extra)
+
+    def profile(self, stage):
+        """Kun profilering af en blok — til kode der selv tager tid (fx i en anden proces)."""
+        return self.profiler.stage(stage) if self.profiler else nullcontext()
+
+    def count(self, name, amount=1):
+        """Tæl en hændelse uden varighed (retries, HTTP statuskoder, ...)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += amount
+
+    def summary(self):
+        """Tabel med én linje per stage + tællere. Tom liste hvis slået fra."""
+        if not self.enabled:
+            return []
+
+        header = f"{'stage':<12}{'antal':>8}{'total s':>10}" + "".join(
+            f"{f'p{p} ms':>10}" for p in PERCENTILES
+        ) + f"{'MB':>10}"
+        lines = [header, "-" * len(header)]
+
+        with self._lock:
+            stages = {stage: sorted(values) for stage, values in self.durations.items()}
+            counters = dict(self.counters)
+
+        for stage, values in stages.items():
+            line = f"{stage:<12}{len(values):>8}{sum(values):>10.2f}"
+            for p in PERCENTILES:
+                line += f"{percentile(values, p) * 1000:>10.1f}"
+            line += f"{self.bytes[stage] / 1024 / 1024:>10.1f}"
+            lines.append(line)
+
+        if counters:
+            lines.append("")
+            lines.append("  ".join(f"{name}: {value}" for name, value in sorted(counters.items())))
+        if self.path:
+            lines.append(f"JSON-lines: {self.path}")
+        return lines
+
+
+class Profiler:
+    """
+    cProfile/tracemalloc omkring udvalgte stages.
+
+    Brug:
+        profiler = Profiler(output_dir, run, stages={'verify'}, trace_memory=True)
+        metrics = Recorder(path, profiler)
+        with metrics.time('verify'):
+            ...
+        profiler.close()   # skriver .prof og tracemalloc filer
+
+    stages er en mængde stage-navne, eller {'all'} for alle.
+    """
+
+    def __init__(self, output_dir=None, run=None, stages=(), trace_memory=False):
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.run = run
+        self.stages = set(stages)
+        self.trace_memory = trace_memory
+        self.profiles = {}
+        self.peak_bytes = defaultdict(int)
+        self._busy = threading.Lock()
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    @property
+    def enabled(self):
+        return bool(self.stages) or self.trace_memory
+
+    def _wants(self, stage):
+        return 'all' in self.stages or stage in self.stages
+
+    @contextmanager
+    def stage(self, stage):
+        profile_cpu = self._wants(stage)
+        if not (profile_cpu or self.trace_memory) or not self._busy.acquire(blocking=False):
+            # Slået fra, eller en anden thread profilerer allerede
+            yield
+            return
+
+        try:
+            profile = None
+            if profile_cpu:
+                profile = self.profiles.setdefault(stage, cProfile.Profile())
+                profile.enable()
+            if self.trace_memory:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            try:
+                yield
+            finally:
+                if profile:
+                    profile.disable()
+                if self.trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1] - before
+                    self.peak_bytes[stage] = max(self.peak_bytes[stage], peak)
+        finally:
+            self._busy.release()
+
+    def close(self):
+        """
+        Gem profilerne.
+
+        Returns:
+            liste af skrevne filer
+        """
+        if not self.enabled or not self.output_dir:
+            return []
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for stage, profile in self.profiles.items():
+            path = self.output_dir / f"{self.run}-{stage}.prof"
+            profile.dump_stats(str(path))
+            written.append(path)
+
+        if self.trace_memory:
+            path = self.output_dir / f"{self.run}-tracemalloc.txt"
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"current: {current / 1024 / 1024:.1f} MB, peak: {peak / 1024 / 1024:.1f} MB\n\n")
+                f.write("Højeste allokering under ét kald per stage:\n")
+                for stage, peak_bytes in sorted(self.peak_bytes.items()):
+                    f.write(f"  {stage:<12}{peak_bytes / 1024:>10.1f} KB\n")
+                f.write(f"\nTop {TRACEMALLOC_TOP} allokeringer ved afslutning:\n")
+                for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                    f.write(f"  {stat}\n")
+            tracemalloc.stop()
+            written.append(path)
+
+        return written
+
+
+def add_arguments(parser):
+    """Fælles --metrics/--profile/--tracemalloc flag til alle scripts."""
+    parser.add_argument(
+        '--metrics', action='store_true',
+        help="gem timings per fil som JSON-lines i data/metrics/ og vis p50/p95/p99",
+    )
+    parser.add_argument(
+        '--profile', metavar='STAGES', default='',
+        help="cProfile udvalgte stages, kommasepareret (fx 'fetch,verify' eller 'all')",
+    )
+    parser.add_argument(
+        '--tracemalloc', action='store_true',
+        help="mål hukommelsesallokeringer per stage med tracemalloc",
+    )
+
+
+def from_args(args, output_dir, script):
+    """Opret en Recorder (med Profiler hvis --profile/--tracemalloc) ud fra kommandolinjen."""
+    run = run_name(script)
+    stages = {stage.strip() for stage in args.profile.split(',') if stage.strip()}
+    profiler = Profiler(output_dir, run, stages, trace_memory=args.tracemalloc)
+    return Recorder(
+        output_dir / f"{run}.jsonl" if args.metrics else None,
+        profiler if profiler.enabled else None,
+    )
+
+
+def report(recorder):
+    """Luk recorder og profiler og print opsummeringen (intet hvis de er slået fra)."""
+    recorder.close()
+    written = recorder.profiler.close() if recorder.profiler else []
+
+    lines = recorder.summary()
+    if lines:
+        print()
+        print("📈 Målinger:")
+        for line in lines:
+            print(f"   {line}" if line else "")
+    for path in written:
+        print(f"🔬 Profil: {path}")
@@ -0,0 +1,166 @@
+"""
+Læg Snapchat's tekst-overlay (PNG) oven på billedet, så teksten ikke går tabt.
+
+Bruges af 2_unzip.py --composite. Hver overlay-ZIP behandles for sig i en
+worker proces: billede og overlay læses direkte fra ZIP'en, blendes og
+skrives som <UUID>.jpg. Der er kun ét billede i hukommelsen per worker ad
+gangen, uanset hvor mange ZIPs der er.
+
+Alpha blending sker vektoriseret med NumPy og kun inden for bounding boxen
+om overlayets synlige pixels (typisk et tekstbånd) — resten af billedet
+røres ikke.
+
+Kan Pillow ikke læse billedet eller overlayet, udpakkes ZIP'en som uden
+--composite, og overlayet gemmes i data/raw/overlays/ (UNREADABLE), så
+hverken billede eller overlay går tabt.
+
+Video overlays kan ikke blendes her; videoen udpakkes som normalt, overlayet
+gemmes i data/raw/overlays/ og UUID'en skrives i video_queue.jsonl til en
+senere pass (fx med ffmpeg).
+
+Kræver numpy og Pillow:  pip install numpy pillow
+"""
+
+import io
+import os
+import zipfile
+from pathlib import Path
+
+from zip_extract import OVERLAY_FOLDER_NAME, extract_member, extract_zip_inplace
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+VIDEO_EXTENSIONS = ('.mp4', '.mov')
+JPEG_QUALITY = 92
+VIDEO_QUEUE_NAME = 'video_queue.jsonl'
+
+COMPOSITED = 'composited'
+QUEUED = 'queued'
+UNREADABLE = 'unreadable'
+
+
+def missing_dependencies():
+    """Navne på de pakker der mangler for at kunne compositere (tom liste = klar)."""
+    missing = []
+    for module, package in (('numpy', 'numpy'), ('PIL', 'pillow')):
+        try:
+            __import__(module)
+        except ImportError:
+            missing.append(package)
+    return missing
+
+
+def blend(image, overlay):
+    """
+    Alpha-blend overlay (RGBA) oven på image (RGB); image ændres på stedet.
+
+    Kun bounding boxen om overlayets synlige pixels konverteres til NumPy og
+    regnes igennem — resten af billedet røres ikke.
+    """
+    import numpy as np
+    from PIL import Image
+
+    if overlay.size != image.size:
+        overlay = overlay.resize(image.size, Image.Resampling.BILINEAR)
+
+    box = overlay.getchannel('A').getbbox()
+    if box is None:
+        return image
+
+    over = np.asarray(overlay.crop(box), dtype=np.uint16)
+    region = np.asarray(image.crop(box), dtype=np.uint16)
+    alpha = over[..., 3:]
+    # (c·a + b·(255 − a)) / 255 med afrunding, i heltal
+    blended = (over[..., :3] * alpha + region * (255 - alpha) + 127) // 255
+    image.paste(Image.fromarray(blended.astype(np.uint8)), box[:2])
+    return image
+
+
+def composite_image(image_bytes, overlay_bytes, output_path):
+    """
+    Blend overlayet på billedet og gem som JPEG (atomisk via rename).
+
+    EXIF orientering anvendes først, da overlayet er i visningsretningen.
+
+    Returns:
+        størrelsen på den skrevne fil
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(image_bytes)) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+        exif = source.getexif()
+    with Image.open(io.BytesIO(overlay_bytes)) as source:
+        overlay = source.convert('RGBA')
+
+    result = blend(image, overlay)
+    exif.pop(0x0112, None)   # Orientering er allerede anvendt
+
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    try:
+        result.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, exif=exif.tobytes())
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return output_path.stat().st_size
+
+
+def composite_zip(zip_path, keep_overlay=False):
+    """
+    Udpak en overlay-ZIP med overlayet lagt på billedet.
+
+    - Billede + PNG overlay: blendes til <UUID>.jpg
+    - Video + overlay: videoen udpakkes, overlayet gemmes i overlays/ (QUEUED)
+    - Billede eller overlay Pillow ikke kan læse: almindelig udpakning med
+      overlayet gemt i overlays/ (UNREADABLE)
+    - Alt andet: almindelig extract_zip_inplace
+
+    Returns:
+        (success, uuid, file_size, info, overlay_status) hvor overlay_status
+        er COMPOSITED, QUEUED, UNREADABLE eller None
+    """
+    uuid = zip_path.stem
+    parent_folder = zip_path.parent
+
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            file_list = [f for f in zip_ref.infolist() if not f.is_dir()]
+            if len(file_list) < 2:
+                return (*extract_zip_inplace(zip_path, keep_overlay), None)
+
+            main_file = max(file_list, key=lambda f: f.file_size)
+            overlay = next((f for f in file_list if f is not main_file
+                            and Path(f.filename).suffix.lower() == '.png'), None)
+            extension = Path(main_file.filename).suffix.lower()
+            if overlay is None or extension not in IMAGE_EXTENSIONS + VIDEO_EXTENSIONS:
+                return (*extract_zip_inplace(zip_path, keep_overlay), None)
+
+            overlay_folder = parent_folder / OVERLAY_FOLDER_NAME
+
+            if extension in VIDEO_EXTENSIONS:
+                output_path = parent_folder / f"{uuid}{extension}"
+                extract_member(zip_path, zip_ref, main_file, output_path)
+                overlay_folder.mkdir(exist_ok=True)
+                extract_member(zip_path, zip_ref, overlay, overlay_folder / f"{uuid}.png")
+                return True, uuid, main_file.file_size, extension, QUEUED
+
+            output_path = parent_folder / f"{uuid}.jpg"
+            overlay_bytes = zip_ref.read(overlay)
+            try:
+                size = composite_image(zip_ref.read(main_file), overlay_bytes, output_path)
+            except (OSError, ValueError, SyntaxError):
+                # Pillow kan ikke afkode billedet eller overlayet (UnidentifiedImageError
+                # er en OSError) — udpak som uden --composite og behold overlayet
+                size = None
+            if size is not None:
+                if keep_overlay:
+                    overlay_folder.mkdir(exist_ok=True)
+                    (overlay_folder / f"{uuid}.png").write_bytes(overlay_bytes)
+                return True, uuid, size, '.jpg', COMPOSITED
+
+        return (*extract_zip_inplace(zip_path, keep_overlay=True), UNREADABLE)
+
+    except zipfile.BadZipFile:
+        return False, uuid, 0, "Korrupt ZIP fil", None
+    except Exception as e:
+        return False, uuid, 0, str(e), None
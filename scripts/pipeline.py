@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+Alle tre trin på én gang: download → udpak → sortér som overlappende stages.
+
+I stedet for at vente på at alle downloads er færdige før udpakning og
+sortering starter, flyder hver memory gennem alle tre trin så snart den er
+hentet. Trinene er forbundet med afgrænsede køer:
+
+    feeder ──▶ [download × N] ──▶ [unzip × M] ──▶ [sort × 1] ──▶ data/sorted/
+
+Backpressure: der startes kun en ny download når der er færre end
+--max-raw memories i gang (under download eller usorteret i data/raw/).
+Så ligger der aldrig hele eksporten usorteret på disken på én gang.
+
+Memories streames fra manifest-cachen (kun første forekomst af hver UUID
+ifølge manifest-indekset), så hukommelsen ikke vokser med eksportens
+størrelse. Nummereringen af memories på samme minut tildeles af feederen i
+HTML rækkefølge, så navnene bliver de samme uanset hvilken download der
+bliver færdig først; huller efter memories der ikke nåede frem (fejlede
+eller afbrudte downloads), lukkes til sidst. Flytningerne skrives i sort
+ledgeren, kataloget og undo loggen, så `3_sort.py --undo` og `1_download.py
+--incremental` virker som efter de tre scripts hver for sig. Undo loggen fra
+sidste sortering fortsættes i stedet for at blive erstattet, så --undo
+ruller både den og pipelinen tilbage.
+
+Brug:
+    python scripts/pipeline.py
+    python scripts/pipeline.py --workers 8 --max-raw 64 --dedupe
+    python scripts/pipeline.py --embed-dates
+    python scripts/pipeline.py --metrics
+
+Input:  input/memories_history.html
+Output: data/sorted/YYYY/MM-måned/DD-MM-YYYY (HH.MM).ext
+"""
+
+import os
+import time
+import queue
+import shutil
+import argparse
+import threading
+import uuid as uuid_module
+from collections import Counter, defaultdict, namedtuple
+from pathlib import Path
+
+import download as download_step
+import metrics
+import sort as sort_step
+from content_index import ContentIndex
+from manifest_cache import iter_manifest, load_index
+from media_timestamps import embed_timestamp
+from media_verify import MediaVerifier
+from progress_journal import ProgressJournal, compact
+from sort_ledger import SortLedger, already_sorted, compact_ledger
+from sort_plan import Move, PlanError, SortPlan, UndoLog, sort_interrupted, undo_log_plan
+from uuid_index import NO_TIMESTAMP, to_epoch
+from zip_extract import extract_zip_inplace
+
+# ─── Konfiguration ───────────────────────────────────────────────────────────
+HTML_FILE = download_step.HTML_FILE
+RAW_DIR = download_step.OUTPUT_DIR
+SORTED_DIR = sort_step.OUTPUT_FOLDER
+METRICS_DIR = download_step.METRICS_DIR
+
+WORKERS = download_step.WORKERS   # Samtidige downloads
+UNZIP_WORKERS = 2                 # Tråde der udpakker ZIP filer
+MAX_RAW = 32                      # Max antal usorterede filer i data/raw/ ad gangen
+QUEUE_SIZE = 16                   # Plads i køen mellem to stages
+STATUS_INTERVAL = 10.0            # Sekunder mellem status-linjer
+
+STOP = object()
+
+Item = namedtuple('Item', ['position', 'uuid', 'url', 'timestamp', 'path', 'number'])
+Item.__doc__ = """
+Én memory på vej gennem pipelinen. path sættes af download stage (eller er
+filen i data/raw/ fra en afbrudt kørsel); number er nummeret på minuttet
+(None hvis memory'en er alene på sit minut).
+"""
+
+
+def minute_key(dt):
+    """Minuttal (epoch-minutter) — samme nøgle som 3_sort.py nummererer efter."""
+    return to_epoch(dt) // 60
+
+
+def iter_items(manifest_index, placed, in_raw):
+    """
+    Memories der skal igennem pipelinen, i HTML rækkefølge (uden number).
+
+    Kun første forekomst af hver UUID ifølge manifest-indekset, ligesom
+    download.iter_pending. Memories der allerede er sorteret, springes over.
+    """
+    for position, memory in enumerate(iter_manifest(download_step.MANIFEST_CACHE), 1):
+        if memory.uuid:
+            first = manifest_index.get(memory.uuid)
+            if first is not None and first[0] != position:
+                continue
+        base_filename = memory.uuid or download_step.extract_filename_from_url(memory.url)
+        key = base_filename.upper()
+        if key in placed:
+            continue
+        path = RAW_DIR / in_raw[key] if key in in_raw else None
+        yield Item(position, base_filename, memory.url, memory.timestamp, path, None)
+
+
+class MinuteNumbers:
+    """
+    Nummerering af memories der deler minut, som number_minutes i 3_sort.py,
+    men uden at holde alle UUIDs i hukommelsen: minutterne tælles i ét pass
+    over manifestet, og feederen henter numrene i HTML rækkefølge.
+
+    Memories der allerede er sorteret (placed_minutes) tæller med først, så
+    nye filer på samme minut fortsætter rækken.
+    """
+
+    def __init__(self, placed_minutes=()):
+        self.placed = Counter(placed_minutes)
+        self.counts = Counter(self.placed)
+        self._last = Counter(self.placed)
+
+    def count(self, timestamp):
+        """Tæl en memory med i første pass."""
+        self.counts[minute_key(timestamp)] += 1
+
+    def next(self, timestamp):
+        """Nummeret til næste memory på minuttet, eller None hvis den er alene."""
+        minute = minute_key(timestamp)
+        if self.counts[minute] <= 1:
+            return None
+        self._last[minute] += 1
+        return self._last[minute]
+
+
+# ─── Stages ──────────────────────────────────────────────────────────────────
+
+class Stage:
+    """
+    En pulje af worker threads der læser fra én kø og skriver til den næste.
+
+    func(item) returnerer det item der skal videre, eller None hvis det
+    stopper her (fejl, eller allerede sorteret). Rejser func en exception,
+    kaldes on_error(item). Tællerne er thread-safe.
+    """
+
+    def __init__(self, name, func, workers, outbox=None, on_error=None):
+        self.name = name
+        self.func = func
+        self.on_error = on_error
+        self.workers = workers
+        self.inbox = queue.Queue(maxsize=QUEUE_SIZE)
+        self.outbox = outbox
+        self.done = 0
+        self.stopped = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def close(self):
+        """Vent til alle items i køen er behandlet og stop worker threads."""
+        for _ in self._threads:
+            self.inbox.put(STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is STOP:
+                return
+
+            start = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"   ❌ {self.name} {item.uuid}: {e}")
+                if self.on_error:
+                    self.on_error(item)
+                result = None
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.busy_seconds += elapsed
+                if result is None:
+                    self.stopped += 1
+                else:
+                    self.done += 1
+                    if result.path is not None:
+                        try:
+                            self.bytes += result.path.stat().st_size
+                        except OSError:
+                            pass
+
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+
+    def rate(self, elapsed):
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def status(self, elapsed):
+        return f"{self.name} {self.done} ({self.rate(elapsed):.1f}/s, kø {self.inbox.qsize()})"
+
+
+class Pipeline:
+    """Delt tilstand for de tre stages: download context, ledger, journal osv."""
+
+    def __init__(self, context, journal, ledger, catalog, undo_log, index, numbering, keep_overlay, max_raw,
+                 embed_dates=False):
+        self.context = context
+        self.journal = journal
+        self.ledger = ledger
+        self.catalog = catalog
+        self.undo_log = undo_log
+        self.index = index
+        self.numbering = numbering
+        self.numbered = defaultdict(list)    # minut → [(række, uuid, tidspunkt, sti)] placeret med nummer
+        self.gaps = set()                    # minutter hvor en nummereret memory ikke nåede frem
+        self.keep_overlay = keep_overlay
+        self.embed_dates = embed_dates
+        self.embedded = Counter()
+        self.failures = Counter()
+        self.dedupe = context.dedupe
+        self.metrics = context.metrics
+        self.reservations = sort_step.NameReservations(SORTED_DIR)
+        self.cancelled = threading.Event()
+        self.linked = 0
+        self.reclaimed_bytes = 0
+        self.in_raw = 0
+        self.peak_in_raw = 0
+        self._raw_slots = threading.BoundedSemaphore(max_raw)
+        self._lock = threading.Lock()
+
+    def claim_raw_slot(self):
+        """Blokér indtil der er plads til en fil mere i data/raw/ (backpressure)."""
+        self._raw_slots.acquire()
+        with self._lock:
+            self.in_raw += 1
+            self.peak_in_raw = max(self.peak_in_raw, self.in_raw)
+
+    def release_raw_slot(self):
+        with self._lock:
+            self.in_raw -= 1
+        self._raw_slots.release()
+
+    def drop(self, item):
+        """item når ikke frem til data/sorted/ — dens nummer efterlader et hul (se renumber)."""
+        if item.number is not None:
+            with self._lock:
+                self.gaps.add(minute_key(item.timestamp))
+
+    def abandon(self, item):
+        """on_error for download og unzip: fejlet item frigiver sin plads i data/raw/."""
+        self.drop(item)
+        self.release_raw_slot()
+
+    def download(self, item):
+        if item.path is not None:
+            # Lå allerede i data/raw/ fra en tidligere kørsel
+            return item
+        if self.cancelled.is_set():
+            # Når aldrig frem — et evt. nummer efterlader et hul som renumber lukker
+            self.abandon(item)
+            return None
+
+        file_size_mb, result = download_step.download_file(
+            self.context, item.url, item.uuid, f"[{item.position}] "
+        )
+        with self._lock:
+            if file_size_mb:
+                self.journal.record_downloaded(item.uuid)
+            else:
+                # Ingen retry kø her — 1_download.py --retry-failed tager dem bagefter
+                self.journal.record_failed(item.uuid, item.url, result.reason)
+                self.failures[result.reason] += 1
+
+        if not file_size_mb or result.parent != RAW_DIR:
+            # Fejlet, eller allerede sorteret under et andet navn
+            self.abandon(item)
+            return None
+        return item._replace(path=result)
+
+    def unzip(self, item):
+        if item.path.suffix.lower() != '.zip':
+            return item
+
+        with self.metrics.time('extract', item.uuid) as measurement:
+            success, _, size, info = extract_zip_inplace(item.path, self.keep_overlay)
+            measurement['bytes'] = size
+        if not success:
+            # ZIP'en sorteres som den er, ligesom i 3_sort.py
+            print(f"   ⚠️  Kunne ikke udpakke {item.path.name}: {info}")
+            return item
+        item.path.unlink()
+        return item._replace(path=item.path.with_suffix(info))
+
+    def sort(self, item):
+        # Pladsen i data/raw/ frigives af finally — også ved fejl
+        try:
+            extension = item.path.suffix.lower()
+            if item.timestamp is not None:
+                destination = sort_step.sorted_name(self.reservations, item.timestamp, extension, item.number)
+            else:
+                destination = self.reservations.reserve("(ingen dato)", item.path.stem, extension)
+
+            destination_path = SORTED_DIR / destination
+            destination_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.metrics.time('move', item.uuid):
+                try:
+                    os.rename(item.path, destination_path)
+                except OSError:
+                    # data/sorted ligger på et andet drev
+                    shutil.move(str(item.path), str(destination_path))
+
+            move = Move(item.uuid, item.path.name, destination, item.timestamp is not None)
+            self.undo_log.record(move, str(item.path), str(destination_path))
+            self.ledger.record(item.uuid, destination_path)
+            if item.number is not None:
+                self.numbered[minute_key(item.timestamp)].append(
+                    (item.position, item.uuid, item.timestamp, destination)
+                )
+
+            if move.dated and self.embed_dates:
+                # Før indeksering, så content indekset hasher det endelige indhold
+                with self.metrics.time('embed', item.uuid):
+                    self.embedded[embed_timestamp(destination_path, item.timestamp)] += 1
+
+            # Efter embed, så kataloget får filens endelige størrelse
+            self.catalog.record(
+                item.uuid, destination_path,
+                to_epoch(item.timestamp) if item.timestamp is not None else None,
+            )
+
+            if move.dated:
+                with self.metrics.time('index', item.uuid):
+                    freed = sort_step.collapse_duplicate(
+                        self.index, item.uuid, destination_path, self.dedupe
+                    )
+                if freed:
+                    self.linked += 1
+                    self.reclaimed_bytes += freed
+            else:
+                self.index.move(item.uuid, destination_path)
+        finally:
+            self.release_raw_slot()
+
+        return item._replace(path=destination_path)
+
+    def renumber(self):
+        """
+        Luk huller i nummereringen efter memories der ikke nåede frem.
+
+        Numrene blev givet på forhånd; fejlede fx 2 af 3 memories på samme
+        minut, ville 1 og 3 ellers blive liggende. Som i 3_sort.py nummereres
+        kun de filer der faktisk er placeret (i HTML rækkefølge), og en fil
+        der ender alene på sit minut, får navnet uden nummer. Køres efter
+        alle stages er lukket.
+
+        Returns:
+            antal omdøbte filer
+        """
+        renamed = 0
+        for minute in sorted(self.gaps):
+            entries = sorted(self.numbered.get(minute, ()))
+            first = self.numbering.placed[minute] + 1
+            shared = self.numbering.placed[minute] + len(entries) > 1
+            for number, (_, uuid, timestamp, destination) in enumerate(entries, first):
+                # Numrene kan kun blive mindre, så det nye navn er ledigt eller vores eget
+                self.reservations.release(destination)
+                extension = Path(destination).suffix
+                new_destination = sort_step.sorted_name(
+                    self.reservations, timestamp, extension, number if shared else None
+                )
+                if new_destination == destination:
+                    continue
+
+                source_path = SORTED_DIR / destination
+                destination_path = SORTED_DIR / new_destination
+                os.rename(source_path, destination_path)
+                self.undo_log.record(Move(uuid, destination, new_destination, True),
+                                     str(source_path), str(destination_path))
+                self.ledger.record(uuid, destination_path)
+                self.catalog.record(uuid, destination_path, to_epoch(timestamp))
+                self.index.move(uuid, destination_path)
+                renamed += 1
+        return renamed
+
+
+def sort_plan_pending():
+    """
+    True hvis en 3_sort.py plan blev afbrudt. Pipelinen starter en ny undo
+    log, så den afbrudte sortering ikke længere kunne genoptages eller rulles
+    tilbage.
+    """
+    if not sort_interrupted(sort_step.SORT_UNDO) or not sort_step.SORT_PLAN.exists():
+        return False
+    try:
+        return SortPlan.load(sort_step.SORT_PLAN).interrupted(sort_step.SORT_UNDO)
+    except PlanError:
+        # Planen kan ikke læses — men undo loggen skal stadig bevares
+        return True
+
+
+def status_printer(stages, pipeline, start_time, stop_event):
+    """Print en linje med alle stages hvert STATUS_INTERVAL sekund."""
+    while not stop_event.wait(STATUS_INTERVAL):
+        elapsed = time.time() - start_time
+        print("📊 " + " | ".join(stage.status(elapsed) for stage in stages)
+              + f" | i gang: {pipeline.in_raw}")
+
+
+# ─── Hovedfunktion ────────────────────────────────────────────────────────────
+
+def parse_args():
+    """Læs kommandolinje-argumenter."""
+    parser = argparse.ArgumentParser(
+        description="Download, udpak og sortér Snapchat memories i én samlet pipeline."
+    )
+    parser.add_argument(
+        '--workers', type=int, default=WORKERS,
+        help=f"antal samtidige downloads (default: {WORKERS})",
+    )
+    parser.add_argument(
+        '--unzip-workers', type=int, default=UNZIP_WORKERS,
+        help=f"antal tråde der udpakker ZIP filer (default: {UNZIP_WORKERS})",
+    )
+    parser.add_argument(
+        '--max-raw', type=int, default=MAX_RAW,
+        help=f"max antal usorterede filer i data/raw ad gangen (default: {MAX_RAW})",
+    )
+    parser.add_argument(
+        '--keep-overlay', action='store_true',
+        help="gem overlays fra ZIP filer i data/raw/overlays/",
+    )
+    parser.add_argument(
+        '--deep-verify', action='store_true',
+        help="kør også MediaInfo på videoer (langsommere)",
+    )
+    parser.add_argument(
+        '--dedupe', action='store_true',
+        help="erstat byte-identiske filer med hardlinks til den første kopi",
+    )
+    parser.add_argument(
+        '--embed-dates', action='store_true',
+        help="skriv tidspunktet ind i EXIF (JPEG) og mvhd/tkhd (MP4) og sæt filernes mtime",
+    )
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Kør download, udpakning og sortering som én pipeline."""
+    args = parse_args()
+    workers = max(1, args.workers)
+    unzip_workers = max(1, args.unzip_workers)
+    max_raw = max(workers, args.max_raw)
+
+    print("=" * 80)
+    print("🔀 SNAPCHAT MEMORIES PIPELINE")
+    print("=" * 80)
+    print()
+
+    if not HTML_FILE.exists():
+        print(f"❌ HTML fil ikke fundet: {HTML_FILE}")
+        print(f"   Placér din memories_history.html i input/-mappen.")
+        return
+
+    if sort_plan_pending():
+        print(f"❌ En sortering fra {sort_step.SORT_PLAN.name} blev afbrudt og er ikke færdig.")
+        print("   Kør først: python scripts/3_sort.py (eller --undo for at rulle den tilbage)")
+        return
+
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    SORTED_DIR.mkdir(parents=True, exist_ok=True)
+
+    header = download_step.parse_html()
+    # Indekset (data/cache/*.idx) finder første forekomst af hver UUID, og
+    # `snap.py status` læser det unikke antal herfra
+    manifest_index = load_index(HTML_FILE, download_step.MANIFEST_CACHE, header)
+
+    # Allerede sorteret (ledger) springes over; filer der allerede ligger i
+    # data/raw/ fra en afbrudt kørsel går direkte videre til udpakning
+    placed = already_sorted(sort_step.SORT_LEDGER, SORTED_DIR)
+    in_raw = sort_step.scan_source_files(RAW_DIR)
+
+    # Første pass over manifestet: kun tællinger, til nummereringen og overblikket
+    placed_epochs = (manifest_index.get(uuid, (0, NO_TIMESTAMP))[1] for uuid in placed)
+    numbering = MinuteNumbers(seconds // 60 for seconds in placed_epochs if seconds != NO_TIMESTAMP)
+    total = 0
+    waiting_in_raw = 0
+    for item in iter_items(manifest_index, placed, in_raw):
+        total += 1
+        waiting_in_raw += item.path is not None
+        if item.timestamp is not None:
+            numbering.count(item.timestamp)
+
+    print()
+    print(f"📊 TOTAL: {total} memories ({len(placed)} allerede sorteret, "
+          f"{waiting_in_raw} ligger i data/raw)")
+    print(f"⚙️  Workers: {workers} downloads, {unzip_workers} udpakning, 1 sortering")
+    print(f"🚧 Max {max_raw} usorterede filer i data/raw ad gangen")
+    print()
+
+    limiter = download_step.AdaptiveRateLimiter()
+    recorder = metrics.from_args(args, METRICS_DIR, 'pipeline')
+    session = download_step.create_session(max(workers, download_step.POOL_SIZE), limiter, recorder)
+    verifier = MediaVerifier(deep=args.deep_verify)
+    index = ContentIndex(download_step.CONTENT_INDEX)
+    context = download_step.DownloadContext(
+        session, limiter, verifier, index=index, dedupe=args.dedupe, recorder=recorder,
+    )
+    journal = ProgressJournal(download_step.progress_file)
+    journal.open()
+    ledger = SortLedger(sort_step.SORT_LEDGER, SORTED_DIR)
+    ledger.open()
+    catalog = sort_step.open_catalog(None)
+    # En eksisterende undo log (sidste 3_sort.py eller pipeline kørsel) fortsættes
+    # i stedet for at blive erstattet — --undo ruller så begge kørsler tilbage
+    previous_plan = undo_log_plan(sort_step.SORT_UNDO)
+    if previous_plan:
+        print(f"↩️  Fortsætter {sort_step.SORT_UNDO.name} — `3_sort.py --undo` ruller også "
+              f"sidste sortering tilbage")
+    undo_log = UndoLog(sort_step.SORT_UNDO, previous_plan or uuid_module.uuid4().hex)
+    undo_log.open()
+
+    pipeline = Pipeline(context, journal, ledger, catalog, undo_log, index, numbering, args.keep_overlay, max_raw,
+                        args.embed_dates)
+    sort_stage = Stage("sort", pipeline.sort, 1, on_error=pipeline.drop)
+    unzip_stage = Stage("unzip", pipeline.unzip, unzip_workers,
+                        outbox=sort_stage.inbox, on_error=pipeline.abandon)
+    download_stage = Stage("download", pipeline.download, workers,
+                           outbox=unzip_stage.inbox, on_error=pipeline.abandon)
+    stages = (download_stage, unzip_stage, sort_stage)
+
+    start_time = time.time()
+    status_stop = threading.Event()
+    status_thread = threading.Thread(
+        target=status_printer,
+        args=(stages, pipeline, start_time, status_stop),
+        daemon=True,
+    )
+    for stage in stages:
+        stage.start()
+    status_thread.start()
+
+    interrupted = False
+    try:
+        # Feeder: en ny memory må først starte når der er plads i data/raw/
+        for item in iter_items(manifest_index, placed, in_raw):
+            if item.timestamp is not None:
+                item = item._replace(number=numbering.next(item.timestamp))
+            pipeline.claim_raw_slot()
+            download_stage.inbox.put(item)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n⏹️  Afbrudt — færdiggør igangværende filer og gemmer progress...")
+        pipeline.cancelled.set()
+    finally:
+        download_stage.close()
+        unzip_stage.close()
+        sort_stage.close()
+        status_stop.set()
+        renamed = pipeline.renumber()
+        if not interrupted:
+            undo_log.finish()
+        undo_log.close()
+        ledger.close()
+        catalog.close()
+        journal.close()
+        index.close()
+        manifest_index.close()
+
+    compact(download_step.progress_file)
+    compact_ledger(sort_step.SORT_LEDGER)
+
+    # Afslutning
+    elapsed = time.time() - start_time
+    session.close()
+    print()
+    print("=" * 80)
+    print("✅ PIPELINE FÆRDIG!" if not interrupted else "⏹️  PIPELINE AFBRUDT")
+    print("=" * 80)
+    for stage in stages:
+        busy = stage.busy_seconds / stage.workers
+        print(f"   {stage.name:<9} {stage.done:>6} ok  {stage.stopped:>4} stoppet  "
+              f"{stage.rate(elapsed):6.2f}/s  {stage.bytes / 1024 / 1024:8.1f} MB  "
+              f"(travl {busy / elapsed * 100 if elapsed else 0:.0f}% af tiden)")
+    if renamed:
+        print(f"🔢 {renamed} filer omdøbt, så nummereringen på minuttet ikke har huller")
+    print(f"🚧 Højest {pipeline.peak_in_raw} filer i gang på én gang (hentes eller venter på sortering)")
+    print(f"🧬 Allerede hentet: {context.avoided_downloads}")
+    print(f"🧬 Identiske filer hardlinket: {pipeline.linked + context.linked_files} "
+          f"({(pipeline.reclaimed_bytes + context.reclaimed_bytes) / 1024 / 1024:.1f} MB frigjort)")
+    for line in verifier.summary():
+        print(f"🔍 Verificering {line}")
+    if args.embed_dates:
+        print(f"🕒 Tidspunkt i metadata: {pipeline.embedded['patched']} rettet, "
+              f"{pipeline.embedded['inserted']} fik ny EXIF, {pipeline.embedded['mtime']} kun mtime")
+        if pipeline.embedded['skipped']:
+            print(f"   ⚠️  {pipeline.embedded['skipped']} filer kunne ikke skrives og blev sprunget over")
+    if pipeline.failures:
+        print(f"❌ Fejlede downloads: {sum(pipeline.failures.values())} ("
+              + ", ".join(f"{reason}: {count}" for reason, count in pipeline.failures.most_common())
+              + ") — prøv dem igen med: python scripts/1_download.py --retry-failed")
+    print(f"⏱️  Tid: {elapsed / 60:.1f} minutter")
+    print(f"💾 Output: {SORTED_DIR}")
+    metrics.report(recorder)
+
+
+if __name__ == "__main__":
+    main()
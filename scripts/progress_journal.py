@@ -0,0 +1,333 @@
+"""
+Append-only journal over download progress.
+
+Erstatter download_progress.json, som blev skrevet helt om efter hver fil.
+Journalen har én JSON-linje per færdig eller fejlet UUID:
+
+    {"uuid": "ABC...", "status": "ok"}
+    {"uuid": "DEF...", "status": "failed", "url": "https://...", "reason": "transient"}
+
+reason er klassificeringen fra retry_queue.py (transient, expired, corrupt).
+Fejlede linjer er køen som `1_download.py --retry-failed` afspiller.
+
+Linjer skrives med det samme, men fsync'es kun i batches. En halv linje
+efter et crash ignoreres ved indlæsning. Rækkefølgen af "ok" linjer er
+download-rækkefølgen, som 3_sort.py bruger.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from memories_html import uuid_from_url
+
+JOURNAL_NAME = 'download_progress.jsonl'
+LEGACY_NAME = 'download_progress.json'
+
+FSYNC_EVERY = 50         # fsync efter så mange linjer...
+FSYNC_INTERVAL = 5.0     # ...eller så mange sekunder, hvad der kommer først
+FAILED_MARKER = b'"status": "failed"'
+
+
+def read_progress(journal_path):
+    """
+    Læs journalen (eller den gamle JSON fil) til progress format.
+
+    Returns:
+        {'downloaded': [uuid, ...], 'failed': [url, ...]} hvor 'downloaded'
+        er i download-rækkefølge uden duplikater, og 'failed' kun indeholder
+        URLs der ikke senere er blevet downloaded.
+    """
+    journal_path = Path(journal_path)
+    legacy_path = journal_path.with_name(LEGACY_NAME)
+
+    if not journal_path.exists() and legacy_path.exists():
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {'downloaded': data.get('downloaded', []), 'failed': data.get('failed', [])}
+
+    downloaded, failed = _replay(journal_path)
+    return {'downloaded': downloaded, 'failed': [url for url, _ in failed.values()]}
+
+
+def read_failed(journal_path):
+    """
+    Fejlede downloads der ikke senere er lykkedes.
+
+    Returns:
+        {uuid: (url, reason)} i journalens rækkefølge; reason er None for
+        linjer skrevet før fejl blev klassificeret
+    """
+    journal_path = Path(journal_path)
+    legacy_path = journal_path.with_name(LEGACY_NAME)
+
+    if not journal_path.exists() and legacy_path.exists():
+        # Den gamle JSON fil gemte kun URLs
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            urls = json.load(f).get('failed', [])
+        return {uuid_from_url(url) or url: (url, None) for url in urls}
+
+    return _replay(journal_path)[1]
+
+
+def iter_downloaded(journal_path):
+    """
+    Generator over downloadede UUIDs uden at holde hele journalen i hukommelsen.
+
+    En UUID kan komme mere end én gang, hvis journalen ikke er komprimeret.
+    """
+    journal_path = Path(journal_path)
+    legacy_path = journal_path.with_name(LEGACY_NAME)
+
+    if not journal_path.exists():
+        if legacy_path.exists():
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                yield from json.load(f).get('downloaded', [])
+        return
+
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get('status') == 'ok':
+                yield entry.get('uuid')
+
+
+def count_progress(journal_path):
+    """
+    Hurtig optælling til `snap.py status`: kun fejlede linjer parses.
+
+    Alle andre hele linjer er "ok", så de tælles som linjeskift i bytes —
+    en journal med 500k linjer tælles på få millisekunder. Journalen
+    komprimeres efter hver kørsel; midt i en kørsel med --retry-failed kan
+    en UUID stå både som fejlet og ok, og tallene er da en smule for høje.
+
+    Returns:
+        (antal downloaded, {uuid: (url, reason)} for fejlede)
+    """
+    journal_path = Path(journal_path)
+    if not journal_path.exists():
+        if journal_path.with_name(LEGACY_NAME).exists():
+            return len(read_progress(journal_path)['downloaded']), read_failed(journal_path)
+        return 0, {}
+
+    data = journal_path.read_bytes()
+    failed_lines = 0
+    failed = {}
+    start = data.find(FAILED_MARKER)
+    while start >= 0:
+        line_start = data.rfind(b'\n', 0, start) + 1
+        line_end = data.find(b'\n', start)
+        if line_end < 0:
+            break                     # Halv linje efter et crash
+        failed_lines += 1
+        try:
+            entry = json.loads(data[line_start:line_end])
+            failed[entry['uuid']] = (entry.get('url'), entry.get('reason'))
+        except (json.JSONDecodeError, KeyError):
+            pass
+        start = data.find(FAILED_MARKER, line_end)
+    return data.count(b'\n') - failed_lines, failed
+
+
+def compact(journal_path):
+    """
+    Skriv journalen om til én linje per UUID (atomisk via rename).
+
+    Migrerer samtidig en gammel download_progress.json til journal format.
+    """
+    journal_path = Path(journal_path)
+    legacy_path = journal_path.with_name(LEGACY_NAME)
+
+    if journal_path.exists():
+        downloaded, failed = _replay(journal_path)
+    elif legacy_path.exists():
+        downloaded = read_progress(journal_path)['downloaded']
+        # Fejlede URLs følger med, så --retry-failed stadig finder dem
+        done = set(downloaded)
+        failed = {uuid: entry for uuid, entry in read_failed(journal_path).items() if uuid not in done}
+    else:
+        return
+
+    _write_journal(journal_path, downloaded, failed)
+    # Flere shards kan migrere den gamle fil samtidig
+    legacy_path.unlink(missing_ok=True)
+
+
+def merge_journals(journal_path, shard_paths, position=None):
+    """
+    Saml shard-journaler (fra 1_download.py --shard) ind i hovedjournalen.
+
+    "ok" linjer fra hovedjournalen beholder deres rækkefølge. Nye fra
+    shards tilføjes sorteret efter position(uuid) — fx rækken i HTML'en —
+    så 3_sort.py ser samme rækkefølge som efter én samlet kørsel. Fejl fra
+    shards følger med, medmindre filen er hentet et andet sted. Shard-filerne
+    slettes når den samlede journal er skrevet.
+
+    Returns:
+        (antal nye downloads, antal fejlede i alt)
+    """
+    journal_path = Path(journal_path)
+    if not journal_path.exists() and journal_path.with_name(LEGACY_NAME).exists():
+        compact(journal_path)
+
+    downloaded, failed = _replay(journal_path)
+    seen = set(downloaded)
+    new = []
+    for shard_path in shard_paths:
+        shard_downloaded, shard_failed = _replay(Path(shard_path))
+        for uuid in shard_downloaded:
+            if uuid not in seen:
+                seen.add(uuid)
+                new.append(uuid)
+        failed.update(shard_failed)
+
+    failed = {uuid: entry for uuid, entry in failed.items() if uuid not in seen}
+    if position:
+        new.sort(key=position)
+
+    _write_journal(journal_path, downloaded + new, failed)
+    for shard_path in shard_paths:
+        Path(shard_path).unlink()
+    return len(new), len(failed)
+
+
+def _write_journal(journal_path, downloaded, failed):
+    """Skriv en komprimeret journal atomisk (temp fil + rename)."""
+    # Unikt temp navn: flere shards kan migrere hovedjournalen samtidig
+    fd, tmp_name = tempfile.mkstemp(prefix=journal_path.name + '.', suffix='.tmp', dir=journal_path.parent)
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            for uuid in downloaded:
+                f.write(_line(uuid, 'ok'))
+            for uuid, (url, reason) in failed.items():
+                f.write(_line(uuid, 'failed', url, reason))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, journal_path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+def _replay(journal_path):
+    """
+    Afspil journalen linje for linje.
+
+    Returns:
+        (downloaded, failed): UUIDs i download-rækkefølge, og UUID → (URL,
+        reason) for fejlede downloads der ikke senere er lykkedes.
+    """
+    downloaded = []
+    seen = set()
+    failed = {}
+
+    if not journal_path.exists():
+        return downloaded, failed
+
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Afkortet linje fra et crash midt i en skrivning
+                continue
+
+            uuid = entry.get('uuid')
+            if entry.get('status') == 'ok':
+                failed.pop(uuid, None)
+                if uuid not in seen:
+                    seen.add(uuid)
+                    downloaded.append(uuid)
+            elif entry.get('status') == 'failed' and uuid not in seen:
+                failed.pop(uuid, None)   # Seneste fejl sidst, så køen følger journalen
+                failed[uuid] = (entry.get('url'), entry.get('reason'))
+
+    return downloaded, failed
+
+
+def _line(uuid, status, url=None, reason=None):
+    entry = {'uuid': uuid, 'status': status}
+    if url:
+        entry['url'] = url
+    if reason:
+        entry['reason'] = reason
+    return json.dumps(entry, ensure_ascii=False) + '\n'
+
+
+class ProgressJournal:
+    """
+    Skriver progress linjer til journalen med batchet fsync.
+
+    Brug:
+        with ProgressJournal(path) as journal:
+            journal.record_downloaded(uuid)
+            journal.record_failed(uuid, url, reason)
+    """
+
+    def __init__(self, path, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        """
+        Åbn journalen for append (migrerer en gammel JSON fil først).
+
+        Kun hovedjournalen migrerer — en shard journal må ikke tage den gamle
+        fil fra de andre shards (1_download.py migrerer den før shards starter).
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if (self.path.name == JOURNAL_NAME and not self.path.exists()
+                and self.path.with_name(LEGACY_NAME).exists()):
+            compact(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+        # Afslut en evt. afkortet sidste linje, så nye linjer ikke klistres på den
+        if self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def record_downloaded(self, uuid):
+        self._write(_line(uuid, 'ok'))
+
+    def record_failed(self, uuid, url, reason=None):
+        self._write(_line(uuid, 'failed', url, reason))
+
+    def _write(self, line):
+        self._file.write(line)
+        self._file.flush()
+        self._unsynced += 1
+
+        if (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """Tving skrevne linjer ned på disken."""
+        if self._file and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,145 @@
+"""
+Udskudte retries af fejlede downloads med eksponentiel backoff og jitter.
+
+I stedet for at en worker sover på en fejlet fil (og blokerer sin plads
+imens), lægges filen i en kø med et tidspunkt for næste forsøg. Hovedløkken
+fortsætter med nye filer og sender filen af sted igen når tiden er gået:
+
+    forsøg 2 efter ~5s, forsøg 3 efter ~10s, forsøg 4 efter ~20s, ...
+
+Ventetiden er halvt fast og halvt tilfældig (jitter), så mange filer der
+fejler samtidig (fx ved en 503 bølge) ikke rammer serveren i samme sekund
+igen. Et Retry-After header fra serveren respekteres som minimum.
+
+Fejl klassificeres, så kun fejl der kan gå over forsøges igen:
+
+    transient  forbindelsesfejl, timeouts, afbrudte svar, 429/5xx
+    expired    403/404/410 o.l. — linket er udløbet, kræver en ny eksport
+    corrupt    filen blev hentet, men bestod ikke verificeringen
+"""
+
+import heapq
+import random
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+
+TRANSIENT = 'transient'
+EXPIRED = 'expired'
+CORRUPT = 'corrupt'
+
+MAX_ATTEMPTS = 4         # Forsøg i alt per fil (første + udskudte retries)
+BASE_DELAY = 5.0         # Ventetid før første retry (fordobles per forsøg)
+MAX_DELAY = 120.0        # Loft over ventetiden
+TRANSIENT_STATUSES = {408, 425, 429}   # 4xx der går over af sig selv (5xx gør altid)
+
+# reason: TRANSIENT/EXPIRED/CORRUPT, detail: fejlbesked, retry_after: sekunder eller None
+Failure = namedtuple('Failure', ['reason', 'detail', 'retry_after'])
+
+
+def classify(error):
+    """
+    Failure for en exception fra et download.
+
+    4xx svar (undtagen TRANSIENT_STATUSES) betyder at selve linket ikke
+    virker længere; alt andet kan gå over.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None and 400 <= status < 500 and status not in TRANSIENT_STATUSES:
+        return Failure(EXPIRED, f"HTTP {status}", None)
+    return Failure(TRANSIENT, str(error), retry_after_seconds(response))
+
+
+def retry_after_seconds(response):
+    """Retry-After headeren i sekunder (tal eller HTTP dato), eller None."""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY, rng=random):
+    """Ventetid før forsøg attempt + 1: halvdelen fast, halvdelen tilfældig."""
+    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+    return delay / 2 + rng.uniform(0, delay / 2)
+
+
+class RetryQueue:
+    """
+    Min-heap af filer der venter på næste forsøg, sorteret efter tidspunkt.
+
+    Bruges kun fra hovedtråden. Nøglen kan være hvad som helst hashbart
+    (fx filens position i kørslen).
+
+    Brug:
+        delay = retries.defer(key, failure)   # None = giv op
+        for key in retries.ready(): ...       # nøgler hvis tid er kommet
+        retries.next_delay()                  # sekunder til næste, eller None
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 clock=time.monotonic, rng=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.deferred = 0
+        self._attempts = {}
+        self._heap = []
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def attempt(self, key):
+        """Nummeret på det næste (eller igangværende) forsøg for nøglen."""
+        return self._attempts.get(key, 1)
+
+    def defer(self, key, failure):
+        """
+        Planlæg et nyt forsøg efter en fejl.
+
+        Returns:
+            ventetiden i sekunder, eller None hvis filen ikke skal forsøges
+            igen (udløbet link eller ingen forsøg tilbage)
+        """
+        attempt = self._attempts.pop(key, 1)
+        if failure.reason == EXPIRED or attempt >= self.max_attempts:
+            return None
+
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay, self.rng)
+        if failure.retry_after is not None:
+            delay = max(delay, min(failure.retry_after, self.max_delay))
+
+        self._attempts[key] = attempt + 1
+        self._sequence += 1
+        heapq.heappush(self._heap, (self.clock() + delay, self._sequence, key))
+        self.deferred += 1
+        return delay
+
+    def ready(self):
+        """Fjern og returnér nøglerne hvis tidspunkt er nået, ældste først."""
+        now = self.clock()
+        keys = []
+        while self._heap and self._heap[0][0] <= now:
+            keys.append(heapq.heappop(self._heap)[2])
+        return keys
+
+    def next_delay(self):
+        """Sekunder til næste nøgle er klar (0 hvis nu), eller None hvis køen er tom."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
+    def done(self, key):
+        """Glem forsøgstælleren for en nøgle der er lykkedes."""
+        self._attempts.pop(key, None)
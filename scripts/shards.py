@@ -0,0 +1,77 @@
+"""
+Fordeling af én download over flere processer eller maskiner (--shard i/N).
+
+Hver memory hører til præcis én shard, bestemt af et hash af UUID'en — så
+N maskiner der kører `1_download.py --shard 1/N` ... `--shard N/N` mod samme
+data/raw/ (fx på et NFS drev) aldrig henter den samme fil, uden at de skal
+tale sammen. Det er et stabilt hash (CRC32), ikke Python's hash(), så alle
+maskiner når frem til den samme fordeling.
+
+Filer der skrives løbende (journal, content indeks, UUID indekser) får et
+shard-suffiks, fx download_progress.shard-2-of-4.jsonl, så ingen to shards
+skriver i samme fil. `1_download.py --merge-shards` samler dem bagefter til
+de almindelige filer, som 3_sort.py bruger.
+"""
+
+import argparse
+import re
+import zlib
+
+SHARD_PATTERN = re.compile(r'^(\d+)/(\d+)$')
+
+
+def parse_shard(text):
+    """'2/4' → (2, 4). Bruges som argparse type."""
+    match = SHARD_PATTERN.match(text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"forventede i/N (fx 1/4), fik '{text}'")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard skal være mellem 1/{count} og {count}/{count}")
+    return index, count
+
+
+def shard_of(name, count):
+    """Shard nummer (1..count) for en UUID eller et filnavn."""
+    return zlib.crc32(name.upper().encode()) % count + 1
+
+
+def in_shard(name, shard):
+    """True hvis memory'en hører til shard (i, N). shard=None betyder alle."""
+    return shard is None or shard_of(name, shard[1]) == shard[0]
+
+
+def shard_path(path, shard):
+    """data/raw/x.jsonl → data/raw/x.shard-2-of-4.jsonl (uændret hvis shard er None)."""
+    if shard is None:
+        return path
+    index, count = shard
+    return path.with_name(f"{path.stem}.shard-{index}-of-{count}{path.suffix}")
+
+
+def find_shard_files(path):
+    """
+    Shard-udgaverne af path der findes på disken.
+
+    Returns:
+        {(i, N): sti}, sorteret efter N og i
+    """
+    pattern = re.compile(rf'^{re.escape(path.stem)}\.shard-(\d+)-of-(\d+){re.escape(path.suffix)}$')
+    found = {}
+    if path.parent.exists():
+        for candidate in path.parent.iterdir():
+            match = pattern.match(candidate.name)
+            if match:
+                found[int(match.group(1)), int(match.group(2))] = candidate
+    return dict(sorted(found.items(), key=lambda item: (item[0][1], item[0][0])))
+
+
+def missing_shards(shards):
+    """'i/N' for de shards der mangler blandt shards ((i, N) par)."""
+    shards = set(shards)
+    return [
+        f"{index}/{count}"
+        for count in sorted({count for _, count in shards})
+        for index in range(1, count + 1)
+        if (index, count) not in shards
+    ]
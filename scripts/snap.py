@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Samlet indgang til alle trin:
+
+    python scripts/snap.py download [--incremental] [--shard 1/4] ...
+    python scripts/snap.py unzip [--workers 4] ...
+    python scripts/snap.py sort [--dry-run] [--undo] ...
+    python scripts/snap.py pipeline [--workers 8] ...
+    python scripts/snap.py status [--json]
+    python scripts/snap.py catalog [--from 2019-06 --to 2019-08 --type video] ...
+
+Hver kommando importeres først når den bliver valgt, så `status` og
+`--help` ikke betaler for requests, PIL eller pymediainfo. Argumenterne
+efter kommandoen sendes uændret videre til trinets egen parser — se fx
+`python scripts/snap.py sort --help`.
+
+1_download.py, 2_unzip.py og 3_sort.py virker stadig som før.
+"""
+
+import importlib
+import sys
+
+# kommando → (modul, beskrivelse)
+COMMANDS = {
+    'download': ('download', "Hent memories fra Snapchat's CDN (trin 1)"),
+    'unzip': ('unzip', "Udpak ZIP filer med overlays (trin 2)"),
+    'sort': ('sort', "Sortér og omdøb til data/sorted (trin 3)"),
+    'pipeline': ('pipeline', "Alle tre trin på én gang som overlappende stages"),
+    'status': ('status', "Vis hvor langt eksporten er nået (hurtig)"),
+    'catalog': ('catalog', "Søg i de sorterede memories (dato, type, UUID)"),
+}
+
+
+def print_usage(stream=sys.stdout):
+    print("Brug: python scripts/snap.py <kommando> [argumenter]\n", file=stream)
+    print("Kommandoer:", file=stream)
+    for command, (_, description) in COMMANDS.items():
+        print(f"  {command:<10} {description}", file=stream)
+    print("\nSe `python scripts/snap.py <kommando> --help` for kommandoens argumenter.", file=stream)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ('-h', '--help'):
+        print_usage()
+        return
+
+    command, rest = sys.argv[1], sys.argv[2:]
+    if command not in COMMANDS:
+        print(f"❌ Ukendt kommando: {command}\n", file=sys.stderr)
+        print_usage(sys.stderr)
+        sys.exit(2)
+
+    module = importlib.import_module(COMMANDS[command][0])
+    # Trinets parser ser kun sine egne argumenter; prog bliver "snap.py sort" o.l.
+    sys.argv = [f"{sys.argv[0]} {command}", *rest]
+    module.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""
+Trin 3: Sortér og omdøb Snapchat memories til dansk datoformat.
+
+1. Bruger download_progress.jsonl (korrekt rækkefølge) + HTML (timestamps)
+2. Skipper duplikater (kun første forekomst af hver UUID)
+3. Omdøber filer til dansk datoformat: "11-01-2026 (21.13).jpg"
+4. Sorterer i mapper: YYYY/MM-måned/
+5. --embed-dates: skriver tidspunktet ind i EXIF / MP4 headers og sætter mtime
+6. Registrerer indholdet i content indekset (--dedupe: identiske filer → hardlinks)
+7. Skriver hver placering i data/sort_ledger.jsonl, så en senere eksport kan
+   sorteres ind i det eksisterende træ uden navnekollisioner
+8. Opdaterer kataloget data/catalog.sqlite (søg med `snap.py catalog`)
+
+Alle flytninger beregnes først som en plan (data/sort_plan.jsonl). Planen
+udføres med en undo log (data/sort_undo.jsonl): en afbrudt sortering
+fortsætter ved næste kørsel, og --undo flytter alt tilbage.
+
+Brug:
+    python scripts/3_sort.py
+    python scripts/3_sort.py --dedupe
+    python scripts/3_sort.py --embed-dates           # dato i EXIF/MP4 + mtime
+    python scripts/3_sort.py --dry-run              # gem planen, flyt intet
+    python scripts/3_sort.py --plan data/sort_plan.jsonl
+    python scripts/3_sort.py --undo
+    python scripts/3_sort.py --metrics --profile plan,index
+
+Input:  data/raw/*  +  input/memories_history.html
+Output: data/sorted/YYYY/MM-måned/DD-MM-YYYY (HH.MM).ext
+"""
+
+import os
+import time
+import argparse
+from pathlib import Path
+from functools import lru_cache
+from array import array
+from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from catalog import CATALOG_NAME, Catalog, rebuild
+from content_index import ContentIndex, replace_with_hardlink
+from manifest_cache import load_index
+from media_timestamps import embed_timestamp
+from progress_journal import JOURNAL_NAME, LEGACY_NAME, iter_downloaded
+from sort_ledger import LEDGER_NAME, SortLedger, already_sorted, compact_ledger
+from shards import find_shard_files
+from sort_plan import Move, PlanError, SortPlan
+from uuid_index import NO_TIMESTAMP, from_epoch
+
+# ─── Konfiguration ───────────────────────────────────────────────────────────
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HTML_FILE = PROJECT_ROOT / "input" / "memories_history.html"
+JOURNAL_FILE = PROJECT_ROOT / "data" / "raw" / JOURNAL_NAME
+SOURCE_FOLDER = PROJECT_ROOT / "data" / "raw"
+OUTPUT_FOLDER = PROJECT_ROOT / "data" / "sorted"
+MANIFEST_CACHE = PROJECT_ROOT / "data" / "cache" / "memories_manifest.tsv"
+CONTENT_INDEX = PROJECT_ROOT / "data" / "content_index.sqlite"
+CATALOG_FILE = PROJECT_ROOT / "data" / CATALOG_NAME
+SORT_LEDGER = PROJECT_ROOT / "data" / LEDGER_NAME
+SORT_PLAN = PROJECT_ROOT / "data" / "sort_plan.jsonl"
+SORT_UNDO = PROJECT_ROOT / "data" / "sort_undo.jsonl"
+METRICS_DIR = PROJECT_ROOT / "data" / "metrics"
+
+EMBED_WORKERS = 8        # Tråde der skriver tidspunkter ind i filerne
+
+# Danske månedsnavne
+MONTHS_DA = {
+    1: "januar", 2: "februar", 3: "marts", 4: "april",
+    5: "maj", 6: "juni", 7: "juli", 8: "august",
+    9: "september", 10: "oktober", 11: "november", 12: "december",
+}
+
+
+# ─── Hjælpefunktioner ────────────────────────────────────────────────────────
+
+class ManifestTimestamps:
+    """
+    UUID → datetime opslag i manifest-indekset (kun første forekomst, kun med dato).
+
+    Opfører sig som en read-only dict, men holder ikke en datetime per
+    memory i hukommelsen — timestamps ligger som epoch-sekunder på disk
+    og laves først til datetime når de slås op.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._dated = None
+
+    def close(self):
+        self.index.close()
+
+    def epoch(self, uuid):
+        """Epoch-sekunder for UUID'en, eller NO_TIMESTAMP — ét opslag i indekset."""
+        entry = self.index.get(uuid)
+        return NO_TIMESTAMP if entry is None else entry[1]
+
+    def __contains__(self, uuid):
+        return self.epoch(uuid) != NO_TIMESTAMP
+
+    def __getitem__(self, uuid):
+        seconds = self.epoch(uuid)
+        if seconds == NO_TIMESTAMP:
+            raise KeyError(uuid)
+        return from_epoch(seconds)
+
+    def __len__(self):
+        if self._dated is None:
+            self._dated = sum(1 for _, _, seconds in self.index.items() if seconds != NO_TIMESTAMP)
+        return self._dated
+
+
+def parse_html_for_timestamps(html_path, cache_path=MANIFEST_CACHE):
+    """
+    Parser HTML og udtrækker UUID → timestamp mapping.
+    Kun FØRSTE forekomst af hver UUID tages (skipper duplikater).
+
+    Returns:
+        ManifestTimestamps: {uuid: datetime} opslag (kun første forekomst)
+    """
+    index = load_index(html_path, cache_path)
+    print(f"   🔍 Skippede {index.offered - len(index)} duplikater i HTML")
+    return ManifestTimestamps(index)
+
+
+def load_json_order(journal_path):
+    """
+    Generator over UUIDs fra download journalen i korrekt rækkefølge.
+
+    Falder tilbage til den gamle download_progress.json hvis journalen ikke findes.
+    Returnerer None hvis ingen af dem findes.
+    """
+    if not journal_path.exists() and not journal_path.with_name(LEGACY_NAME).exists():
+        return None
+
+    return iter_downloaded(journal_path)
+
+
+def format_danish_filename(dt, extension):
+    """
+    Formaterer datetime til dansk filnavn format.
+
+    Format: "11-01-2026 (21.13).jpg"
+    Note: Bruger "." i stedet for ":" da macOS Finder viser ":" som "/"
+    """
+    return f"{dt.day:02d}-{dt.month:02d}-{dt.year} ({dt.hour:02d}.{dt.minute:02d}){extension}"
+
+
+def get_month_folder_name(dt):
+    """Returnerer mappenavn for måneden: '01-januar'"""
+    return f"{dt.month:02d}-{MONTHS_DA[dt.month]}"
+
+
+class NameReservations:
+    """
+    Holder styr på optagne filnavne i hver output mappe.
+
+    Hver mappe listes kun én gang; derefter slås navne op i hukommelsen i
+    stedet for et exists() kald per fil. Mapper og resultater er relative
+    stier (str) til root.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._taken = {}
+
+    def _names(self, folder):
+        if folder not in self._taken:
+            try:
+                self._taken[folder] = set(os.listdir(os.path.join(self.root, folder)))
+            except FileNotFoundError:
+                self._taken[folder] = set()
+        return self._taken[folder]
+
+    def reserve(self, folder, base_name, extension, number=None):
+        """
+        Første ledige filnavn i folder — reserveres med det samme.
+
+        number er None for et unummereret navn. Er navnet optaget (fx fra en
+        tidligere sortering), tælles nummeret op indtil navnet er ledigt.
+        """
+        names = self._names(folder)
+        if number is None:
+            name = f"{base_name}{extension}"
+            number = 2
+        else:
+            name = f"{base_name} {number}{extension}"
+
+        while name in names:
+            name = f"{base_name} {number}{extension}"
+            number += 1
+
+        names.add(name)
+        return f"{folder}/{name}"
+
+    def release(self, path):
+        """Frigiv et reserveret navn (relativ sti fra reserve()) igen."""
+        folder, name = path.rsplit('/', 1)
+        self._names(folder).discard(name)
+
+
+def collapse_duplicate(index, uuid, path, dedupe):
+    """
+    Indeksér en sorteret fil og erstat den evt. med et hardlink til en
+    byte-identisk fil der allerede er sorteret.
+
+    Returns:
+        antal bytes frigjort (0 hvis intet blev kollapset)
+    """
+    duplicate = index.add(uuid, path)
+    if not duplicate or not dedupe or os.path.samefile(duplicate, path):
+        return 0
+
+    size = path.stat().st_size
+    return size if replace_with_hardlink(path, duplicate) else 0
+
+
+def scan_source_files(folder=SOURCE_FOLDER):
+    """
+    Alle mediefiler i source (ekskl. JSON), i ét directory-gennemløb.
+
+    Returns:
+        {uuid: filnavn}
+    """
+    source_files = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.') or '.' not in name or name.endswith(('.json', '.jsonl')):
+                continue
+            if entry.is_file():
+                source_files[name.rsplit('.', 1)[0].upper()] = name
+    return source_files
+
+
+def number_minutes(uuids, minute_keys, placed_keys=()):
+    """
+    Nummerér memories der deler minut: 1, 2, 3, ... i den givne rækkefølge.
+
+    minute_keys er én minut-nøgle per uuid. Memories der allerede er
+    sorteret ved en tidligere kørsel (placed_keys) tæller med først, så nye
+    filer på samme minut fortsætter rækken.
+
+    Returns:
+        {uuid: nummer} kun for memories der deler minut — brug
+        numbers.get(uuid), som giver None for memories alene på deres minut
+    """
+    minute_counts = defaultdict(int)
+    minute_index = defaultdict(int)
+
+    for minute_key in placed_keys:
+        minute_counts[minute_key] += 1
+        minute_index[minute_key] += 1
+
+    # Minutterne som int64 i et array i stedet for en tuple per memory
+    keys = array('q', minute_keys)
+    for minute_key in keys:
+        minute_counts[minute_key] += 1
+
+    numbers = {}
+    for uuid, minute_key in zip(uuids, keys):
+        if minute_counts[minute_key] > 1:
+            minute_index[minute_key] += 1
+            numbers[uuid] = minute_index[minute_key]
+    return numbers
+
+
+@lru_cache(maxsize=None)
+def month_folder(year, month):
+    """Relativ sti til månedsmappen: '2024/01-januar'"""
+    return f"{year}/{month:02d}-{MONTHS_DA[month]}"
+
+
+def sorted_name(reservations, dt, extension, number):
+    """Reservér 'YYYY/MM-måned/DD-MM-YYYY (HH.MM)[ n].ext' (relativ til output)."""
+    folder = month_folder(dt.year, dt.month)
+    return reservations.reserve(folder, format_danish_filename(dt, ""), extension, number)
+
+
+def build_plan(uuid_to_timestamp, json_order):
+    """
+    Beregn hele flytteplanen uden at røre nogen filer.
+
+    uuid_to_timestamp er en ManifestTimestamps (parse_html_for_timestamps).
+
+    Returns:
+        SortPlan med daterede filer først (i JSON rækkefølge), derefter
+        filer uden timestamp-match
+    """
+    all_source_files = scan_source_files()
+    print(f"📁 Fandt {len(all_source_files)} filer i source mappe\n")
+
+    # Bestem rækkefølge
+    if json_order:
+        # dict.fromkeys: en ukomprimeret journal kan nævne samme UUID flere gange
+        uuids_to_process = list(dict.fromkeys(
+            key for key in (uuid.upper() for uuid in json_order) if key in all_source_files
+        ))
+    else:
+        uuids_to_process = list(all_source_files.keys())
+
+    placed = already_sorted(SORT_LEDGER, OUTPUT_FOLDER)
+    if placed:
+        print(f"♻️  {len(placed)} memories er allerede sorteret (fra {SORT_LEDGER.name})\n")
+
+    # Første pass: ét opslag per fil, timestamps gemmes som int64 ved siden af
+    dated = []
+    epochs = array('q')
+    for uuid in uuids_to_process:
+        seconds = uuid_to_timestamp.epoch(uuid)
+        if seconds != NO_TIMESTAMP:
+            dated.append(uuid)
+            epochs.append(seconds)
+
+    # Nummerering af filer på samme minut
+    placed_epochs = (uuid_to_timestamp.epoch(uuid) for uuid in placed if uuid not in all_source_files)
+    numbers = number_minutes(
+        dated,
+        (seconds // 60 for seconds in epochs),
+        (seconds // 60 for seconds in placed_epochs if seconds != NO_TIMESTAMP),
+    )
+
+    # Andet pass: destination for hver fil
+    reservations = NameReservations(OUTPUT_FOLDER)
+    moves = []
+
+    for uuid, seconds in zip(dated, epochs):
+        filename = all_source_files[uuid]
+        extension = '.' + filename.rsplit('.', 1)[1].lower()
+        output_path = sorted_name(reservations, from_epoch(seconds), extension, numbers.get(uuid))
+        moves.append(Move(uuid, filename, output_path, True))
+
+    # Filer uden timestamp-match
+    for uuid, filename in all_source_files.items():
+        if uuid not in uuid_to_timestamp:
+            stem, extension = filename.rsplit('.', 1)
+            output_path = reservations.reserve("(ingen dato)", stem, '.' + extension)
+            moves.append(Move(uuid, filename, output_path, False))
+
+    return SortPlan(SOURCE_FOLDER, OUTPUT_FOLDER, moves)
+
+
+def embed_dates(plan, uuid_to_timestamp, recorder, catalog, workers=EMBED_WORKERS):
+    """
+    Skriv HTML tidspunktet ind i hver dateret fil (EXIF / MP4 headers + mtime).
+
+    Køres efter placeringerne er skrevet i ledgeren, men før filerne
+    indekseres, så content indekset hasher det endelige indhold. Filer der
+    fik ny EXIF, registreres igen i kataloget med den nye størrelse.
+
+    Returns:
+        Counter med 'patched', 'inserted', 'mtime' og 'skipped'
+    """
+    def embed(move):
+        destination = plan.destination_path(move)
+        with recorder.time('embed', move.uuid) as measurement:
+            result = embed_timestamp(destination, uuid_to_timestamp[move.uuid])
+            measurement['result'] = result
+        if result == 'inserted':
+            catalog.record(move.uuid, destination, epoch_or_none(uuid_to_timestamp, move.uuid))
+        return result
+
+    moves = [move for move in plan.dated if move.uuid in uuid_to_timestamp]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return Counter(pool.map(embed, moves))
+
+
+def epoch_or_none(uuid_to_timestamp, uuid):
+    """Epoch-sekunder til kataloget, eller None (ingen dato / intet manifest)."""
+    seconds = uuid_to_timestamp.epoch(uuid) if uuid_to_timestamp else NO_TIMESTAMP
+    return None if seconds == NO_TIMESTAMP else seconds
+
+
+def open_catalog(uuid_to_timestamp):
+    """
+    Åbn kataloget. Er det nyt men ledgeren har placeringer fra tidligere
+    sorteringer, bygges det først fra ledgeren, så det dækker hele træet.
+    """
+    catalog = Catalog(CATALOG_FILE, OUTPUT_FOLDER)
+    if catalog.created and SORT_LEDGER.exists():
+        count = rebuild(catalog, SORT_LEDGER, lambda uuid: epoch_or_none(uuid_to_timestamp, uuid))
+        print(f"   🗃️  Katalog oprettet med {count} tidligere sorterede memories")
+    return catalog
+
+
+def placement_recorder(ledger, catalog, index, uuid_to_timestamp):
+    """
+    Callback til SortPlan.apply: skriv en placering i ledger, katalog og
+    content indeks lige efter flytningen, så et crash midt i sorteringen
+    ikke efterlader flyttede filer som ingen af dem kender.
+    """
+    def record(move, destination):
+        destination = Path(destination)
+        ledger.record(move.uuid, destination)
+        catalog.record(move.uuid, destination, epoch_or_none(uuid_to_timestamp, move.uuid))
+        index.move(move.uuid, destination)
+    return record
+
+
+def index_contents(plan, index, dedupe, recorder):
+    """
+    Hash de daterede filer ind i content indekset (efter evt. --embed-dates,
+    så det er det endelige indhold der hashes).
+
+    Returns:
+        (antal hardlinkede filer, frigjorte bytes)
+    """
+    linked = 0
+    reclaimed_bytes = 0
+    for move in plan.dated:
+        destination = plan.destination_path(move)
+        if not destination.exists():
+            continue
+        with recorder.time('index', move.uuid):
+            freed = collapse_duplicate(index, move.uuid, destination, dedupe)
+        if freed:
+            linked += 1
+            reclaimed_bytes += freed
+    return linked, reclaimed_bytes
+
+
+def undo_last_sort():
+    """Flyt filerne fra sidste (evt. afbrudte) sortering tilbage til source."""
+    if not SORT_UNDO.exists():
+        print(f"ℹ️  Ingen undo log fundet ({SORT_UNDO.name}) — intet at rulle tilbage")
+        return
+
+    print("↩️  Ruller sidste sortering tilbage...")
+    restored = SortPlan.undo(SORT_UNDO)
+
+    index = ContentIndex(CONTENT_INDEX)
+    with SortLedger(SORT_LEDGER, OUTPUT_FOLDER) as ledger, Catalog(CATALOG_FILE, OUTPUT_FOLDER) as catalog:
+        for move in restored:
+            ledger.forget(move.uuid)
+            catalog.forget(move.uuid)
+            index.move(move.uuid, move.source)
+    index.close()
+    compact_ledger(SORT_LEDGER)
+
+    print(f"✅ {len(restored)} filer flyttet tilbage til {SOURCE_FOLDER}")
+
+
+def print_plan_preview(plan, plan_path):
+    """Vis hvad en --dry-run plan vil gøre."""
+    print(f"📝 Plan gemt: {plan_path}")
+    print(f"   {len(plan.dated)} filer med dato, {len(plan.undated)} uden")
+    for move in plan.moves[:10]:
+        print(f"   {move.source} → {move.destination}")
+    if len(plan) > 10:
+        print(f"   ... og {len(plan) - 10} flere")
+    print(f"\n   Udfør den med: python scripts/3_sort.py --plan {plan_path}")
+
+
+# ─── Hovedfunktion ────────────────────────────────────────────────────────────
+
+def parse_args():
+    """Læs kommandolinje-argumenter."""
+    parser = argparse.ArgumentParser(description="Sortér og omdøb Snapchat memories.")
+    parser.add_argument(
+        '--dedupe', action='store_true',
+        help="erstat byte-identiske filer med hardlinks til den første kopi",
+    )
+    parser.add_argument(
+        '--embed-dates', action='store_true',
+        help="skriv tidspunktet ind i EXIF (JPEG) og mvhd/tkhd (MP4) og sæt filernes mtime",
+    )
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help=f"beregn flytteplanen og gem den i {SORT_PLAN.name} uden at flytte noget",
+    )
+    parser.add_argument(
+        '--plan', type=Path, metavar='FIL',
+        help="udfør en plan gemt med --dry-run",
+    )
+    parser.add_argument(
+        '--undo', action='store_true',
+        help="flyt filerne fra sidste sortering tilbage til data/raw",
+    )
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Sortér og omdøb minder."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("📂 SNAPCHAT MEMORIES SORTERING")
+    print("=" * 60)
+    print()
+
+    if args.undo:
+        undo_last_sort()
+        return
+
+    if not SOURCE_FOLDER.exists():
+        print(f"❌ Source mappe ikke fundet: {SOURCE_FOLDER}")
+        print(f"   Kør først: python scripts/1_download.py")
+        return
+
+    recorder = metrics.from_args(args, METRICS_DIR, '3_sort')
+    plan = None
+    uuid_to_timestamp = None
+    plan_seconds = 0.0
+
+    try:
+        if args.plan:
+            try:
+                plan = SortPlan.load(args.plan)
+            except (OSError, PlanError) as e:
+                print(f"❌ Kan ikke læse planen {args.plan}: {e}")
+                return
+            print(f"📝 Bruger plan: {args.plan} ({len(plan)} flytninger)\n")
+        elif SORT_PLAN.exists() and not args.dry_run:
+            try:
+                previous = SortPlan.load(SORT_PLAN)
+            except PlanError as e:
+                print(f"❌ Kan ikke læse {SORT_PLAN.name}: {e}")
+                print(f"   Slet filen for at beregne en ny plan, eller rul tilbage med --undo.")
+                return
+            if previous.interrupted(SORT_UNDO):
+                plan = previous
+                print(f"♻️  Genoptager afbrudt sortering fra {SORT_PLAN.name}\n")
+
+        if plan is None:
+            # Valider at input filer findes
+            if not HTML_FILE.exists():
+                print(f"❌ HTML fil ikke fundet: {HTML_FILE}")
+                print(f"   Placér din memories_history.html i input/-mappen.")
+                return
+
+            # Parse HTML timestamps
+            print("📖 Parser HTML fil...")
+            uuid_to_timestamp = parse_html_for_timestamps(HTML_FILE)
+            print(f"   Fandt {len(uuid_to_timestamp)} unikke timestamps i HTML\n")
+
+            # Læs JSON rækkefølge
+            print("📄 Læser JSON rækkefølge...")
+            json_order = load_json_order(JOURNAL_FILE)
+            unmerged = find_shard_files(JOURNAL_FILE)
+            if unmerged:
+                print(f"   ⚠️  {len(unmerged)} shard journaler er ikke samlet endnu — deres filer bliver "
+                      f"liggende i data/raw/. Kør først: python scripts/1_download.py --merge-shards")
+            if json_order:
+                print(f"   Bruger JSON rækkefølge ({JOURNAL_FILE.name})\n")
+            else:
+                print("   ⚠️  Ingen JSON fil fundet — bruger filsystem rækkefølge\n")
+
+            plan_start = time.perf_counter()
+            with recorder.time('plan') as measurement:
+                plan = build_plan(uuid_to_timestamp, json_order)
+                measurement['moves'] = len(plan)
+            plan_seconds = time.perf_counter() - plan_start
+            plan.save(SORT_PLAN)
+
+        if args.dry_run:
+            print_plan_preview(plan, SORT_PLAN)
+            print(f"\n🧠 Peak hukommelse: {metrics.peak_rss_mb() or 0:.0f} MB")
+            metrics.report(recorder)
+            return
+
+        if not plan.moves:
+            # Undo loggen fra sidste sortering skal stadig kunne rulles tilbage
+            print("✅ Intet at sortere — ingen nye filer i data/raw")
+            return
+
+        # Opret output mappe
+        OUTPUT_FOLDER.mkdir(parents=True, exist_ok=True)
+
+        if uuid_to_timestamp is None and HTML_FILE.exists():
+            # Genoptaget eller gemt plan: tidspunkterne står ikke i planen
+            uuid_to_timestamp = parse_html_for_timestamps(HTML_FILE)
+
+        print("🚀 Starter sortering...\n")
+        index = ContentIndex(CONTENT_INDEX)
+        catalog = open_catalog(uuid_to_timestamp)
+        try:
+            with SortLedger(SORT_LEDGER, OUTPUT_FOLDER) as ledger, catalog:
+                move_start = time.perf_counter()
+                try:
+                    already_done = plan.apply(
+                        SORT_UNDO, recorder=recorder,
+                        on_moved=placement_recorder(ledger, catalog, index, uuid_to_timestamp),
+                    )
+                except PlanError as e:
+                    print(f"❌ {e}")
+                    print("   Intet er flyttet. Kør uden --plan for at beregne en ny plan.")
+                    return
+                except (OSError, KeyboardInterrupt):
+                    print("\n⚠️  Sortering afbrudt — kør igen for at fortsætte, eller --undo for at rulle tilbage")
+                    raise
+                move_seconds = time.perf_counter() - move_start
+                if already_done:
+                    print(f"   ♻️  {already_done} flytninger var allerede gennemført")
+
+                embedded = Counter()
+                embed_seconds = 0.0
+                if args.embed_dates:
+                    print("🕒 Skriver tidspunkter ind i filerne...")
+                    embed_start = time.perf_counter()
+                    embedded = embed_dates(plan, uuid_to_timestamp or {}, recorder, catalog)
+                    embed_seconds = time.perf_counter() - embed_start
+
+            linked, reclaimed_bytes = index_contents(plan, index, args.dedupe, recorder)
+        finally:
+            index.close()
+    finally:
+        # Manifest-indekset er mmap'et — luk det også ved tidlige returns og fejl
+        if uuid_to_timestamp is not None:
+            uuid_to_timestamp.close()
+
+    compact_ledger(SORT_LEDGER)
+    unmatched_files = [move.source for move in plan.undated]
+
+    # Opsummering
+    print(f"\n{'=' * 60}")
+    print(f"✨ Sortering færdig!")
+    print(f"📊 Matched og flyttet: {len(plan.dated)} filer")
+    print(f"❌ Uden match: {len(unmatched_files)} filer")
+    print(f"🧬 Identiske filer hardlinket: {linked} ({reclaimed_bytes / 1024 / 1024:.1f} MB frigjort)")
+    if args.embed_dates:
+        print(f"🕒 Tidspunkt i metadata: {embedded['patched']} rettet, {embedded['inserted']} "
+              f"fik ny EXIF, {embedded['mtime']} kun mtime ({embed_seconds:.2f}s)")
+        if embedded['skipped']:
+            print(f"   ⚠️  {embedded['skipped']} filer kunne ikke skrives og blev sprunget over")
+    print(f"⏱️  Plan: {plan_seconds:.2f}s, flytning: {move_seconds:.2f}s")
+    print(f"🧠 Peak hukommelse: {metrics.peak_rss_mb() or 0:.0f} MB")
+    print(f"💾 Output: {OUTPUT_FOLDER}")
+    print(f"↩️  Fortryd med: python scripts/3_sort.py --undo")
+    print(f"{'=' * 60}")
+
+    if unmatched_files[:10]:
+        print(f"\n⚠️  Første 10 unmatched filer:")
+        for f in unmatched_files[:10]:
+            print(f"   - {f}")
+
+    metrics.report(recorder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Ledger over hvor hver UUID er blevet placeret i data/sorted/.
+
+3_sort.py skriver én JSON-linje per flyttet fil:
+
+    {"uuid": "ABC...", "path": "2024/01-januar/15-01-2024 (14.32).jpg"}
+
+En linje med "path": null betyder at placeringen er rullet tilbage.
+
+Stier er relative til data/sorted/. Efter hver sortering skrives ledgeren
+om til én linje per UUID (compact_ledger). Ved en ny eksport bruges ledgeren
+sammen med det faktiske indhold af data/sorted/ til kun at downloade og
+sortere de memories der er kommet til siden sidst.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+LEDGER_NAME = 'sort_ledger.jsonl'
+
+
+def read_ledger(ledger_path):
+    """
+    Returns:
+        {uuid: relativ sti} — seneste placering af hver UUID
+    """
+    placements = {}
+    ledger_path = Path(ledger_path)
+    if not ledger_path.exists():
+        return placements
+
+    with open(ledger_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Afkortet linje fra et crash midt i en skrivning
+                continue
+            if entry['path'] is None:
+                # Flytningen er rullet tilbage (3_sort.py --undo)
+                placements.pop(entry['uuid'].upper(), None)
+            else:
+                placements[entry['uuid'].upper()] = entry['path']
+    return placements
+
+
+def count_placements(ledger_path):
+    """
+    Hurtig optælling til `snap.py status`: antal memories der ligger i
+    data/sorted/ ifølge ledgeren, talt i bytes uden at parse linjerne.
+
+    Hver tilbagerulning (path null) fjerner en tidligere placering. Tallet
+    er præcist når ledgeren er komprimeret (efter hver sortering); efter en
+    afbrudt sortering kan en UUID der er registreret to gange, tælle dobbelt
+    indtil næste kørsel.
+    """
+    ledger_path = Path(ledger_path)
+    if not ledger_path.exists():
+        return 0
+    data = ledger_path.read_bytes()
+    rolled_back = data.count(b'"path": null}')
+    return data.count(b'\n') - 2 * rolled_back
+
+
+def compact_ledger(ledger_path):
+    """
+    Skriv ledgeren om til én linje per placeret UUID (atomisk via rename).
+
+    Tilbagerullede placeringer og ældre linjer for samme UUID (fx fra en
+    genoptaget sortering) forsvinder. Kald kun når ingen skriver til den.
+
+    Returns:
+        antal placeringer
+    """
+    ledger_path = Path(ledger_path)
+    if not ledger_path.exists():
+        return 0
+
+    placements = read_ledger(ledger_path)
+    fd, tmp_name = tempfile.mkstemp(prefix=ledger_path.name + '.', suffix='.tmp', dir=ledger_path.parent)
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            for uuid, path in placements.items():
+                f.write(json.dumps({'uuid': uuid, 'path': path}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, ledger_path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+    return len(placements)
+
+
+def scan_sorted_tree(sorted_root):
+    """Alle filer i data/sorted/ som relative stier (ét directory-gennemløb)."""
+    sorted_root = Path(sorted_root)
+    found = set()
+    for folder, _, filenames in os.walk(sorted_root):
+        relative_folder = Path(folder).relative_to(sorted_root)
+        for filename in filenames:
+            found.add((relative_folder / filename).as_posix())
+    return found
+
+
+def already_sorted(ledger_path, sorted_root):
+    """
+    UUIDs der står i ledgeren OG stadig ligger i data/sorted/.
+
+    Returns:
+        {uuid: relativ sti}
+    """
+    placements = read_ledger(ledger_path)
+    if not placements:
+        return {}
+
+    existing = scan_sorted_tree(sorted_root)
+    return {uuid: path for uuid, path in placements.items() if path in existing}
+
+
+class SortLedger:
+    """
+    Append-only writer til ledgeren.
+
+    Linjebufferet, så hver placering når filen med det samme — også hvis
+    processen bliver slået ihjel midt i en sortering. fsync når den lukkes.
+    """
+
+    def __init__(self, ledger_path, sorted_root):
+        self.path = Path(ledger_path)
+        self.sorted_root = Path(sorted_root)
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+
+    def close(self):
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def record(self, uuid, path):
+        relative = Path(path).relative_to(self.sorted_root).as_posix()
+        self._file.write(json.dumps({'uuid': uuid.upper(), 'path': relative}, ensure_ascii=False) + '\n')
+
+    def forget(self, uuid):
+        """Markér at UUID'en ikke længere ligger i data/sorted/."""
+        self._file.write(json.dumps({'uuid': uuid.upper(), 'path': None}) + '\n')
@@ -0,0 +1,458 @@
+"""
+Flytteplan for 3_sort.py: beregn alt først, flyt bagefter.
+
+En plan er en JSON-lines fil med en header og én linje per flytning:
+
+    {"version": 1, "id": "...", "source": "/.../data/raw", "output": "/.../data/sorted", "count": 2}
+    {"uuid": "ABC...", "from": "abc.jpg", "to": "2024/01-januar/15-01-2024 (14.32).jpg", "dated": true}
+    {"uuid": "DEF...", "from": "def.mp4", "to": "(ingen dato)/def.mp4", "dated": false}
+
+Stierne er relative til source/output, så planen kan læses og diffes.
+
+Når planen udføres, skrives hver gennemført flytning i en undo log
+(data/sort_undo.jsonl) med batched fsync. Stopper en kørsel midtvejs,
+fortsætter næste kørsel fra loggen; undo() flytter filerne tilbage i
+omvendt rækkefølge.
+"""
+
+import filecmp
+import json
+import os
+import shutil
+import time
+import uuid as uuid_module
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import metrics
+
+PLAN_VERSION = 1
+COPY_WORKERS = 8         # Tråde til kopiering når data/sorted ligger på et andet drev
+FSYNC_EVERY = 200        # fsync undo loggen efter så mange flytninger
+
+Move = namedtuple('Move', ['uuid', 'source', 'destination', 'dated'])
+Move.__doc__ = """
+Én flytning. source og destination er relative stier (str, med /) til
+planens source_root og output_root — ikke Path objekter, så en plan med
+100k flytninger kan bygges, gemmes og læses på en brøkdel af et sekund.
+dated er False for filer der havner i '(ingen dato)'.
+"""
+
+
+class PlanError(Exception):
+    """Planen passer ikke til filerne på disken — intet er flyttet."""
+
+
+class SortPlan:
+    """
+    En færdigberegnet liste af flytninger.
+
+    Brug:
+        plan = SortPlan(source_root, output_root, moves)
+        plan.save(path)                  # --dry-run
+        plan = SortPlan.load(path)
+        plan.apply(undo_path)            # transaktionelt, kan genoptages
+        SortPlan.undo(undo_path)         # rul sidste kørsel tilbage
+    """
+
+    def __init__(self, source_root, output_root, moves, plan_id=None):
+        self.source_root = Path(source_root)
+        self.output_root = Path(output_root)
+        self.moves = moves
+        self.id = plan_id or uuid_module.uuid4().hex
+
+    def __len__(self):
+        return len(self.moves)
+
+    @property
+    def dated(self):
+        return [move for move in self.moves if move.dated]
+
+    @property
+    def undated(self):
+        return [move for move in self.moves if not move.dated]
+
+    def source_path(self, move):
+        return self.source_root / move.source
+
+    def destination_path(self, move):
+        return self.output_root / move.destination
+
+    # ─── Serialisering ───────────────────────────────────────────────────────
+
+    def save(self, plan_path):
+        """Skriv planen atomisk (temp fil + rename)."""
+        plan_path = Path(plan_path)
+        plan_path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            'version': PLAN_VERSION,
+            'id': self.id,
+            'source': str(self.source_root),
+            'output': str(self.output_root),
+            'count': len(self.moves),
+        }
+
+        tmp_path = plan_path.with_name(plan_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+            for move in self.moves:
+                f.write(json.dumps({
+                    'uuid': move.uuid,
+                    'from': move.source,
+                    'to': move.destination,
+                    'dated': move.dated,
+                }, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, plan_path)
+
+    @classmethod
+    def load(cls, plan_path):
+        """Læs en gemt plan. Rejser PlanError hvis filen er ugyldig."""
+        try:
+            with open(plan_path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if header.get('version') != PLAN_VERSION:
+                    raise PlanError(f"Ukendt plan version: {header.get('version')}")
+
+                moves = []
+                for line in f:
+                    entry = json.loads(line)
+                    moves.append(Move(entry['uuid'], entry['from'], entry['to'], entry['dated']))
+        except (OSError, ValueError, KeyError) as e:
+            raise PlanError(f"Kunne ikke læse plan {plan_path}: {e}") from e
+
+        if len(moves) != header.get('count'):
+            raise PlanError(f"Planen er ufuldstændig ({len(moves)} af {header.get('count')} linjer)")
+        return cls(header['source'], header['output'], moves, plan_id=header['id'])
+
+    # ─── Udførelse ───────────────────────────────────────────────────────────
+
+    def interrupted(self, undo_path):
+        """True hvis planen er begyndt at blive udført, men ikke blev færdig."""
+        # pipeline.py kan have fortsat loggen efter planen blev færdig — så er
+        # det planens egen afslutning der tæller, ikke loggens sidste linje
+        return _log_belongs_to(undo_path, self.id) and not _log_finished(undo_path, anywhere=True)
+
+    def progress(self, undo_path):
+        """
+        Hvor langt planen er nået, givet en evt. undo log fra en afbrudt kørsel.
+
+        En flytning der ikke står i loggen tæller alligevel som gennemført
+        (recovered) hvis kilden er væk og destinationen findes — crash mellem
+        rename og log — eller hvis en kopi til et andet drev er færdig (samme
+        indhold byte for byte), men kilden ikke nåede at blive slettet. Det
+        gælder kun når loggen hører til netop denne plan — ellers er en
+        optaget destination en konflikt. Ændrer intet på disken; kilden til
+        en færdig kopi slettes først af apply() efter valideringen.
+
+        Returns:
+            (pending, logged, recovered) — lister af Move
+        """
+        if not _log_belongs_to(undo_path, self.id):
+            return list(self.moves), [], []
+
+        logged_paths = {entry['to'] for entry in _read_undo_log(undo_path, self.id)}
+        pending, logged, recovered = [], [], []
+        for move in self.moves:
+            source = str(self.source_path(move))
+            destination = str(self.destination_path(move))
+            if destination in logged_paths:
+                logged.append(move)
+            elif not os.path.exists(destination):
+                pending.append(move)
+            elif not os.path.exists(source):
+                recovered.append(move)
+            elif filecmp.cmp(source, destination, shallow=False):
+                recovered.append(move)
+            else:
+                pending.append(move)
+        return pending, logged, recovered
+
+    def validate(self, moves):
+        """
+        Tjek hele planen før noget flyttes.
+
+        Raises:
+            PlanError med de første problemer, hvis en kilde mangler, en
+            destination allerede er optaget eller to flytninger har samme
+            destination
+        """
+        problems = []
+        destinations = set()
+        source_root = str(self.source_root)
+        output_root = str(self.output_root)
+
+        for move in moves:
+            source = os.path.join(source_root, move.source)
+            destination = os.path.join(output_root, move.destination)
+            if not os.path.exists(source):
+                problems.append(f"kilde mangler: {source}")
+            elif os.path.exists(destination):
+                problems.append(f"destination findes allerede: {destination}")
+            if move.destination in destinations:
+                problems.append(f"destination bruges to gange: {destination}")
+            destinations.add(move.destination)
+            if len(problems) >= 10:
+                break
+
+        if problems:
+            raise PlanError("Planen kan ikke udføres:\n   - " + "\n   - ".join(problems))
+
+    def apply(self, undo_path, workers=COPY_WORKERS, recorder=None, on_moved=None):
+        """
+        Udfør planen. Allerede gennemførte flytninger (fra undo loggen) springes over.
+
+        Ligger kilde og destination på samme filsystem, bruges os.rename.
+        Ellers kopieres filerne parallelt via en temp fil og kilden slettes
+        bagefter. Alle mapper oprettes én gang før første flytning. Med en
+        recorder (metrics.Recorder) måles hver flytning som 'move'.
+
+        on_moved(move, destination) kaldes lige efter hver flytning er skrevet
+        i undo loggen (fx til sort ledgeren). Ved genoptagelse kaldes den også
+        for flytninger fra den afbrudte kørsel, så en placering der aldrig nåede
+        videre end undo loggen, bliver registreret nu.
+
+        Returns:
+            antal flytninger der var gennemført i forvejen
+        """
+        recorder = recorder or metrics.Recorder()
+        pending, logged, recovered = self.progress(undo_path)
+        self.validate(pending)
+
+        for move in recovered:
+            # Kopien til et andet drev er færdig — kun sletningen af kilden manglede
+            source = self.source_path(move)
+            if source.exists():
+                source.unlink()
+
+        source_root = str(self.source_root)
+        output_root = str(self.output_root)
+
+        folders = {os.path.dirname(move.destination) for move in pending}
+        folder_devices = {}
+        for folder in folders:
+            folder_path = os.path.join(output_root, folder)
+            os.makedirs(folder_path, exist_ok=True)
+            folder_devices[folder] = os.stat(folder_path).st_dev
+
+        source_devices = {}
+        same_device = []
+        cross_device = []
+
+        for move in pending:
+            source = os.path.join(source_root, move.source)
+            destination = os.path.join(output_root, move.destination)
+            source_folder = os.path.dirname(source)
+            if source_folder not in source_devices:
+                source_devices[source_folder] = os.stat(source_folder).st_dev
+            if source_devices[source_folder] == folder_devices[os.path.dirname(move.destination)]:
+                same_device.append((move, source, destination))
+            else:
+                cross_device.append((move, source, destination))
+
+        on_moved = on_moved or (lambda move, destination: None)
+        for move in logged:
+            destination = str(self.destination_path(move))
+            if os.path.exists(destination):
+                on_moved(move, destination)
+
+        with UndoLog(undo_path, self.id) as undo_log:
+            for move in recovered:
+                destination = str(self.destination_path(move))
+                undo_log.record(move, str(self.source_path(move)), destination)
+                on_moved(move, destination)
+
+            for moved, (move, source, destination) in enumerate(same_device, 1):
+                with recorder.time('move', move.uuid):
+                    os.rename(source, destination)
+                undo_log.record(move, source, destination)
+                on_moved(move, destination)
+                if moved % 100 == 0:
+                    print(f"   ✅ Flyttet {moved} filer...")
+
+            if cross_device:
+                print(f"   📀 Kopierer {len(cross_device)} filer til et andet drev ({workers} tråde)...")
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(_copy_then_unlink, *item, recorder) for item in cross_device
+                    ]
+                    for future in as_completed(futures):
+                        move, source, destination = future.result()
+                        undo_log.record(move, source, destination)
+                        on_moved(move, destination)
+
+            undo_log.finish()
+
+        return len(logged) + len(recovered)
+
+    @staticmethod
+    def undo(undo_path):
+        """
+        Flyt alt fra undo loggen tilbage, nyeste først, og slet loggen.
+
+        Returns:
+            liste af Move (med absolutte stier) der er flyttet tilbage
+        """
+        entries = _read_undo_log(undo_path)
+        restored = []
+        for entry in reversed(entries):
+            destination = Path(entry['to'])
+            source = Path(entry['from'])
+            if not destination.exists() or source.exists():
+                continue
+            source.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(destination, source)
+            except OSError:
+                shutil.move(str(destination), str(source))
+            restored.append(Move(entry['uuid'], source, destination, entry['dated']))
+
+        Path(undo_path).unlink(missing_ok=True)
+        return restored
+
+
+def _copy_then_unlink(move, source, destination, recorder):
+    tmp_path = destination + '.tmp'
+    with recorder.time('move', move.uuid, copied=True) as measurement:
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, destination)
+        os.unlink(source)
+        measurement['bytes'] = os.path.getsize(destination)
+    return move, source, destination
+
+
+# ─── Undo log ────────────────────────────────────────────────────────────────
+
+def sort_interrupted(undo_path):
+    """True hvis en sortering er stoppet midtvejs (undo loggen er ikke afsluttet)."""
+    return Path(undo_path).exists() and not _log_finished(undo_path)
+
+
+def undo_log_plan(undo_path):
+    """
+    Plan id'et i undo loggens header, eller None hvis der ingen log er.
+
+    pipeline.py fortsætter en eksisterende log under dette id i stedet for
+    at erstatte den, så `3_sort.py --undo` stadig dækker sidste sortering.
+    """
+    undo_path = Path(undo_path)
+    if not undo_path.exists():
+        return None
+    with open(undo_path, 'r', encoding='utf-8') as f:
+        try:
+            return json.loads(f.readline()).get('plan')
+        except json.JSONDecodeError:
+            return None
+
+
+def _log_finished(undo_path, anywhere=False):
+    """
+    True hvis kørslen der skrev undo loggen nåede til ende.
+
+    Med anywhere=True tæller en afslutning hvor som helst i loggen (læser
+    hele filen); ellers kun den sidste linje.
+    """
+    with open(undo_path, 'rb') as f:
+        if anywhere:
+            return b'"finished": true}' in f.read()
+        f.seek(max(0, f.seek(0, 2) - 64))
+        return f.read().rstrip().endswith(b'"finished": true}')
+
+
+def _log_belongs_to(undo_path, plan_id):
+    """True hvis undo loggen findes og blev startet af planen med plan_id."""
+    undo_path = Path(undo_path)
+    if not undo_path.exists():
+        return False
+    with open(undo_path, 'r', encoding='utf-8') as f:
+        try:
+            return json.loads(f.readline()).get('plan') == plan_id
+        except json.JSONDecodeError:
+            return False
+
+
+def _read_undo_log(undo_path, plan_id=None):
+    """Flytningerne i undo loggen. Med plan_id kun hvis loggen hører til den plan."""
+    undo_path = Path(undo_path)
+    if not undo_path.exists():
+        return []
+
+    entries = []
+    with open(undo_path, 'r', encoding='utf-8') as f:
+        try:
+            header = json.loads(f.readline())
+        except json.JSONDecodeError:
+            return []
+        if plan_id is not None and header.get('plan') != plan_id:
+            return []
+
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Afkortet linje fra et crash midt i en skrivning
+                continue
+            if 'to' in entry:
+                entries.append(entry)
+    return entries
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, 2)
+        return f.read(1) == b'\n'
+
+
+class UndoLog:
+    """Append-only log over gennemførte flytninger (fsync i batches)."""
+
+    def __init__(self, undo_path, plan_id):
+        self.path = Path(undo_path)
+        self.plan_id = plan_id
+        self._file = None
+        self._unsynced = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if _log_belongs_to(self.path, self.plan_id):
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if self._file.tell() and not _ends_with_newline(self.path):
+                # Afslut en halv linje fra et crash, så næste linje kan læses
+                self._file.write('\n')
+        else:
+            # Ny plan: loggen fra sidste kørsel erstattes
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(json.dumps({'plan': self.plan_id, 'started': time.time()}) + '\n')
+            self._sync()
+
+    def close(self):
+        if self._file:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def record(self, move, source, destination):
+        self._file.write(json.dumps({
+            'uuid': move.uuid,
+            'from': source,
+            'to': destination,
+            'dated': move.dated,
+        }, ensure_ascii=False) + '\n')
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_EVERY:
+            self._sync()
+
+    def finish(self):
+        self._file.write(json.dumps({'finished': True}) + '\n')
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
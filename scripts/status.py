@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Status: hvor langt er eksporten nået i hvert trin?
+
+Læser kun de filer pipelinen allerede skriver (manifest cache, journal,
+ledger, undo log) og tæller i bytes i stedet for at parse dem, så svaret
+kommer på få millisekunder — også for eksporter med hundredtusinder af
+memories. Importerer hverken requests eller medie-bibliotekerne.
+
+Brug: python scripts/snap.py status [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from manifest_cache import peek_header
+from overlay_composite import VIDEO_QUEUE_NAME
+from progress_journal import JOURNAL_NAME, count_progress
+from shards import find_shard_files
+from sort_ledger import LEDGER_NAME, count_placements
+from uuid_index import UuidIndex
+from zip_extract import OVERLAY_FOLDER_NAME
+
+# ─── Konfiguration ───────────────────────────────────────────────────────────
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HTML_FILE = PROJECT_ROOT / "input" / "memories_history.html"
+RAW_DIR = PROJECT_ROOT / "data" / "raw"
+MANIFEST_CACHE = PROJECT_ROOT / "data" / "cache" / "memories_manifest.tsv"
+JOURNAL_FILE = RAW_DIR / JOURNAL_NAME
+SORT_LEDGER = PROJECT_ROOT / "data" / LEDGER_NAME
+SORT_UNDO = PROJECT_ROOT / "data" / "sort_undo.jsonl"
+VIDEO_QUEUE = RAW_DIR / OVERLAY_FOLDER_NAME / VIDEO_QUEUE_NAME
+
+MEDIA_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.mp4', '.mov'}
+
+
+def count_raw_files(folder):
+    """Filer i data/raw/ fordelt på media, zip og andet (kun øverste niveau)."""
+    counts = Counter()
+    if not folder.exists():
+        return counts
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            extension = os.path.splitext(entry.name)[1].lower()
+            if extension == '.zip':
+                counts['zip'] += 1
+            elif extension in MEDIA_EXTENSIONS:
+                counts['media'] += 1
+    partial = folder / "partial"
+    if partial.exists():
+        counts['partial'] = sum(1 for entry in os.scandir(partial) if entry.is_file())
+    return counts
+
+
+def count_lines(path):
+    """Antal linjer i en fil (0 hvis den ikke findes)."""
+    try:
+        return path.read_bytes().count(b'\n')
+    except OSError:
+        return 0
+
+
+def collect_status():
+    """Saml status for alle trin i én dict (samme form som --json)."""
+    header = peek_header(HTML_FILE, MANIFEST_CACHE) if HTML_FILE.exists() else None
+    unique = None
+    if header:
+        # Samme memory står ofte flere gange i HTML'en — UUID indekset kender det unikke antal
+        index = UuidIndex.open_if_valid(MANIFEST_CACHE.with_suffix('.idx'), bytes.fromhex(header['sha256']))
+        if index is not None:
+            unique = index.count
+            index.close()
+
+    downloaded, failed = count_progress(JOURNAL_FILE)
+    shard_files = find_shard_files(JOURNAL_FILE)
+    for shard_journal in shard_files.values():
+        shard_downloaded, shard_failed = count_progress(shard_journal)
+        downloaded += shard_downloaded
+        failed.update(shard_failed)
+
+    interrupted = False
+    if SORT_UNDO.exists():
+        # sort_plan trækker concurrent.futures med — kun når der er en undo log
+        from sort_plan import sort_interrupted
+        interrupted = sort_interrupted(SORT_UNDO)
+
+    return {
+        'export': {
+            'html': HTML_FILE.exists(),
+            'memories': header['count'] if header else None,
+            'dated': header['dated'] if header else None,
+            'unique': unique,
+        },
+        'download': {
+            'downloaded': downloaded,
+            'failed': dict(Counter(reason or 'ukendt' for _, reason in failed.values())),
+            'shards': [f"{index}/{count}" for index, count in shard_files],
+        },
+        'raw': dict(count_raw_files(RAW_DIR)),
+        'sort': {
+            'placed': count_placements(SORT_LEDGER),
+            'interrupted': interrupted,
+            'video_overlays_queued': count_lines(VIDEO_QUEUE),
+        },
+    }
+
+
+def print_status(status):
+    export, download, raw, sort = status['export'], status['download'], status['raw'], status['sort']
+
+    print("📋 Eksport")
+    if not export['html']:
+        print(f"   ❌ {HTML_FILE.relative_to(PROJECT_ROOT)} mangler")
+    elif export['memories'] is None:
+        print("   ⏳ HTML'en er ikke læst endnu (kør download)")
+    else:
+        line = f"   {export['memories']:,} memories ({export['dated']:,} med dato)"
+        if export['unique'] is not None and export['unique'] != export['memories']:
+            line += f", {export['unique']:,} unikke"
+        print(line)
+
+    print("📥 Download")
+    total = export['unique'] or export['memories']
+    line = f"   ✅ {download['downloaded']:,}"
+    if total:
+        line += f" / {total:,} ({download['downloaded'] / total * 100:.1f}%)"
+    print(line)
+    for reason, count in sorted(download['failed'].items()):
+        print(f"   ❌ {count:,} fejlede ({reason})")
+    if download['shards']:
+        print(f"   🧩 Ufusionerede shards: {', '.join(download['shards'])}")
+
+    print("📦 data/raw")
+    print(f"   {raw.get('media', 0):,} medier, {raw.get('zip', 0):,} zip filer"
+          + (f", {raw['partial']:,} halve downloads" if raw.get('partial') else ""))
+
+    print("🗂️  Sortering")
+    print(f"   ✅ {sort['placed']:,} placeret i data/sorted")
+    if sort['interrupted']:
+        print("   ⚠️  En sortering blev afbrudt — kør sort igen for at fortsætte")
+    if sort['video_overlays_queued']:
+        print(f"   🎬 {sort['video_overlays_queued']:,} videoer venter på overlay")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vis hvor langt eksporten er nået i hvert trin.")
+    parser.add_argument('--json', action='store_true', help="Skriv status som JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    status = collect_status()
+    status['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+    if args.json:
+        json.dump(status, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_status(status)
+        print(f"\n⏱️  {status['elapsed_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Trin 2: Udpak ZIP-filer fra Snapchat memories.
+
+Snapchat pakker memories med text-overlays som ZIP-filer.
+Hver ZIP indeholder en mediefil (stort) og et overlay (lille).
+Vi udpakker kun mediefilen og omdøber den til det originale UUID.
+Med --keep-overlay gemmes overlayet i data/raw/overlays/. Med --composite
+lægges overlayet oven på billedet i stedet (kræver numpy og Pillow); video
+overlays gemmes og skrives i overlays/video_queue.jsonl til en senere pass.
+
+Brug:
+    python scripts/2_unzip.py
+    python scripts/2_unzip.py --workers 8 --keep-overlay
+    python scripts/2_unzip.py --composite
+    python scripts/2_unzip.py --metrics --profile extract
+
+Input:  data/raw/*.zip
+Output: data/raw/*.{jpg,mp4}  (ZIP-filer slettes efter udpakning)
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+from pathlib import Path
+from functools import partial
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+from overlay_composite import (
+    COMPOSITED, QUEUED, UNREADABLE, VIDEO_QUEUE_NAME, composite_zip, missing_dependencies,
+)
+from zip_extract import OVERLAY_FOLDER_NAME, extract_zip_inplace
+
+# ─── Konfiguration ───────────────────────────────────────────────────────────
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+WORKING_FOLDER = PROJECT_ROOT / "data" / "raw"
+METRICS_DIR = PROJECT_ROOT / "data" / "metrics"
+
+WORKERS = os.cpu_count() or 1   # Antal processer der udpakker samtidig
+
+
+# ─── Extraction ──────────────────────────────────────────────────────────────
+
+def extract_timed(zip_path, keep_overlay=False, composite=False):
+    """
+    Kør extract_zip_inplace (eller composite_zip) og mål tiden — køres i en worker proces.
+
+    Returns:
+        (success, uuid, file_size, info, overlay_status, seconds, worker_pid)
+    """
+    start = time.perf_counter()
+    if composite:
+        result = composite_zip(zip_path, keep_overlay)
+    else:
+        result = (*extract_zip_inplace(zip_path, keep_overlay), None)
+    return (*result, time.perf_counter() - start, os.getpid())
+
+
+def extract_inline(zip_files, extract, recorder):
+    """Udpak i denne proces, én ad gangen — så --profile kan se kaldene."""
+    for zip_path in zip_files:
+        with recorder.profile('extract'):
+            result = extract(zip_path)
+        yield result
+
+
+def queue_video_overlays(uuids):
+    """Tilføj videoer med overlay til køen i data/raw/overlays/ (til en senere pass)."""
+    queue_path = WORKING_FOLDER / OVERLAY_FOLDER_NAME / VIDEO_QUEUE_NAME
+    with open(queue_path, 'a', encoding='utf-8') as f:
+        for uuid in uuids:
+            f.write(json.dumps({'uuid': uuid, 'overlay': f"{uuid}.png"}) + '\n')
+    return queue_path
+
+
+def extraction_confirmed(zip_path, file_size, extension):
+    """Tjek at den udpakkede fil findes med den forventede størrelse."""
+    output_path = zip_path.parent / f"{zip_path.stem}{extension}"
+    try:
+        return output_path.stat().st_size == file_size
+    except OSError:
+        return False
+
+
+# ─── Hovedfunktion ────────────────────────────────────────────────────────────
+
+def parse_args():
+    """Læs kommandolinje-argumenter."""
+    parser = argparse.ArgumentParser(description="Udpak Snapchat ZIP-filer.")
+    parser.add_argument(
+        '--workers', type=int, default=WORKERS,
+        help=f"antal processer der udpakker samtidig (default: {WORKERS})",
+    )
+    parser.add_argument(
+        '--keep-overlay', action='store_true',
+        help=f"gem tekst-overlays i data/raw/{OVERLAY_FOLDER_NAME}/ i stedet for at smide dem væk",
+    )
+    parser.add_argument(
+        '--composite', action='store_true',
+        help="læg tekst-overlayet oven på billederne (kræver numpy og Pillow)",
+    )
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Udpak alle ZIP-filer i data/raw/."""
+    args = parse_args()
+    workers = max(1, args.workers)
+
+    print("=" * 60)
+    print("📦 SNAPCHAT ZIP UNPACKER")
+    print("=" * 60)
+    print()
+
+    if not WORKING_FOLDER.exists():
+        print(f"❌ Mappe ikke fundet: {WORKING_FOLDER}")
+        print(f"   Kør først: python scripts/1_download.py")
+        return
+
+    # Find ZIP filer
+    zip_files = list(WORKING_FOLDER.glob('*.zip'))
+    zip_count = len(zip_files)
+
+    print(f"📁 Arbejdsmappe: {WORKING_FOLDER}")
+    print(f"📦 Fandt {zip_count} ZIP filer der skal udpakkes")
+    print(f"💾 Ledig diskplads: {shutil.disk_usage(WORKING_FOLDER).free / (1024**3):.2f} GB")
+    print()
+
+    if zip_count == 0:
+        print("⚠️  Ingen ZIP filer fundet — intet at udpakke.")
+        return
+
+    if args.composite and missing_dependencies():
+        print(f"❌ --composite kræver: {', '.join(missing_dependencies())}")
+        print(f"   Installér med: pip install numpy pillow")
+        return
+
+    recorder = metrics.from_args(args, METRICS_DIR, '2_unzip')
+    if recorder.profiler and workers > 1:
+        # cProfile/tracemalloc kan kun se denne proces
+        print("🔬 Profilering: udpakker i én proces")
+        workers = 1
+
+    # Process alle ZIP filer
+    workers = min(workers, zip_count)
+    print(f"🚀 Starter udpakning med {workers} worker(s)...\n")
+
+    processed_count = 0
+    failed_count = 0
+    failed_files = []
+    total_size = 0
+    worker_bytes = defaultdict(int)
+    worker_seconds = defaultdict(float)
+    composited_count = 0
+    composite_seconds = 0.0
+    queued_videos = []
+    unreadable_count = 0
+    start_time = time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    extract = partial(extract_timed, keep_overlay=args.keep_overlay, composite=args.composite)
+    if pool:
+        results = pool.map(extract, zip_files, chunksize=4)
+    else:
+        results = extract_inline(zip_files, extract, recorder)
+
+    for zip_file, (success, uuid, file_size, info, overlay_status, seconds, pid) in zip(zip_files, results):
+        worker_bytes[pid] += file_size
+        worker_seconds[pid] += seconds
+        stage = 'composite' if overlay_status == COMPOSITED else 'extract'
+        recorder.record(stage, seconds, uuid, file_size, worker=pid, ok=success)
+
+        if success and not extraction_confirmed(zip_file, file_size, info):
+            success, info = False, "Udpakket fil mangler eller har forkert størrelse"
+
+        if success:
+            processed_count += 1
+            total_size += file_size
+            if overlay_status == COMPOSITED:
+                composited_count += 1
+                composite_seconds += seconds
+            elif overlay_status == QUEUED:
+                queued_videos.append(uuid)
+            elif overlay_status == UNREADABLE:
+                unreadable_count += 1
+            marker = {
+                COMPOSITED: " 🖼️  med overlay",
+                QUEUED: " 🎞️  overlay i kø",
+                UNREADABLE: " ⚠️  kunne ikke læses — overlay gemt i overlays/",
+            }.get(overlay_status, "")
+            print(f"✅ {uuid} → {info} ({file_size / (1024 * 1024):.2f} MB){marker}")
+
+            # Slet original ZIP fil efter succesfuld udpakning
+            with recorder.time('unlink', uuid):
+                zip_file.unlink()
+        else:
+            failed_count += 1
+            failed_files.append((uuid, info))
+            print(f"❌ {uuid}: {info}")
+
+    if pool:
+        pool.shutdown()
+    elapsed = time.perf_counter() - start_time
+    queue_path = queue_video_overlays(queued_videos) if queued_videos else None
+
+    # Opsummering
+    print(f"\n{'=' * 60}")
+    print(f"✨ Udpakning færdig!")
+    print(f"📊 Udpakket: {processed_count} filer")
+    print(f"❌ Fejlet: {failed_count} filer")
+    print(f"💾 Total størrelse: {total_size / (1024**3):.2f} GB")
+    print(f"⏱️  Tid: {elapsed:.1f}s ({total_size / (1024**2) / max(elapsed, 1e-9):.1f} MB/s samlet)")
+    if args.composite:
+        print(f"🖼️  Billeder med overlay: {composited_count} "
+              f"({composited_count / max(elapsed, 1e-9):.1f} billeder/s samlet, "
+              f"{composite_seconds / max(composited_count, 1) * 1000:.0f} ms per billede)")
+        if unreadable_count:
+            print(f"⚠️  {unreadable_count} billeder kunne ikke læses af Pillow — udpakket uden "
+                  f"overlay, overlayet gemt i {OVERLAY_FOLDER_NAME}/")
+        if queue_path:
+            print(f"🎞️  Videoer med overlay: {len(queued_videos)} — sat i kø i {queue_path}")
+    print(f"{'=' * 60}")
+
+    print(f"\n⚙️  Throughput per worker:")
+    for n, pid in enumerate(sorted(worker_bytes), 1):
+        mb = worker_bytes[pid] / (1024**2)
+        print(f"   Worker {n}: {mb:.1f} MB på {worker_seconds[pid]:.1f}s "
+              f"({mb / max(worker_seconds[pid], 1e-9):.1f} MB/s)")
+
+    if failed_files:
+        print(f"\n⚠️  Fejlede filer:")
+        for uuid, info in failed_files:
+            print(f"   - {uuid}: {info}")
+
+    # Verificering
+    print(f"\n🔍 Verificering:")
+    all_files = [f for f in WORKING_FOLDER.glob('*') if f.is_file()]
+    mp4_count = len(list(WORKING_FOLDER.glob('*.mp4')))
+    jpg_count = len(list(WORKING_FOLDER.glob('*.jpg')))
+    remaining_zips = len(list(WORKING_FOLDER.glob('*.zip')))
+
+    print(f"   Totalt antal filer: {len(all_files)}")
+    print(f"   - MP4 videoer: {mp4_count}")
+    print(f"   - JPG billeder: {jpg_count}")
+    print(f"   Resterende ZIP filer: {remaining_zips}")
+
+    if remaining_zips == 0:
+        print(f"\n✅ Alle ZIP filer er udpakket!")
+        print(f"📁 {len(all_files)} minder klar til sortering (trin 3)")
+    else:
+        print(f"\n⚠️  {remaining_zips} ZIP filer udestår stadig")
+
+    metrics.report(recorder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Kompakt, sorteret UUID-indeks på disk.
+
+Store eksporter (flere konti, 500k+ rækker) fylder flere hundrede MB som
+Python dicts/sets af strenge og datetime objekter. Her gemmes hver UUID
+i stedet som 16 bytes i en sorteret fil med faste 32-byte records:
+
+    uuid (16 bytes) | a (int64) | b (int64)
+
+fx a = første række i HTML'en og b = timestamp i epoch-sekunder. Filen
+mmap'es, så opslag koster ingen Python objekter per UUID — kun sider i
+OS'ets page cache. Et directory med 65536 indgange (de første to bytes af
+UUID'en) peger på det lille interval der skal binærsøges i.
+
+Indekset bygges med en ekstern merge sort: records sorteres i runs af
+RUN_RECORDS ad gangen og flettes fra disk, så hukommelsen er den samme
+uanset antal rækker. Ved ens UUID beholdes den mindste a (første forekomst).
+"""
+
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+MAGIC = b'SNAPIDX1'
+HEADER = struct.Struct('>8sQQ32s')       # magic, antal UUIDs, antal records ind, tag
+RECORD = struct.Struct('>16sqq')         # uuid, a, b
+DIRECTORY_SIZE = 65536 + 1
+DIRECTORY = struct.Struct(f'>{DIRECTORY_SIZE}I')
+RUN_RECORDS = 200_000                    # Records sorteret i hukommelsen ad gangen (~12 MB)
+NO_TIMESTAMP = -2 ** 63
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def pack_uuid(uuid):
+    """'ABCDEF12-...' → 16 bytes, eller None hvis det ikke er en UUID."""
+    try:
+        key = bytes.fromhex(uuid.replace('-', ''))
+    except (ValueError, AttributeError):
+        return None
+    return key if len(key) == 16 else None
+
+
+def unpack_uuid(key):
+    """16 bytes → 'ABCDEF12-3456-7890-ABCD-EF1234567890'."""
+    h = key.hex().upper()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def to_epoch(dt):
+    """Naivt UTC datetime → epoch-sekunder (NO_TIMESTAMP for None)."""
+    if dt is None:
+        return NO_TIMESTAMP
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def from_epoch(seconds):
+    """Epoch-sekunder → naivt UTC datetime (som i Snapchat's HTML)."""
+    return UNIX_EPOCH + timedelta(seconds=seconds)
+
+
+# ─── Bygning ─────────────────────────────────────────────────────────────────
+
+def _spill(run, folder):
+    """Sortér et run og skriv det til en midlertidig fil."""
+    run.sort()
+    fd, name = tempfile.mkstemp(prefix='run-', suffix='.idx', dir=folder)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(run))
+    return name
+
+
+def _read_run(name):
+    with open(name, 'rb') as f:
+        while True:
+            record = f.read(RECORD.size)
+            if len(record) < RECORD.size:
+                return
+            yield record
+
+
+def write_index(path, records, tag=b''):
+    """
+    Byg et indeks fra (uuid_bytes, a, b) tuples i vilkårlig rækkefølge.
+
+    Skrives atomisk (temp fil + rename). tag (max 32 bytes) gemmes i
+    headeren, fx et hash af det indekset er bygget fra.
+
+    Returns:
+        antal unikke UUIDs
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    runs = []
+    run = []
+    offered = 0
+    try:
+        for key, a, b in records:
+            run.append(RECORD.pack(key, a, b))
+            offered += 1
+            if len(run) >= RUN_RECORDS:
+                runs.append(_spill(run, path.parent))
+                run = []
+
+        if runs:
+            if run:
+                runs.append(_spill(run, path.parent))
+            merged = heapq.merge(*(_read_run(name) for name in runs))
+        else:
+            run.sort()
+            merged = iter(run)
+
+        directory = [0] * DIRECTORY_SIZE
+        count = 0
+        previous = None
+        # Unikt temp navn, så flere processer (--shard) kan bygge samme indeks
+        fd, tmp_name = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+        runs.append(tmp_name)         # Slettes i finally hvis rename ikke nås
+        with open(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 0, 0, b''))
+            f.write(DIRECTORY.pack(*directory))
+            for record in merged:
+                key = record[:16]
+                if key == previous:
+                    continue          # Samme UUID — første (mindste a) er allerede skrevet
+                previous = key
+                f.write(record)
+                directory[(key[0] << 8 | key[1]) + 1] += 1
+                count += 1
+
+            for prefix in range(1, DIRECTORY_SIZE):
+                directory[prefix] += directory[prefix - 1]
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, count, offered, tag[:32]))
+            f.write(DIRECTORY.pack(*directory))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    finally:
+        for name in runs:
+            if os.path.exists(name):
+                os.unlink(name)
+
+    return count
+
+
+# ─── Opslag ──────────────────────────────────────────────────────────────────
+
+class UuidIndex:
+    """
+    Read-only opslag i et indeks skrevet af write_index.
+
+    Brug:
+        with UuidIndex(path) as index:
+            index.get(uuid)       # (a, b) eller None
+            uuid in index
+            for uuid, a, b in index.items(): ...
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            magic, self.count, self.offered, self.tag = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Ikke et UUID-indeks: {self.path}")
+            self._directory = array('I', DIRECTORY.unpack(f.read(DIRECTORY.size)))
+            self._start = HEADER.size + DIRECTORY.size
+            self._map = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b''
+            )
+
+    @classmethod
+    def open_if_valid(cls, path, tag):
+        """Åbn indekset hvis det findes og er bygget med samme tag, ellers None."""
+        try:
+            index = cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if index.tag.rstrip(b'\x00') != tag[:32].rstrip(b'\x00'):
+            index.close()
+            return None
+        return index
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, key):
+        """Offset til UUID'ens record i mmap'en, eller -1."""
+        prefix = key[0] << 8 | key[1]
+        low, high = self._directory[prefix], self._directory[prefix + 1]
+        data, start, size = self._map, self._start, RECORD.size
+        while low < high:
+            middle = (low + high) // 2
+            offset = start + middle * size
+            probe = data[offset:offset + 16]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return offset
+        return -1
+
+    def get(self, uuid, default=None):
+        """(a, b) for UUID'en, eller default."""
+        key = pack_uuid(uuid)
+        if key is None or not self.count:
+            return default
+        offset = self._find(key)
+        if offset < 0:
+            return default
+        return RECORD.unpack_from(self._map, offset)[1:]
+
+    def __contains__(self, uuid):
+        key = pack_uuid(uuid)
+        return key is not None and bool(self.count) and self._find(key) >= 0
+
+    def items(self):
+        """(uuid, a, b) i UUID rækkefølge."""
+        for n in range(self.count):
+            key, a, b = RECORD.unpack_from(self._map, self._start + n * RECORD.size)
+            yield unpack_uuid(key), a, b
+
+
+class UuidSet:
+    """
+    Kompakt mængde af UUIDs (fx fra journalen eller ledgeren).
+
+    UUIDs ligger i et UuidIndex på disk; navne der ikke er UUIDs (fx
+    'memory_1700000000000' fra URLs uden mid=) holdes i et almindeligt set.
+    """
+
+    def __init__(self, path, uuids=()):
+        self.other = set()
+
+        def records():
+            for position, uuid in enumerate(uuids):
+                key = pack_uuid(uuid)
+                if key is None:
+                    self.other.add(uuid)
+                else:
+                    yield key, position, 0
+
+        write_index(path, records())
+        self.index = UuidIndex(path)
+
+    def close(self):
+        self.index.close()
+
+    def __len__(self):
+        return len(self.index) + len(self.other)
+
+    def __contains__(self, uuid):
+        return uuid in self.index or uuid in self.other
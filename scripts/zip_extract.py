@@ -0,0 +1,161 @@
+"""
+Udpakning af Snapchat's overlay ZIP-filer.
+
+Hver ZIP indeholder en mediefil (størst) og et tekst-overlay (mindst).
+Mediefilen udpakkes og omdøbes til ZIP'ens UUID; overlayet kan gemmes i
+en overlays/ mappe ved siden af. Bruges af 2_unzip.py og af 1_download.py
+når ZIPs udpakkes direkte under download.
+"""
+
+import os
+import shutil
+import struct
+import zipfile
+from pathlib import Path
+
+COPY_CHUNK_SIZE = 1024 * 1024   # Bidstørrelse når kernel-copy ikke er muligt
+OVERLAY_FOLDER_NAME = 'overlays'
+
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+
+# ─── Stored members (ingen komprimering) ─────────────────────────────────────
+
+def stored_data_offset(zip_file, info):
+    """
+    Find byte-offset for en members data i selve ZIP filen.
+
+    Local headerens extra-felt kan afvige fra central directory, så
+    headeren læses direkte.
+    """
+    zip_file.seek(info.header_offset)
+    header = zip_file.read(LOCAL_HEADER_SIZE)
+    if len(header) != LOCAL_HEADER_SIZE or header[:4] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Ugyldig local header for {info.filename}")
+
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    return info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+
+
+def copy_range(source, target, offset, count):
+    """
+    Kopiér count bytes fra offset i source til target.
+
+    Bruger os.copy_file_range (Linux) eller os.sendfile, så data kopieres i
+    kernen uden at passere gennem Python. Falder tilbage til almindelig
+    read/write hvis ingen af dem virker på platformen/filsystemet.
+    """
+    src_fd, dst_fd = source.fileno(), target.fileno()
+    copied = 0
+
+    for kernel_copy in (_copy_file_range, _sendfile):
+        try:
+            while copied < count:
+                n = kernel_copy(src_fd, dst_fd, offset + copied, count - copied)
+                if n == 0:
+                    raise EOFError("ZIP filen sluttede før forventet")
+                copied += n
+            return
+        except (OSError, AttributeError):
+            # Ikke understøttet her — fortsæt med næste metode fra hvor vi kom til
+            continue
+
+    source.seek(offset + copied)
+    target.seek(copied)
+    while copied < count:
+        chunk = source.read(min(COPY_CHUNK_SIZE, count - copied))
+        if not chunk:
+            raise EOFError("ZIP filen sluttede før forventet")
+        target.write(chunk)
+        copied += len(chunk)
+
+
+def _copy_file_range(src_fd, dst_fd, offset, count):
+    return os.copy_file_range(src_fd, dst_fd, count, offset_src=offset)
+
+
+def _sendfile(src_fd, dst_fd, offset, count):
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+def extract_stored_member(zip_path, info, output_path):
+    """
+    Udpak en ukomprimeret (ZIP_STORED) member med kernel-side kopiering.
+
+    CRC tjekkes ikke her (det ville kræve at læse alle bytes ind i Python);
+    størrelsen bekræftes af main() før ZIP'en slettes.
+    """
+    with open(zip_path, 'rb') as source, open(output_path, 'wb') as target:
+        offset = stored_data_offset(source, info)
+        copy_range(source, target, offset, info.file_size)
+
+
+# ─── Extraction ──────────────────────────────────────────────────────────────
+
+def extract_member(zip_path, zip_ref, info, output_path):
+    """
+    Udpak én member til output_path.
+
+    JPG/MP4 ligger ofte ukomprimeret i ZIP'en — så kopieres bytes direkte
+    uden dekomprimering.
+    """
+    is_encrypted = info.flag_bits & 0x1
+    if info.compress_type == zipfile.ZIP_STORED and not is_encrypted:
+        extract_stored_member(zip_path, info, output_path)
+    else:
+        with zip_ref.open(info) as source, open(output_path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+
+
+def extract_zip_inplace(zip_path, keep_overlay=False):
+    """
+    Udpak ZIP fil in-place og behold original UUID som filnavn.
+
+    ZIP filer fra Snapchat indeholder typisk:
+    - En video/billede fil (hovedindhold — størst)
+    - Eventuelt en overlay fil (mindst)
+
+    Vi udpakker den største fil og omdøber den til ZIP'ens UUID. Med
+    keep_overlay gemmes de øvrige filer som overlays/<UUID>.<ext>.
+    """
+    uuid = zip_path.stem
+    parent_folder = zip_path.parent
+
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            # Få liste over filer (ekskl. mapper)
+            file_list = [f for f in zip_ref.infolist() if not f.is_dir()]
+
+            if not file_list:
+                return False, uuid, 0, "Tom ZIP fil"
+
+            # Find største fil (hovedindholdet, ikke overlay)
+            main_file = max(file_list, key=lambda f: f.file_size)
+
+            # Få filendelse fra den udpakkede fil
+            extension = Path(main_file.filename).suffix.lower()
+
+            # Output filnavn: UUID + original extension
+            output_filename = f"{uuid}{extension}"
+            output_path = parent_folder / output_filename
+
+            # Udpak hovedfilen
+            extract_member(zip_path, zip_ref, main_file, output_path)
+
+            if keep_overlay:
+                overlays = [f for f in file_list if f is not main_file]
+                overlay_folder = parent_folder / OVERLAY_FOLDER_NAME
+                for n, overlay in enumerate(overlays, 1):
+                    overlay_folder.mkdir(exist_ok=True)
+                    suffix = f"_{n}" if n > 1 else ""
+                    overlay_extension = Path(overlay.filename).suffix.lower()
+                    overlay_path = overlay_folder / f"{uuid}{suffix}{overlay_extension}"
+                    extract_member(zip_path, zip_ref, overlay, overlay_path)
+
+            return True, uuid, main_file.file_size, extension
+
+    except zipfile.BadZipFile:
+        return False, uuid, 0, "Korrupt ZIP fil"
+    except Exception as e:
+        return False, uuid, 0, str(e)